@@ -0,0 +1,87 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script benchmarks the NVN MOD rule on progressively longer documents built by concatenating
+BBC articles from input/news_articles. Documents are parsed once up front so that only the rule layer
+is timed. The time per token should stay flat as the documents grow, whereas the previous modifier
+lookup (a scan over the whole doc for every subject and object) grows linearly per token.
+"""
+import os
+import sys
+import glob
+import time
+file_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(file_dir)
+
+from spacy.tokens import Doc
+from src.pattern_finder import rule_nvn_mod
+from utility.utility import load_spacy_model
+
+def rule_ad_mod_scan(doc: Doc, index: int) -> str:
+    # previous implementation, kept here only as the baseline of the benchmark
+    phrase = ''
+    for token in doc:
+        if token.i == index:
+            for subtoken in token.children:
+                if (subtoken.pos_ == 'ADJ'):
+                    phrase += ' '+subtoken.text
+            break
+    return phrase
+
+def rule_nvn_mod_scan(doc: Doc) -> list:
+    # rule_nvn_mod wired to the scanning modifier lookup
+    sent = []
+    for token in doc:
+        if (token.pos_=='VERB'):
+            phrase =''
+            for sub_tok in token.lefts:
+                if (sub_tok.dep_ in ['nsubj','nsubjpass']) and (sub_tok.pos_ in ['NOUN','PROPN','PRON']):
+                    phrase += rule_ad_mod_scan(doc, sub_tok.i) + ' ' + sub_tok.text
+                    phrase += ' '+token.lemma_
+                    for sub_tok in token.rights:
+                        if (sub_tok.dep_ in ['dobj']) and (sub_tok.pos_ in ['NOUN','PROPN']):
+                            phrase += rule_ad_mod_scan(doc, sub_tok.i)+' '+sub_tok.text
+                            sent.append({'phrase':phrase, 'verb':token.lemma_})
+    return sent
+
+def time_rule(rule, doc: Doc, repeat: int = 3) -> float:
+    """
+    This function returns the best wall clock time out of the repeated runs of a rule over a parsed doc.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rule(doc)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+if __name__ == "__main__":
+    # Benchmark configurations
+    articles_path = os.path.join(file_dir, 'input', 'news_articles')
+    spacy_model_name = 'en_core_web_lg'
+    articles_per_document = [1, 2, 4, 8, 16, 32]
+
+    article_file_paths = sorted(glob.glob(os.path.join(articles_path, '*', '*.txt')))
+    articles = []
+    for article_file_path in article_file_paths[:max(articles_per_document)]:
+        with open(article_file_path, mode = 'r', encoding = "ISO-8859-1") as file:
+            articles.append(file.read())
+
+    spacy_loaded_model = load_spacy_model(spacy_model_name, profile='rules')
+    spacy_loaded_model.max_length = max(spacy_loaded_model.max_length, sum(len(article) for article in articles) + 1)
+
+    print(f"{'articles':>8} {'tokens':>8} {'indexed (s)':>12} {'scan (s)':>10} {'indexed us/token':>17} {'scan us/token':>14}")
+    for n_articles in articles_per_document:
+        doc = spacy_loaded_model('\n\n'.join(articles[:n_articles]))
+        assert [{'phrase': record.phrase, 'verb': record.verb} for record in rule_nvn_mod(doc)] == rule_nvn_mod_scan(doc)
+        indexed_time = time_rule(rule_nvn_mod, doc)
+        scan_time = time_rule(rule_nvn_mod_scan, doc)
+        print(f"{n_articles:>8} {len(doc):>8} {indexed_time:>12.4f} {scan_time:>10.4f} "
+              f"{1e6*indexed_time/len(doc):>17.2f} {1e6*scan_time/len(doc):>14.2f}")
@@ -0,0 +1,71 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script benchmarks preprocess_text, now running the compiled TextPreprocessor, against the chain of
+sn_textual_preprocessing functions it replaces, over the BBC articles from input/news_articles. Both
+must give identical texts. The time spent in sent_tokenize, which both share, is reported apart.
+"""
+import os
+import sys
+import glob
+import time
+import string
+file_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(file_dir)
+
+from src.pattern_finder import preprocess_text
+from supporting_scripts_notebooks.sn_textual_preprocessing import remove_urls, remove_mentions_hashtags, remove_contractions, \
+    remove_stopwords_punc_nos, remove_extra_spaces, sent_tokenize
+
+def preprocess_text_chain(text: str) -> str:
+    # previous implementation of preprocess_text, kept here only as the baseline of the benchmark
+    result = remove_urls(text)
+    result = remove_mentions_hashtags(result)
+    result = remove_contractions(result)
+    result = remove_stopwords_punc_nos(result, 
+                                    remove_stopwords_flag=False, 
+                                    punc_2_remove=string.punctuation.replace('-','').replace('%','').replace('.',''), 
+                                    remove_digits_flag=False,
+                                    remove_pattern_punc_flag=True)
+    result = remove_extra_spaces(result)
+    return result
+
+def time_preprocessing(preprocess, articles: list, repeat: int = 3) -> tuple:
+    """
+    This function returns the best wall clock time out of the repeated runs of a preprocessing function
+    over the articles, along with the preprocessed texts.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = [preprocess(article) for article in articles]
+        timings.append(time.perf_counter() - start)
+    return min(timings), texts
+
+if __name__ == "__main__":
+    # Benchmark configurations
+    articles_path = os.path.join(file_dir, 'input', 'news_articles')
+
+    articles = []
+    for article_file_path in sorted(glob.glob(os.path.join(articles_path, '*', '*.txt'))):
+        with open(article_file_path, mode = 'r', encoding = "ISO-8859-1") as file:
+            articles.append(file.read())
+    n_chars = sum(len(article) for article in articles)
+
+    chain_time, chain_texts = time_preprocessing(preprocess_text_chain, articles)
+    compiled_time, compiled_texts = time_preprocessing(preprocess_text, articles)
+    sentence_time, _ = time_preprocessing(sent_tokenize, articles)
+    assert compiled_texts == chain_texts, 'TextPreprocessor output differs from the chain of functions'
+
+    print(f'{len(articles)} articles, {n_chars} characters')
+    print(f"{'implementation':>16} | {'total (s)':>10} | {'per doc (ms)':>12} | {'excl. sent_tokenize (ms)':>24}")
+    for name, elapsed in [('chain', chain_time), ('compiled', compiled_time)]:
+        print(f'{name:>16} | {elapsed:10.3f} | {1000*elapsed/len(articles):12.3f} | {1000*(elapsed-sentence_time)/len(articles):24.3f}')
+    print(f'speedup x{chain_time/compiled_time:.2f} overall, x{(chain_time-sentence_time)/(compiled_time-sentence_time):.2f} outside sent_tokenize')
@@ -9,4 +9,7 @@ __status__ = "Development"
 
 ARTICLE_PATH = "input/news_articles"
 SUMMARY_PATH = "input/summaries"
-TRAINING_FILE = "input/news_articles_dataset.csv"
\ No newline at end of file
+TRAINING_DATASET = "input/news_articles_dataset"
+DATASET_FORMAT = "parquet"
+INGESTION_THREADS = 32
+INGESTION_BATCH_SIZE = 10000
\ No newline at end of file
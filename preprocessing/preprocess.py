@@ -8,15 +8,158 @@ __email__ = "rickykonwar@gmail.com"
 __status__ = "Development"
 
 import os
-import pandas as pd
+import uuid
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
 import config
 
+DATASET_FORMATS = ['parquet', 'feather']
+DATASET_SCHEMA = pa.schema([
+    ('doc_id', pa.string()),
+    ('filename', pa.string()),
+    ('articles', pa.string()),
+    ('summaries', pa.string()),
+    ('categories', pa.string()),
+])
+
+def pair_files(articles_path, summaries_path, category):
+    """
+    This function lists the article and summary files of a category and pairs them by filename, files
+    without a counterpart are reported and left out.
+
+    args:
+    - articles_path (str): base folder path for articles
+    - summaries_path (str): base folder path for summaries
+    - category (str): category folder to list
+
+    return:
+    - list: (filename, article file path, summary file path) tuples, sorted by filename
+    """
+    def list_txt_files(folder_path):
+        if not os.path.isdir(folder_path):
+            return dict()
+        with os.scandir(folder_path) as dir_entries:
+            return {dir_entry.name: dir_entry.path for dir_entry in dir_entries if dir_entry.is_file() and dir_entry.name.endswith('.txt')}
+
+    article_files = list_txt_files(os.path.join(articles_path, category))
+    summary_files = list_txt_files(os.path.join(summaries_path, category))
+    unpaired_files = sorted(set(article_files).symmetric_difference(summary_files))
+    if len(unpaired_files) != 0:
+        print(f'{len(unpaired_files)} file(s) without an article or a summary in {category} folders, skipped: {unpaired_files[:10]}')
+    return [(filename, article_files[filename], summary_files[filename]) for filename in sorted(set(article_files) & set(summary_files))]
+
+def read_file_pair(file_pair):
+    # raw bytes of an article and its summary, decoded later batch by batch
+    _, article_file_path, summary_file_path = file_pair
+    with open(article_file_path, mode = 'rb') as file:
+        article = file.read()
+    with open(summary_file_path, mode = 'rb') as file:
+        summary = file.read()
+    return article, summary
+
+def get_dataset_doc_ids(dataset_dir, file_format='parquet'):
+    """
+    This function returns the doc ids ('<category>/<filename>') already written to a dataset, so that an
+    interrupted ingestion resumes from where it stopped.
+    """
+    if not os.path.isdir(dataset_dir):
+        return set()
+    dataset = ds.dataset(dataset_dir, format='ipc' if file_format == 'feather' else 'parquet', schema=DATASET_SCHEMA)
+    return set(dataset.to_table(columns=['doc_id'])['doc_id'].to_pylist())
+
+def bulk_load(articles_path, summaries_path, dataset_dir, category_list=['business', 'entertainment', 'politics', 'sport', 'tech'],
+              file_format='parquet', n_threads=32, batch_size=10000, encoding='ISO-8859-1'):
+    """
+    This function ingests the article and summary files into a columnar dataset. Files are paired by filename,
+    read concurrently by a pool of threads (reading small files is bound by the I/O latency, not by the cpu),
+    decoded batch by batch and every batch is written as one part file of the dataset. Part files are written
+    under a temporary name and renamed once complete, so that the doc ids of the complete parts tell which
+    files to skip when the ingestion is run again after a failure, the leftovers of interrupted parts being removed.
+
+    args:
+    - articles_path (str): base folder path for articles
+    - summaries_path (str): base folder path for summaries
+    - dataset_dir (str): folder of the dataset
+    - category_list (list, str): categories to be considered
+    - file_format (str): 'parquet' or 'feather' part files
+    - n_threads (int): number of threads reading the files
+    - batch_size (int): number of articles per part file
+    - encoding (str): encoding of the text files
+
+    return:
+    - int: number of articles ingested by this run
+    """
+    if file_format not in DATASET_FORMATS:
+        raise ValueError(f"Unknown dataset format '{file_format}', expected one of {DATASET_FORMATS}")
+    os.makedirs(dataset_dir, exist_ok=True)
+    # leftovers of the parts being written when a previous run was interrupted
+    with os.scandir(dataset_dir) as dir_entries:
+        leftover_paths = [dir_entry.path for dir_entry in dir_entries if dir_entry.is_file() and dir_entry.name.startswith('_part-')]
+    for leftover_path in leftover_paths:
+        os.remove(leftover_path)
+    if len(leftover_paths) != 0:
+        print(f'removed {len(leftover_paths)} incomplete part files from {dataset_dir}')
+    ingested_doc_ids = get_dataset_doc_ids(dataset_dir, file_format=file_format)
+    if len(ingested_doc_ids) != 0:
+        print(f'resuming ingestion, {len(ingested_doc_ids)} articles already in {dataset_dir}')
+
+    file_pairs = []
+    for category in category_list:
+        category_pairs = [(category, *file_pair) for file_pair in pair_files(articles_path, summaries_path, category)]
+        print(f'found {len(category_pairs)} article and summary pairs in {category} folders')
+        file_pairs.extend(file_pair for file_pair in category_pairs if f'{file_pair[0]}/{file_pair[1]}' not in ingested_doc_ids)
+
+    n_ingested = 0
+    with ThreadPoolExecutor(max_workers=n_threads) as executor, tqdm(total=len(file_pairs), desc='Ingesting articles', unit='doc') as progress_bar:
+        for idx in range(0, len(file_pairs), batch_size):
+            batch_pairs = file_pairs[idx:idx+batch_size]
+            raw_texts = list(executor.map(read_file_pair, [file_pair[1:] for file_pair in batch_pairs]))
+            table = pa.table({
+                'doc_id': [f'{category}/{filename}' for category, filename, _, _ in batch_pairs],
+                'filename': [filename for _, filename, _, _ in batch_pairs],
+                'articles': [article.decode(encoding) for article, _ in raw_texts],
+                'summaries': [summary.decode(encoding) for _, summary in raw_texts],
+                'categories': [category for category, _, _, _ in batch_pairs],
+            }, schema=DATASET_SCHEMA)
+
+            # parts in progress are prefixed by '_', which pyarrow datasets ignore
+            part_name = f'part-{uuid.uuid4().hex}.{file_format}'
+            if file_format == 'parquet':
+                pq.write_table(table, os.path.join(dataset_dir, '_' + part_name))
+            else:
+                feather.write_feather(table, os.path.join(dataset_dir, '_' + part_name))
+            os.replace(os.path.join(dataset_dir, '_' + part_name), os.path.join(dataset_dir, part_name))
+            n_ingested += len(batch_pairs)
+            progress_bar.update(len(batch_pairs))
+    return n_ingested
+
+def load_dataset(dataset_dir, file_format='parquet', columns=None):
+    """
+    This function reads an ingested dataset back into a dataframe, sorted by category and filename.
+
+    args:
+    - dataset_dir (str): folder of the dataset
+    - file_format (str): 'parquet' or 'feather' part files
+    - columns (list, str): columns to read, None for all of them
+
+    return:
+    - df: pandas dataframe of the dataset
+    """
+    dataset = ds.dataset(dataset_dir, format='ipc' if file_format == 'feather' else 'parquet', schema=DATASET_SCHEMA)
+    df = dataset.to_table(columns=columns).to_pandas()
+    sort_columns = [col_name for col_name in ['categories', 'filename'] if col_name in df.columns]
+    return df.sort_values(sort_columns, ignore_index=True) if len(sort_columns) != 0 else df
+
 def process_data(articles_path, summaries_path, category_list=['business', 'entertainment', 'politics', 'sport', 'tech']):
     """
     This function is responsible for combining individual txt based training samples and structuring them into a single dataframe which
-    would be utilized to create the multi class text classifier.  
+    would be utilized to create the multi class text classifier. The samples are ingested once into the columnar dataset
+    config.TRAINING_DATASET, see bulk_load, which is read back on the next calls.
 
     args:
     - articles_path (str): base folder path for articles
@@ -24,40 +167,17 @@ def process_data(articles_path, summaries_path, category_list=['business', 'ente
     - categories_list (list, str): classes to be considered for classifier training.
 
     return:
-    - df: pandas dataframe consisting of articles, summaries and category columns
+    - df: pandas dataframe consisting of doc_id, filename, articles, summaries and category columns
     - articles: list of articles
     - summaries: list of summaries for subsequent articles
-    - categories: lis of categories for subsequent articles   
-    """
-    articles, summaries, categories = [], [], []
-
-    if os.path.exists(config.TRAINING_FILE):
-        df = pd.read_csv(config.TRAINING_FILE)
-        return df, df.articles.tolist(), df.summaries.tolist(), df.categories.tolist()
-    else:
-        # Read raw files and form the final dataframe with articles and respective summaries
-        for category in tqdm(category_list, desc='Preprocessing categories'):
-            article_file_paths = [os.path.join(articles_path, category, file) for file in os.listdir(os.path.join(articles_path, category)) if file.endswith(".txt")]
-            summary_file_paths = [os.path.join(summaries_path, category, file) for file in os.listdir(os.path.join(summaries_path, category)) if file.endswith(".txt")]
-
-            print(f'found {len(article_file_paths)} file in articles/{category} folder, {len(summary_file_paths)} file in summaries/{category} folder')
-
-            if len(article_file_paths) != len(summary_file_paths):
-                print('number of files is not equal') 
-                return    
-
-            for idx_file in range(len(article_file_paths)):
-                categories.append(category)
-                with open(article_file_paths[idx_file], mode = 'r', encoding = "ISO-8859-1") as file:
-                    articles.append(file.read())
-                with open(summary_file_paths[idx_file], mode = 'r', encoding = "ISO-8859-1") as file:
-                    summaries.append(file.read())
-
-            print(f'total {len(articles)} file in articles folders, {len(summaries)} file in summaries folders')
-        
-        df = pd.DataFrame({'articles':articles,'summaries': summaries, 'categories' : categories})
-        df.to_csv(config.TRAINING_FILE, index=False) 
-        return df, articles, summaries, categories
+    - categories: lis of categories for subsequent articles
+    """
+    bulk_load(articles_path, summaries_path, config.TRAINING_DATASET, category_list=category_list, file_format=config.DATASET_FORMAT,
+              n_threads=config.INGESTION_THREADS, batch_size=config.INGESTION_BATCH_SIZE)
+    df = load_dataset(config.TRAINING_DATASET, file_format=config.DATASET_FORMAT)
+    df = df[df.categories.isin(category_list)].reset_index(drop=True)
+    print(f'total {len(df)} article and summary pairs')
+    return df, df.articles.tolist(), df.summaries.tolist(), df.categories.tolist()
 
 if __name__ == "__main__":
-    df_summarizer, articles, summaries, categories = process_data(config.ARTICLE_PATH, config.SUMMARY_PATH)
\ No newline at end of file
+    df_summarizer, articles, summaries, categories = process_data(config.ARTICLE_PATH, config.SUMMARY_PATH)
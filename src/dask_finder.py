@@ -0,0 +1,245 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the Dask backend of the pattern finder for partitioned corpora. Preprocessing, parsing,
+extraction and segregation run partition by partition on the Dask workers, each worker process loading
+the spacy model once, and only the segregated phrases, their frequency tables and the partition
+statistics are reduced back on the client.
+
+It runs on a LocalCluster started on the fly, or on any cluster through a distributed Client e.g.
+Client('tcp://scheduler:8786'), as long as the repository (and the spacy model) is available on the
+PYTHONPATH of every worker.
+"""
+import os
+import sys
+import time
+import socket
+import threading
+import pandas as pd
+import dask
+import dask.dataframe as dd
+from distributed import Client, LocalCluster
+file_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(file_dir)
+
+from src.pattern_finder import DEFAULT_CATEGORY, PATTERN_RULES, RULE_BACKENDS, SEGREGATION_SLOTS, extract_patterns, get_phrase_column, segregate_phrases, preprocess_text
+from src.rule_engine import RuleEngine
+from utility.utility import load_spacy_model
+from utility.sketch_tables import create_frequency_tables
+
+# spacy model and rule engine per worker process: (model name, profile, rule backend) -> (model, rule engine)
+_worker_models = dict()
+_worker_models_lock = threading.Lock()
+
+def _get_worker_model(spacy_model_name: str, profile: str, rule_backend: str) -> tuple:
+    """
+    This function returns the spacy model and rule engine of the worker process, loading them on the first
+    partition only. The lock keeps the threads of a worker from loading the model concurrently.
+    """
+    model_key = (spacy_model_name, profile, rule_backend)
+    with _worker_models_lock:
+        if model_key not in _worker_models:
+            spacy_loaded_model = load_spacy_model(spacy_model_name, profile=profile)
+            rule_engine = RuleEngine(spacy_loaded_model.vocab) if rule_backend == 'matcher' else None
+            _worker_models[model_key] = (spacy_loaded_model, rule_engine)
+        return _worker_models[model_key]
+
+def process_partition(partition: pd.DataFrame, partition_idx: int, textual_col: str, pattern_collection: list,
+                      spacy_model_name: str, profile: str, rule_backend: str, batch_size: int, raw_col: str = None,
+                      counting_mode: str = 'exact', sketch_params: dict = None) -> dict:
+    """
+    This function runs on a Dask worker and processes one partition end to end: optional preprocessing of
+    the raw texts, parsing through nlp.pipe, extraction and segregation of the phrases and their frequency tables.
+
+    args:
+        partition (pd.DataFrame): partition of the corpus holding the textual column (or the raw column), optionally
+        CATEGORIES (DEFAULT_CATEGORY for every row otherwise) and DOC_ID identifying the documents (the index otherwise)
+        partition_idx (int): position of the partition
+        textual_col (str): name of the preprocessed textual column
+        pattern_collection (list, str): patterns to extract
+        spacy_model_name (str): spacy model to be used for accessing the POS tags and dependencies
+        profile (str): model profile deciding the components to load
+        rule_backend (str): 'rules' or 'matcher'
+        batch_size (int): number of texts buffered by nlp.pipe per batch
+        raw_col (str, optional): raw textual column preprocessed into the textual column when provided. Defaults to None.
+        counting_mode (str, optional): 'exact' or 'sketch', see utility.sketch_tables. Defaults to 'exact'.
+        sketch_params (dict, optional): keyword arguments of SketchTables. Defaults to None.
+
+    returns:
+        dict: 'seg_patterns' (pattern name -> segregated phrases), 'frequency_tables' and 'stats' of the partition
+    """
+    start = time.perf_counter()
+    spacy_loaded_model, rule_engine = _get_worker_model(spacy_model_name, profile, rule_backend)
+
+    partition = partition.copy()
+    if 'CATEGORIES' not in partition.columns:
+        partition['CATEGORIES'] = DEFAULT_CATEGORY
+    if raw_col is not None:
+        partition[textual_col] = [preprocess_text(text) for text in partition[raw_col]]
+    texts = partition[textual_col].tolist()
+    extracts = [
+        extract_patterns(doc, pattern_collection, rule_engine=rule_engine)
+        for doc in spacy_loaded_model.pipe(texts, batch_size=batch_size)
+    ]
+    frequency_tables = create_frequency_tables({pattern_name: SEGREGATION_SLOTS[pattern_name] for pattern_name in pattern_collection},
+                                               counting_mode=counting_mode, sketch_params=sketch_params)
+    for pattern_name in pattern_collection:
+        partition[get_phrase_column(pattern_name)] = [extract[get_phrase_column(pattern_name)] for extract in extracts]
+        frequency_tables.update_batch(pattern_name, partition['CATEGORIES'].tolist(), partition[get_phrase_column(pattern_name)].tolist())
+    seg_patterns = {pattern_name: segregate_phrases(partition, pattern_name) for pattern_name in pattern_collection}
+    elapsed = time.perf_counter() - start
+    return {
+        'seg_patterns': seg_patterns,
+        'frequency_tables': frequency_tables,
+        'stats': {
+            'PARTITION': partition_idx,
+            'WORKER': f'{socket.gethostname()}:{os.getpid()}',
+            'N_DOCS': len(texts),
+            'N_CHARS': sum(len(text) for text in texts),
+            'N_PHRASES': sum(len(seg_data) for seg_data in seg_patterns.values()),
+            'SECONDS': elapsed,
+            'DOCS_PER_SEC': len(texts) / elapsed if elapsed > 0 else 0.0}}
+
+def merge_partition_results(results: list) -> dict:
+    """
+    This function reduces the results of several partitions into one, concatenating the segregated phrases
+    in partition order and merging the frequency tables.
+
+    args:
+        results (list, dict): outputs of process_partition (or of this function)
+
+    returns:
+        dict: merged 'seg_patterns', 'frequency_tables' and the list of partition 'stats'
+    """
+    merged = {'seg_patterns': dict(), 'frequency_tables': None, 'stats': []}
+    for result in results:
+        for pattern_name, seg_data in result['seg_patterns'].items():
+            merged['seg_patterns'].setdefault(pattern_name, []).append(seg_data)
+        if merged['frequency_tables'] is None:
+            merged['frequency_tables'] = result['frequency_tables']
+        else:
+            merged['frequency_tables'].merge(result['frequency_tables'])
+        merged['stats'].extend(result['stats'] if isinstance(result['stats'], list) else [result['stats']])
+    merged['seg_patterns'] = {
+        pattern_name: pd.concat(seg_datas, ignore_index=True) for pattern_name, seg_datas in merged['seg_patterns'].items()
+    }
+    return merged
+
+class DaskPatternFinder:
+    def __init__(self, data, textual_col: str, pattern_collection: list = ['nvn','an','npn','nvn_mod'], spacy_model_name: str = 'en_core_web_lg',
+                 spacy_model_profile: str = 'rules', rule_backend: str = 'rules', npartitions: int = None, raw_col: str = None,
+                 counting_mode: str = 'exact', sketch_params: dict = None) -> None:
+        """
+        This is the Dask pattern finder class which is responsible for extracting and segregating the built-in
+        patterns of a partitioned corpus on a Dask cluster.
+
+        args:
+        - data (dd.DataFrame or pd.DataFrame): corpus holding the textual column and optionally CATEGORIES, the rows
+        being counted and segregated under DEFAULT_CATEGORY without it, a pandas dataframe is split into npartitions partitions
+        - textual_col (str): name of the preprocessed textual column
+        - pattern_collection (list, str): built-in patterns to process
+        - spacy_model_name (str): spacy model to be used for accessing the POS tags and dependencies
+        - spacy_model_profile (str): model profile deciding the components to load, see utility.load_spacy_model
+        - rule_backend (str): 'rules' or 'matcher'
+        - npartitions (int): number of partitions of a pandas dataframe, defaults to the cpu count
+        - raw_col (str): raw textual column to preprocess on the workers into the textual column, None when the
+        textual column is already preprocessed
+        - counting_mode (str): 'exact' for FrequencyTables or 'sketch' for the memory bounded SketchTables
+        - sketch_params (dict): keyword arguments of SketchTables, identical on every worker so that the sketches merge
+
+        return:
+        - None
+        """
+        if rule_backend not in RULE_BACKENDS:
+            raise ValueError(f"Unknown rule backend '{rule_backend}', expected one of {RULE_BACKENDS}")
+        unknown_patterns = [pattern_name for pattern_name in pattern_collection if pattern_name not in PATTERN_RULES]
+        if len(unknown_patterns) != 0:
+            raise ValueError(f"Unknown patterns {unknown_patterns}, expected any of {list(PATTERN_RULES)}")
+
+        self._data = data if isinstance(data, dd.DataFrame) else dd.from_pandas(data, npartitions=npartitions or os.cpu_count())
+        self._textual_col = textual_col
+        self._raw_col = raw_col
+        self._pattern_collection = list(pattern_collection)
+        self._spacy_model_name = spacy_model_name
+        self._spacy_model_profile = spacy_model_profile
+        self._rule_backend = rule_backend
+        self._counting_mode = counting_mode
+        self._sketch_params = sketch_params
+
+        self._seg_patterns = dict()
+        self._frequency_tables = None
+        self._partition_stats = None
+
+    #region Properties
+    @property
+    def get_nvn_patterns(self):
+        return self._seg_patterns.get('nvn')
+
+    @property
+    def get_an_patterns(self):
+        return self._seg_patterns.get('an')
+
+    @property
+    def get_npn_patterns(self):
+        return self._seg_patterns.get('npn')
+
+    @property
+    def get_nvn_mod_patterns(self):
+        return self._seg_patterns.get('nvn_mod')
+
+    @property
+    def get_frequency_tables(self):
+        return self._frequency_tables
+
+    @property
+    def get_partition_stats(self):
+        return self._partition_stats
+    #endregion
+
+    def process_patterns(self, client: Client = None, n_workers: int = None, batch_size: int = 64, split_every: int = 8) -> None:
+        """
+        This method maps the partitions through process_partition on the cluster and reduces their results
+        through a tree of merge_partition_results tasks, so that no single task merges all the partitions.
+
+        args:
+        - client (distributed.Client): client of the cluster to run on, a LocalCluster of n_workers single threaded
+        worker processes is started and closed along with the run when None
+        - n_workers (int): number of worker processes of the LocalCluster, defaults to the cpu count
+        - batch_size (int): number of texts buffered by nlp.pipe per batch inside a partition
+        - split_every (int): number of partition results merged together per reduction task
+
+        returns:
+        - None
+        """
+        columns = [self._raw_col if self._raw_col is not None else self._textual_col]
+        columns.extend(col_name for col_name in ['CATEGORIES', 'DOC_ID'] if col_name in self._data.columns)
+        partitions = self._data[columns].to_delayed()
+        results = [
+            dask.delayed(process_partition)(partition, partition_idx, self._textual_col, self._pattern_collection, self._spacy_model_name,
+                                            self._spacy_model_profile, self._rule_backend, batch_size, self._raw_col,
+                                            self._counting_mode, self._sketch_params)
+            for partition_idx, partition in enumerate(partitions)
+        ]
+        while len(results) > 1:
+            results = [dask.delayed(merge_partition_results)(results[idx:idx+split_every]) for idx in range(0, len(results), split_every)]
+        result = dask.delayed(merge_partition_results)(results)
+
+        if client is not None:
+            merged = client.compute(result).result()
+        else:
+            with LocalCluster(n_workers=n_workers or os.cpu_count(), threads_per_worker=1, processes=True) as cluster, Client(cluster) as local_client:
+                merged = local_client.compute(result).result()
+
+        self._seg_patterns = merged['seg_patterns']
+        self._frequency_tables = merged['frequency_tables']
+        self._partition_stats = pd.DataFrame(merged['stats']).sort_values('PARTITION', ignore_index=True)
+        print(self._partition_stats.to_string(index=False))
+        print(f"{self._partition_stats['N_DOCS'].sum()} docs in {len(self._partition_stats)} partitions, "
+              f"{self._partition_stats['N_DOCS'].sum() / self._partition_stats['SECONDS'].sum():.2f} docs/sec per worker on average")
@@ -0,0 +1,95 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script runs the pattern finder incrementally over the article folders. A manifest of the processed
+files is kept next to a persistent phrase store, so every run only extracts the patterns of new or
+modified articles, appends them to the store and tombstones the articles which were deleted.
+"""
+import os
+import sys
+import datetime
+import pandas as pd
+file_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(file_dir)
+
+from src.pattern_finder import PatternFinder, PATTERN_RULES, preprocess_text
+from utility.incremental_store import DocumentManifest, PhraseStore
+
+def process_incremental(articles_path: str, 
+                        store_dir: str, 
+                        category_list: list = ['business', 'entertainment', 'politics', 'sport', 'tech'], 
+                        pattern_collection: list = ['nvn','an','npn','nvn_mod'], 
+                        spacy_model_name: str = 'en_core_web_lg', 
+                        batch_size: int = 64) -> pd.DataFrame:
+    """
+    This function is responsible for extracting the patterns of the new or modified articles only and
+    persisting them in the phrase store along with the updated manifest.
+
+    args:
+    - articles_path (str): base folder path for articles
+    - store_dir (str): folder holding the manifest and the phrase store
+    - category_list (list, str): categories to be considered
+    - pattern_collection (list, str): patterns to process
+    - spacy_model_name (str): spacy model to be used for accessing the POS tags and dependencies
+    - batch_size (int): number of texts buffered by nlp.pipe per batch
+
+    return:
+    - df: pandas dataframe consisting of the phrases extracted in this run
+    """
+    run_id = datetime.datetime.now().isoformat()
+    manifest = DocumentManifest(os.path.join(store_dir, 'manifest.json'))
+    phrase_store = PhraseStore(store_dir)
+
+    changed_entries, deleted_doc_ids = manifest.scan(articles_path, category_list)
+    print(f'found {len(changed_entries)} new or modified articles, {len(deleted_doc_ids)} deleted articles')
+
+    if len(deleted_doc_ids) != 0:
+        phrase_store.tombstone(deleted_doc_ids, run_id)
+        manifest.remove(deleted_doc_ids)
+
+    if len(changed_entries) == 0:
+        manifest.save()
+        return pd.DataFrame()
+
+    articles = []
+    for entry in changed_entries:
+        with open(entry['path'], mode = 'r', encoding = "ISO-8859-1") as file:
+            articles.append(file.read())
+    changed_data = pd.DataFrame({
+        'DOC_ID': [entry['doc_id'] for entry in changed_entries],
+        'ARTICLES': articles,
+        'CATEGORIES': [entry['category'] for entry in changed_entries]})
+    changed_data['PREPROCESSED_TEXT'] = [preprocess_text(article) for article in articles]
+
+    pattern_finder_instance = PatternFinder(
+                                data=changed_data, 
+                                textual_col='PREPROCESSED_TEXT',
+                                pattern_collection=pattern_collection,
+                                spacy_model_name=spacy_model_name,
+                                copy_data=False
+                            )
+    pattern_finder_instance.process_patterns(execution_mode='pipe', batch_size=batch_size)
+
+    phrase_columns = [column_name for pattern_name, (column_name, _) in PATTERN_RULES.items() if pattern_name in pattern_collection]
+    extract = pattern_finder_instance.get_overall_extract[['DOC_ID','CATEGORIES','PREPROCESSED_TEXT'] + phrase_columns]
+    # phrases are persisted before the manifest, an interrupted run is simply re-extracted next time
+    phrase_store.append(extract.to_dict(orient='records'), run_id)
+    manifest.update(changed_entries)
+    manifest.save()
+    return extract
+
+if __name__ == "__main__":
+    # Incremental run configurations
+    articles_path = os.path.join('input','news_articles')
+    store_dir = os.path.join('output','incremental_store')
+
+    extract = process_incremental(articles_path, store_dir)
+    print(extract.shape)
+    print(PhraseStore(store_dir).load().shape)
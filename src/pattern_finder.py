@@ -8,33 +8,67 @@ __email__ = "rickykonwar@gmail.com"
 __status__ = "Development"
 
 import os
+import re
 import sys
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
+from spacy.tokens import Doc
+from spacy.language import Language
 file_dir = os.path.dirname(os.path.dirname(__file__))
 sys.path.append(file_dir)
 
 from supporting_scripts_notebooks.sn_textual_preprocessing import *
 from utility.utility import load_spacy_model
+from utility.parse_cache import ParseCache
+from utility.phrase_export import PhraseExporter
+from utility.sketch_tables import create_frequency_tables
+from utility.phrase_index import PhraseIndex
+from utility.knowledge_graph import KnowledgeGraphBuilder
+from utility.sentence_memo import SentenceMemo, get_sentence_key
+from utility.near_duplicates import MinHashLSH
+from src.rule_engine import RuleEngine
+from utility.packed_corpus import PackedCorpus, is_packed_corpus
+from src.preprocessing_runner import PREPROCESSING_FLAGS, preprocess_texts, preprocess_corpus
+from src.phrase_records import NVNRecord, ANRecord, NPNRecord, PHRASE_RECORD_TYPES, restore_records, shift_records, unlocate_records
+
+# Preprocessing applied on raw texts before finding patterns
+# preprocessing of preprocess_text, with its regexes and translation table compiled once
+text_preprocessor = TextPreprocessor(**PREPROCESSING_FLAGS)
+
+def preprocess_text(text: str) -> str:
+    """
+    This function is responsible for cleaning a raw article before the patterns are extracted. It removes
+    URLs, mentions, hashtags and contractions, strips punctuations other than '-', '%' and '.' and removes
+    extra spaces, as the chain remove_urls -> remove_mentions_hashtags -> remove_contractions ->
+    remove_stopwords_punc_nos -> remove_extra_spaces does, see TextPreprocessor.
+
+    args:
+        text (str): Raw input text
+
+    returns:
+        str: preprocessed text
+    """
+    return text_preprocessor(text)
 
 # Function for rule 1: noun(subject), verb, noun(object)
-def rule_nvn(text: str, spacy_loaded_model=None) -> list:
+def rule_nvn(doc: Doc) -> list:
     """
     This function is responsible for extracting all possible combinations of 
     NOUN / PROPER NOUN / PRONOUN (subject) <-> VERB <-> NOUN / PROPER NOUN that is seen in the 
     input text.
 
     args:
-        text (str): Input text for which NVN phrases needs to be extracted
-        spacy_loaded_model (spacy model object, optional): spacy model to be used for accessing the POS tags. Defaults to None.
+        doc (spacy.tokens.Doc): Parsed document for which NVN phrases needs to be extracted
 
     returns:
-        list: list of dictionaries where each dictionary is representation of one NVN phrase being detected
-        e.g. [{'phrase': 'ONS revise rate', 'verb': 'revise'},
-            {'phrase': 'number report figures', 'verb': 'report'},
-            {'phrase': 'retailers endure Christmas', 'verb': 'endure'}]
+        list: list of NVNRecord where each record is representation of one NVN phrase being detected
+        e.g. [NVNRecord(phrase='ONS revise rate', verb='revise', subject='ONS', object='rate', ...),
+            NVNRecord(phrase='number report figures', verb='report', subject='number', object='figures', ...),
+            NVNRecord(phrase='retailers endure Christmas', verb='endure', subject='retailers', object='Christmas', ...)]
     """
-    doc = spacy_loaded_model(text)
     sent = []
     for token in doc:
         # if the token is a verb
@@ -49,35 +83,34 @@ def rule_nvn(text: str, spacy_loaded_model=None) -> list:
                     # save the root of the verb in phrase
                     phrase += ' '+token.lemma_ 
                     # check for noun or pronoun direct objects
-                    for sub_tok in token.rights:
+                    for obj_tok in token.rights:
                         # save the object in the phrase
-                        if (sub_tok.dep_ in ['dobj']) and (sub_tok.pos_ in ['NOUN','PROPN']):
-                            phrase += ' '+sub_tok.text
-                            sent.append({'phrase': phrase, 'verb': token.lemma_})
+                        if (obj_tok.dep_ in ['dobj']) and (obj_tok.pos_ in ['NOUN','PROPN']):
+                            phrase += ' '+obj_tok.text
+                            sent.append(NVNRecord(phrase, token.lemma_, sub_tok.text, obj_tok.text,
+                                                  sub_tok.i, token.i, obj_tok.i, sub_tok.idx, token.idx, obj_tok.idx))
     return sent
 
 # Function for rule 2: adjective noun
-def rule_an(text: str, spacy_loaded_model=None) -> list:
+def rule_an(doc: Doc) -> list:
     """
     This function is responsible for extracting all possible combinations of 
     ADJECTIVE / COMPOUND <-> NOUN (subject, object, nominal subject, passive nominal subject)
 
     args:
-        text (str): Input text for which AN phrases needs to be extracted
-        spacy_loaded_model (spacy model object, optional): spacy model to be used for accessing the POS tags. Defaults to None.
+        doc (spacy.tokens.Doc): Parsed document for which AN phrases needs to be extracted
 
     returns:
-        list : list of dictionaries where each dictionary is representation of one AN phrase being detected
-        e.g. [{'phrase': 'significant growth', 'noun': 'growth'},
-            {'phrase': 'earlier caution', 'noun': 'caution'},
-            {'phrase': 'poor December figures', 'noun': 'figures'}]
+        list : list of ANRecord where each record is representation of one AN phrase being detected
+        e.g. [ANRecord(phrase='significant growth', noun='growth', adjective='significant', ...),
+            ANRecord(phrase='earlier caution', noun='caution', adjective='earlier', ...),
+            ANRecord(phrase='poor December figures', noun='figures', adjective='poor December', ...)]
     """
-    doc = spacy_loaded_model(text)
     pat = []
     
     # iterate over tokens
     for token in doc:
-        phrase = ''
+        modifiers = []
         # if the word is a subject noun or an object noun
         if (token.pos_ == 'NOUN')\
             and (token.dep_ in ['dobj','pobj','nsubj','nsubjpass']):
@@ -86,84 +119,82 @@ def rule_an(text: str, spacy_loaded_model=None) -> list:
             for subtoken in token.children:
                 # if word is an adjective or has a compound dependency
                 if (subtoken.pos_ == 'ADJ') or (subtoken.dep_ == 'compound'):
-                    phrase += subtoken.text + ' '
-                    
-            if len(phrase)!=0:
-                phrase += token.text
+                    modifiers.append(subtoken)
              
-        if  len(phrase)!=0:
-            pat.append({'phrase':phrase, 'noun': token.text})
+        if  len(modifiers)!=0:
+            adjective = ' '.join(modifier.text for modifier in modifiers)
+            pat.append(ANRecord(adjective + ' ' + token.text, token.text, adjective,
+                                token.i, modifiers[0].i, token.idx, modifiers[0].idx))
     return pat
 
 # Function for rule 3: noun, preposition, noun
-def rule_npn(text: str, spacy_loaded_model=None) -> list:
+def rule_npn(doc: Doc) -> list:
     """
     This function is responsible for extracting all possible combinations of 
     NOUN <-> PREPOSITION <-> NOUN / PROPER NOUN
 
     args:
-        text (str): Input text for which NPN phrases needs to be extracted
-        spacy_loaded_model (_type_, optional): spacy model to be used for accessing the POS tags. Defaults to None.
+        doc (spacy.tokens.Doc): Parsed document for which NPN phrases needs to be extracted
 
     returns:
-        list: list of dictionaries where each dictionary is representation of one NPN phrase being detected
-        e.g. [{'phrase': 'number of retailers', 'preposition': 'of'},
-            {'phrase': 'caution from King', 'preposition': 'from'},
-            {'phrase': 'way below booms', 'preposition': 'below'}]
+        list: list of NPNRecord where each record is representation of one NPN phrase being detected
+        e.g. [NPNRecord(phrase='number of retailers', preposition='of', noun1='number', noun2='retailers', ...),
+            NPNRecord(phrase='caution from King', preposition='from', noun1='caution', noun2='King', ...),
+            NPNRecord(phrase='way below booms', preposition='below', noun1='way', noun2='booms', ...)]
     """
-    doc = spacy_loaded_model(text)
     sent = []
     
     for token in doc:
         # look for prepositions
         if token.pos_=='ADP':
-            phrase = ''
             # if its head word is a noun
             if token.head.pos_=='NOUN':
-                # append noun and preposition to phrase
-                phrase += token.head.text
-                phrase += ' '+token.text
-
-                # check the nodes to the right of the preposition
-                for right_tok in token.rights:
-                    # append if it is a noun or proper noun
-                    if (right_tok.pos_ in ['NOUN','PROPN']):
-                        phrase += ' '+right_tok.text
+                # check the nodes to the right of the preposition, keep if it is a noun or proper noun
+                objects = [right_tok for right_tok in token.rights if right_tok.pos_ in ['NOUN','PROPN']]
+                noun2 = ' '.join(right_tok.text for right_tok in objects)
                 
-                if len(phrase)>2:
-                    sent.append({'phrase':phrase, 'preposition': token.text})
+                # noun, preposition and the nouns on its right
+                phrase = token.head.text + ' ' + token.text + ''.join(' '+right_tok.text for right_tok in objects)
+                sent.append(NPNRecord(phrase, token.text, token.head.text, noun2,
+                                      token.head.i, token.i, objects[0].i if objects else -1,
+                                      token.head.idx, token.idx, objects[0].idx if objects else -1))
     return sent
 
 # Function for rule 4: Combination of rulw 1 + rule 2
-def rule_ad_mod(doc, text: str, index: int) -> str:
-    # doc = nlp_spacy_en_model(text)
+def rule_ad_mod(doc: Doc, index: int) -> str:
+    """
+    This function is responsible for collecting the adjective modifiers of the token present at the
+    given index. The token is accessed directly from the doc, so the lookup cost does not grow with
+    the length of the document.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document containing the token
+        index (int): Index of the token within the document
+
+    returns:
+        str: adjectives attached to the token, each prefixed by a space e.g. ' poor'
+    """
     phrase = ''
-    
-    for token in doc:
-        if token.i == index:
-            for subtoken in token.children:
-                if (subtoken.pos_ == 'ADJ'):
-                    phrase += ' '+subtoken.text
-            break
+    for subtoken in doc[index].children:
+        if (subtoken.pos_ == 'ADJ'):
+            phrase += ' '+subtoken.text
     return phrase
 
-def rule_nvn_mod(text: str, spacy_loaded_model=None) -> list:
+def rule_nvn_mod(doc: Doc) -> list:
     """
     This function is responsible for extracting all possible combinations of 
     COMPOUND / ADJ <-> NOUN / PROPER NOUN / PRONOUN (subject) <-> VERB <-> COMPOUND / ADJ <-> NOUN / PROPER NOUN that is seen in the 
     input text.
 
     args:
-        text (str): Input text for which compound / adjective NVN phrases needs to be extracted
-        spacy_loaded_model (spacy model object, optional): spacy model to be used for accessing the POS tags. Defaults to None.
+        doc (spacy.tokens.Doc): Parsed document for which compound / adjective NVN phrases needs to be extracted
 
     returns:
-        list: list of dictionaries where each dictionary is representation of one NVN phrase being detected
-        e.g. [{'phrase': ' ONS revise annual rate', 'verb': 'revise'},
-            {'phrase': ' number report poor figures', 'verb': 'report'},
-            {'phrase': ' retailers endure tougher Christmas', 'verb': 'endure'}]
+        list: list of NVNRecord where each record is representation of one NVN phrase being detected
+        e.g. [NVNRecord(phrase=' ONS revise annual rate', verb='revise', subject='ONS', object='annual rate', ...),
+            NVNRecord(phrase=' number report poor figures', verb='report', subject='number', object='poor figures', ...),
+            NVNRecord(phrase=' retailers endure tougher Christmas', verb='endure', subject='retailers', object='tougher Christmas', ...)]
     """
-    doc = spacy_loaded_model(text)
     sent = []
     
     for token in doc:
@@ -174,23 +205,316 @@ def rule_nvn_mod(text: str, spacy_loaded_model=None) -> list:
             # only extract noun or pronoun subjects
             for sub_tok in token.lefts:
                 if (sub_tok.dep_ in ['nsubj','nsubjpass']) and (sub_tok.pos_ in ['NOUN','PROPN','PRON']):
-                    adj = rule_ad_mod(doc, text, sub_tok.i)
-                    phrase += adj + ' ' + sub_tok.text
+                    subject = rule_ad_mod(doc, sub_tok.i) + ' ' + sub_tok.text
+                    phrase += subject
 
                     # save the root word of the word
                     phrase += ' '+token.lemma_ 
 
                     # check for noun or pronoun direct objects
-                    for sub_tok in token.rights:
-                        if (sub_tok.dep_ in ['dobj']) and (sub_tok.pos_ in ['NOUN','PROPN']):
-                            adj = rule_ad_mod(doc, text, sub_tok.i)
+                    for obj_tok in token.rights:
+                        if (obj_tok.dep_ in ['dobj']) and (obj_tok.pos_ in ['NOUN','PROPN']):
+                            obj = rule_ad_mod(doc, obj_tok.i) + ' ' + obj_tok.text
                             # add adj based noun
-                            phrase += adj+' '+sub_tok.text
-                            sent.append({'phrase':phrase, 'verb':token.lemma_})
+                            phrase += obj
+                            sent.append(NVNRecord(phrase, token.lemma_, subject.strip(), obj.strip(),
+                                                  sub_tok.i, token.i, obj_tok.i, sub_tok.idx, token.idx, obj_tok.idx))
     return sent
 
+# Registry of supported patterns: pattern name -> (output column, rule function)
+PATTERN_RULES = {
+    'nvn': ('NVN_PHRASES', rule_nvn),
+    'an': ('AN_PHRASES', rule_an),
+    'npn': ('NPN_PHRASES', rule_npn),
+    'nvn_mod': ('NVN_MOD_PHRASES', rule_nvn_mod),
+}
+
+# Backends running the rules: the hand written token loops or the compiled dependency matcher patterns
+RULE_BACKENDS = ['rules','matcher']
+
+def get_phrase_column(pattern_name: str) -> str:
+    """
+    This function returns the output column name of a pattern e.g. 'nvn' -> 'NVN_PHRASES'.
+    """
+    return PATTERN_RULES[pattern_name][0] if pattern_name in PATTERN_RULES else f'{pattern_name.upper()}_PHRASES'
+
+def extract_patterns(doc: Doc, pattern_collection: list, rule_engine: RuleEngine = None) -> dict:
+    """
+    This function is responsible for running all the selected rules over one parsed document, so that
+    each text is passed through the spacy pipeline only once irrespective of the number of patterns.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document for which phrases needs to be extracted
+        pattern_collection (list, str): patterns to extract e.g. ['nvn','an','npn','nvn_mod']
+        rule_engine (RuleEngine, optional): rule engine matching all the patterns in one pass, the hand written
+        rules are used when not provided. Defaults to None.
+
+    returns:
+        dict: output column name -> list of phrase records detected by the respective rule
+        e.g. {'NVN_PHRASES': [NVNRecord(phrase='ONS revise rate', verb='revise', subject='ONS', object='rate', ...)],
+            'AN_PHRASES': [ANRecord(phrase='significant growth', noun='growth', adjective='significant', ...)]}
+    """
+    if rule_engine is not None:
+        return {
+            get_phrase_column(pattern_name): records 
+            for pattern_name, records in rule_engine(doc, pattern_collection).items()
+        }
+    return {
+        column_name: rule(doc) 
+        for pattern_name, (column_name, rule) in PATTERN_RULES.items() 
+        if pattern_name in pattern_collection
+    }
+
+def get_phrase_extension(pattern_name: str) -> str:
+    """
+    This function returns the name of the Doc extension holding the phrases of a pattern e.g. 'nvn' -> 'nvn_phrases'.
+    """
+    return get_phrase_column(pattern_name).lower()
+
+for pattern_name in PATTERN_RULES:
+    if not Doc.has_extension(get_phrase_extension(pattern_name)):
+        Doc.set_extension(get_phrase_extension(pattern_name), default=None)
+
+class PatternFinderComponent:
+    def __init__(self, nlp: Language, name: str, pattern_collection: list, rule_backend: str) -> None:
+        """
+        This is the spacy pipeline component which runs the selected rules on every document going through
+        the pipeline and stores the phrases on Doc extensions e.g. doc._.nvn_phrases, doc._.an_phrases.
+        Extraction therefore takes part in spacy's own batching and multiprocessing through nlp.pipe.
+        
+        args:
+        - nlp (Language): pipeline the component is added to
+        - name (str): name of the component within the pipeline
+        - pattern_collection (list, str): patterns to extract
+        - rule_backend (str): 'rules' or 'matcher'
+        
+        return:
+        - None
+        """
+        if rule_backend not in RULE_BACKENDS:
+            raise ValueError(f"Unknown rule backend '{rule_backend}', expected one of {RULE_BACKENDS}")
+        self.name = name
+        self._pattern_collection = list(pattern_collection)
+        self._rule_engine = RuleEngine(nlp.vocab) if rule_backend == 'matcher' else None
+    
+    def register_pattern(self, pattern_name: str, patterns: list, builder=None) -> None:
+        """
+        This method registers an extra pattern with the 'matcher' rule backend and a Doc extension for its phrases.
+        """
+        if self._rule_engine is None:
+            raise ValueError("Extra patterns can only be registered with the 'matcher' rule backend")
+        self._rule_engine.add_rule(pattern_name, patterns, builder)
+        if not Doc.has_extension(get_phrase_extension(pattern_name)):
+            Doc.set_extension(get_phrase_extension(pattern_name), default=None)
+        self._pattern_collection.append(pattern_name)
+    
+    def __call__(self, doc: Doc) -> Doc:
+        for column_name, records in extract_patterns(doc, self._pattern_collection, rule_engine=self._rule_engine).items():
+            doc._.set(column_name.lower(), records)
+        return doc
+    
+    def get_extracts(self, doc: Doc) -> dict:
+        """
+        This method reads the phrases stored on the Doc extensions, running the component first on documents
+        which did not go through it (e.g. documents loaded from the parse cache).
+        
+        args:
+        - doc (spacy.tokens.Doc): Parsed document
+        
+        returns:
+        - dict: output column name -> list of phrases, same as extract_patterns
+        """
+        if any(doc._.get(get_phrase_extension(pattern_name)) is None for pattern_name in self._pattern_collection):
+            doc = self(doc)
+        # records of documents coming back from nlp.pipe worker processes are flattened into lists by msgpack
+        return {
+            get_phrase_column(pattern_name): restore_records(pattern_name, doc._.get(get_phrase_extension(pattern_name)))
+            for pattern_name in self._pattern_collection
+        }
+
+@Language.factory('pattern_finder', default_config={'pattern_collection': ['nvn','an','npn','nvn_mod'], 'rule_backend': 'rules'})
+def create_pattern_finder_component(nlp: Language, name: str, pattern_collection: list, rule_backend: str) -> PatternFinderComponent:
+    # this module needs to be imported before spacy.load of a pipeline saved along with this component
+    return PatternFinderComponent(nlp, name, pattern_collection, rule_backend)
+
+# spacy model and rule engine loaded once per worker process of the parallel backend
+_worker_spacy_model = None
+_worker_rule_engine = None
+
+def _init_pattern_worker(spacy_model_name: str, exclude_list: list, profile: str = None, rule_backend: str = 'rules', custom_rules: dict = None) -> None:
+    """
+    This function is the initializer of every worker process in the parallel backend. It loads the
+    spacy model once per process so that the model is never pickled and shipped along with the tasks.
+
+    args:
+        spacy_model_name (str): name of the spacy model to load
+        exclude_list (list, str): pipeline components to exclude while loading the model
+        profile (str, optional): model profile deciding the components to load. Defaults to None.
+        rule_backend (str, optional): 'rules' or 'matcher', the rule engine is compiled once per worker for 'matcher'. Defaults to 'rules'.
+        custom_rules (dict, optional): rules registered on top of the built-in rules of the rule engine. Defaults to None.
+    """
+    global _worker_spacy_model, _worker_rule_engine
+    _worker_spacy_model = load_spacy_model(spacy_model_name, exclude_list=exclude_list, profile=profile)
+    if rule_backend == 'matcher':
+        _worker_rule_engine = RuleEngine(_worker_spacy_model.vocab, custom_rules=custom_rules)
+
+def _extract_chunk(texts: list, pattern_collection: list, batch_size: int = 64) -> list:
+    """
+    This function parses one chunk of texts inside a worker process and runs all the selected rules on it.
+    Only the extracted phrase dictionaries are returned, parsed documents never leave the worker.
+
+    args:
+        texts (list, str): chunk of texts to process
+        pattern_collection (list, str): patterns to extract
+        batch_size (int): number of texts buffered by nlp.pipe per batch
+
+    returns:
+        list: one extract dictionary per text, in the same order as the input chunk
+    """
+    return [
+        extract_patterns(doc, pattern_collection, rule_engine=_worker_rule_engine) 
+        for doc in _worker_spacy_model.pipe(texts, batch_size=batch_size)
+    ]
+
+# Sentences of a preprocessed text are split at the space following a full stop. spacy splits a text on its spaces
+# before tokenizing the pieces, so the tokens of the sentences parsed on their own add up to the tokens of the text
+SENTENCE_BOUNDARY_REGEX = re.compile(r'(?<=\.) ')
+# Sentences too long for a chunk are cut at the spaces following a word, for the same reason
+WORD_BOUNDARY_REGEX = re.compile(r'(?<=[^ ]) ')
+
+def split_at(text: str, boundary_regex) -> list:
+    # (character offset within the text, piece) per piece between the boundaries, the boundary spaces being left out
+    pieces, start = [], 0
+    for match in boundary_regex.finditer(text):
+        pieces.append((start, text[start:match.start()]))
+        start = match.end()
+    pieces.append((start, text[start:]))
+    return pieces
+
+def split_sentences(text: str) -> list:
+    """
+    This function splits a preprocessed text into its sentences, see SENTENCE_BOUNDARY_REGEX.
+
+    args:
+        text (str): preprocessed text
+
+    returns:
+        list: (character offset within the text, sentence) per sentence, the separating spaces being left out
+    """
+    return split_at(text, SENTENCE_BOUNDARY_REGEX)
+
+def chunk_text(text: str, max_chunk_chars: int) -> list:
+    """
+    This function splits a preprocessed text into windows of consecutive sentences of at most max chunk chars
+    characters. Sentences longer than that are cut at word boundaries, a single word longer than that being a
+    window on its own.
+
+    args:
+        text (str): preprocessed text
+        max_chunk_chars (int): maximum number of characters per window
+
+    returns:
+        list: (character offset within the text, window) per window, each window being a slice of the text
+    """
+    chunks, chunk_start, chunk_end = [], None, None
+    for sentence_offset, sentence in split_sentences(text):
+        pieces = [(0, sentence)] if len(sentence) <= max_chunk_chars else split_at(sentence, WORD_BOUNDARY_REGEX)
+        for piece_offset, piece in pieces:
+            piece_start = sentence_offset + piece_offset
+            if chunk_start is not None and piece_start + len(piece) - chunk_start > max_chunk_chars:
+                chunks.append((chunk_start, text[chunk_start:chunk_end]))
+                chunk_start = None
+            if chunk_start is None:
+                chunk_start = piece_start
+            chunk_end = piece_start + len(piece)
+    chunks.append((chunk_start, text[chunk_start:chunk_end]))
+    return chunks
+
+def merge_span_extracts(pattern_collection: list, span_extracts: list) -> dict:
+    """
+    This function merges the extracts of the consecutive spans of a document (e.g. sentences or chunks parsed on
+    their own) into the extract of the document, the records being shifted to the token indices and character
+    offsets of the document.
+
+    args:
+        pattern_collection (list, str): patterns of the extracts
+        span_extracts (list, tuple): (character offset of the span within the document, number of tokens of the span,
+        extract of the span) per span, in document order
+
+    returns:
+        dict: output column name -> list of phrase records, as extract_patterns
+    """
+    pattern_columns = {pattern_name: get_phrase_column(pattern_name) for pattern_name in pattern_collection}
+    extract = {column_name: [] for column_name in pattern_columns.values()}
+    token_offset = 0
+    for char_offset, n_tokens, span_extract in span_extracts:
+        for pattern_name, column_name in pattern_columns.items():
+            extract[column_name].extend(shift_records(pattern_name, span_extract[column_name], token_offset, char_offset))
+        token_offset += n_tokens
+    return extract
+
+# Handling of the near duplicate rows by process_patterns: phrases of their cluster copied or left empty
+DEDUP_MODES = ['fan_out', 'flag']
+
+# Category under which the phrases are counted, exported and indexed when the data holds no CATEGORIES column
+DEFAULT_CATEGORY = 'uncategorized'
+
+# Segregated slot columns of the built-in patterns: pattern name -> {output column: record field}
+SEGREGATION_SLOTS = {
+    'nvn': {'NOUN1': 'subject', 'VERB': 'verb', 'NOUN2': 'object'},
+    'an': {'ADJ': 'adjective', 'NOUN': 'noun'},
+    'npn': {'NOUN1': 'noun1', 'PREPOSITION': 'preposition', 'NOUN2': 'noun2'},
+    'nvn_mod': {'NOUN1': 'subject', 'VERB': 'verb', 'NOUN2': 'object'},
+}
+
+def explode_non_empty(data: pd.DataFrame, phrases_col: str, phrase_keys: tuple) -> pd.DataFrame:
+    """
+    This function selects the rows having at least one extracted phrase through a boolean mask on the
+    length of the phrase lists and explodes them into one row per phrase. The fields of the phrase records
+    are then expanded into their own columns. Only the columns needed for segregation are carried along, the
+    texts are referred to by their document ids instead of being repeated in every phrase row.
+    
+    args:
+        data (pd.DataFrame): extract holding the phrases column and optionally CATEGORIES (DEFAULT_CATEGORY for every
+        row otherwise), documents are identified by the DOC_ID column when present and by the index otherwise
+        phrases_col (str): name of the column holding the extracted phrases
+        phrase_keys (tuple, str): fields of the phrase records to expand into columns
+    
+    returns:
+        pd.DataFrame: one row per phrase with DOC_ID, CATEGORIES and the record fields as columns
+    """
+    non_empty_mask = data[phrases_col].str.len() > 0
+    non_empty_data = data.loc[non_empty_mask, [phrases_col]]
+    non_empty_data.insert(0, 'CATEGORIES', data.loc[non_empty_mask, 'CATEGORIES'] if 'CATEGORIES' in data.columns else DEFAULT_CATEGORY)
+    non_empty_data.insert(0, 'DOC_ID', data.loc[non_empty_mask, 'DOC_ID'] if 'DOC_ID' in data.columns else non_empty_data.index)
+    print(non_empty_data.shape)
+    
+    exploded_data = non_empty_data.explode(phrases_col, ignore_index=True)
+    phrase_columns = pd.DataFrame(exploded_data.pop(phrases_col).tolist(), columns=phrase_keys)
+    return pd.concat([exploded_data, phrase_columns], axis=1)
+
+def segregate_phrases(data: pd.DataFrame, pattern_name: str) -> pd.DataFrame:
+    """
+    This function segregates the extracted phrases of a built-in pattern into one column per slot, the
+    slots are projected from the fields of the phrase records.
+    
+    args:
+        data (pd.DataFrame): extract holding the phrases column of the pattern, see explode_non_empty
+        pattern_name (str): name of the pattern e.g. 'nvn'
+    
+    returns:
+        pd.DataFrame: one row per phrase with DOC_ID, CATEGORY and the slot columns e.g. NOUN1, VERB, NOUN2
+    """
+    sample_data = explode_non_empty(data, get_phrase_column(pattern_name), PHRASE_RECORD_TYPES[pattern_name]._fields)
+    return pd.DataFrame({
+        'DOC_ID': sample_data['DOC_ID'],
+        'CATEGORY': sample_data['CATEGORIES'],
+        **{column_name: sample_data[field_name] for column_name, field_name in SEGREGATION_SLOTS[pattern_name].items()}})
+
 class PatternFinder:
-    def __init__(self, data: pd.DataFrame, textual_col: str, pattern_collection: list = ['nvn','an','npn','nvn_mod'], spacy_model_name: str = 'en_core_web_lg') -> None:
+    def __init__(self, data: pd.DataFrame, textual_col: str, pattern_collection: list = ['nvn','an','npn','nvn_mod'], spacy_model_name: str = 'en_core_web_lg', spacy_model_profile: str = 'rules', 
+                 parse_cache_dir: str = None, parse_cache_size_mb: int = 2048, rule_backend: str = 'rules', use_component: bool = False, 
+                 copy_data: bool = True) -> None:
         """
         This is the pattern finder class which is responsible for extracting grammaticals combinations of 
         nouns as subjects, objects, verbs and prepositions as action and combination of compound nouns and adjectives
@@ -200,23 +524,58 @@ class PatternFinder:
         - data (pd.DataFrame): pandas dataframe consisting of textual content
         - textual_col (str): name of column in input pandas dataframe
         - pattern_collection (list, str): patterns to process
+        - spacy_model_name (str): spacy model to be used for accessing the POS tags and dependencies
+        - spacy_model_profile (str): model profile deciding the components to load, 'rules' loads only the
+        components needed by the rules (no NER and no unused vectors table), None loads the whole pipeline
+        - parse_cache_dir (str): folder of the on-disk parse cache, parsed documents are reused across runs by every
+        execution mode but 'parallel' without use_component, whose worker processes parse their own chunks
+        - parse_cache_size_mb (int): size cap of the parse cache, least recently used shards are evicted beyond it
+        - rule_backend (str): 'rules' to run the hand written rules or 'matcher' to run the rules compiled as spacy
+        DependencyMatcher patterns in one pass, extra patterns can be registered with the 'matcher' backend
+        - use_component (bool): add the rules to the spacy pipeline as the 'pattern_finder' component, phrases are then
+        extracted inside nlp.pipe (and its worker processes in 'parallel' mode) and read back from the Doc extensions
+        - copy_data (bool): work on a copy of the input dataframe, False adds the phrase columns to the input dataframe
+        itself and avoids holding the data twice in memory
         
         return:
         - None
         """
         self._data = data
         self._textual_col = textual_col
-        self._pattern_collection = pattern_collection
+        self._pattern_collection = list(pattern_collection)
         self._spacy_model_name = spacy_model_name
-        self._spacy_loaded_model = load_spacy_model(self._spacy_model_name, exclude_list=[])
+        self._spacy_model_profile = spacy_model_profile
+        self._spacy_exclude_list = []
+        self._spacy_loaded_model = load_spacy_model(self._spacy_model_name, exclude_list=self._spacy_exclude_list, profile=self._spacy_model_profile)
+        self._parse_cache = ParseCache(parse_cache_dir, self._spacy_loaded_model, max_size_mb=parse_cache_size_mb) if parse_cache_dir is not None else None
+        
+        if rule_backend not in RULE_BACKENDS:
+            raise ValueError(f"Unknown rule backend '{rule_backend}', expected one of {RULE_BACKENDS}")
+        self._rule_backend = rule_backend
+        self._custom_rules = dict()
+        self._rule_engine = None
+        self._pattern_component = None
+        if use_component:
+            self._pattern_component = self._spacy_loaded_model.add_pipe('pattern_finder', config={'pattern_collection': self._pattern_collection, 
+                                                                                                  'rule_backend': rule_backend})
+        elif rule_backend == 'matcher':
+            self._rule_engine = RuleEngine(self._spacy_loaded_model.vocab)
         
-        self._overall_extract = self._data.copy()
+        self._overall_extract = self._data.copy() if copy_data else self._data
         self._nvn_seg_patterns = None
         self._an_seg_patterns = None
         self._npn_seg_patterns = None
         self._nvn_mod_seg_patterns = None
+        self._frequency_tables = None
+        self._phrase_index = None
+        self._knowledge_graph = None
+        self._sentence_memo = None
         
     #region Properties
+    @property
+    def get_overall_extract(self):
+        return self._overall_extract
+    
     @property
     def get_nvn_patterns(self):
         return self._nvn_seg_patterns
@@ -232,35 +591,563 @@ class PatternFinder:
     @property
     def get_nvn_mod_patterns(self):
         return self._nvn_mod_seg_patterns
+    
+    @property
+    def get_frequency_tables(self):
+        return self._frequency_tables
+    
+    @property
+    def get_phrase_index(self):
+        return self._phrase_index
+    
+    @property
+    def get_knowledge_graph(self):
+        return self._knowledge_graph
+    
+    @property
+    def get_sentence_memo(self):
+        return self._sentence_memo
     #endregion
     
-    def process_patterns(self):
+    def preprocess(self, raw_col: str, preprocessing_mode: str = 'parallel', n_process: int = None, chunk_size: int = 256, **preprocessing_flags) -> None:
+        """
+        This method preprocesses the raw texts into the textual column ahead of process_patterns, see
+        preprocessing_runner.preprocess_texts.
+        
+        args:
+        - raw_col (str): name of the raw textual column
+        - preprocessing_mode (str): 'apply' on one core, 'vectorized' through pandas .str operations or 'parallel' in a
+        pool of worker processes
+        - n_process (int): number of worker processes of the 'parallel' mode, defaults to the cpu count
+        - chunk_size (int): number of texts sent to a worker at a time in 'parallel' mode
+        - preprocessing_flags: flags of remove_stopwords_punc_nos, defaulting to those of preprocess_text
+        
+        return:
+        - None
+        """
+        self._overall_extract[self._textual_col] = preprocess_texts(self._overall_extract[raw_col], preprocessing_mode=preprocessing_mode,
+                                                                    n_process=n_process, chunk_size=chunk_size, **preprocessing_flags)
+    
+    @classmethod
+    def from_packed_corpus(cls, corpus: PackedCorpus, textual_col: str = 'PREPROCESSED_TEXT', indices: list = None, preprocessing_mode: str = 'parallel',
+                           n_process: int = None, chunk_size: int = 256, **kwargs):
+        """
+        This method creates a pattern finder over the articles of a packed corpus, preprocessed straight from its
+        memory map so that the raw texts never become a dataframe column, see preprocessing_runner.preprocess_corpus.
+        
+        args:
+        - corpus (PackedCorpus): packed corpus of the raw texts
+        - textual_col (str): name of the preprocessed textual column
+        - indices (list, int): positions of the articles to process, see PackedCorpus.get_indices, all of them by default
+        - preprocessing_mode (str): 'apply', 'vectorized' or 'parallel', as in preprocess
+        - n_process (int): number of worker processes of the 'parallel' preprocessing, defaults to the cpu count
+        - chunk_size (int): number of texts preprocessed by a worker at a time in 'parallel' mode
+        - kwargs: other arguments of the pattern finder
+        
+        return:
+        - PatternFinder: pattern finder over DOC_ID, CATEGORIES and the textual column
+        """
+        data = preprocess_corpus(corpus, indices=indices, textual_col=textual_col, preprocessing_mode=preprocessing_mode,
+                                 n_process=n_process, chunk_size=chunk_size)
+        return cls(data=data, textual_col=textual_col, copy_data=False, **kwargs)
+    
+    def register_pattern(self, pattern_name: str, patterns: list, builder=None) -> None:
+        """
+        This method registers an extra pattern with the 'matcher' rule backend and adds it to the patterns
+        to process. Its phrases are stored under the '<PATTERN_NAME>_PHRASES' column.
+        
+        args:
+        - pattern_name (str): name of the pattern e.g. 'vp'
+        - patterns (list): list of spacy DependencyMatcher patterns, each a list of node dictionaries
+        - builder (function): builder(doc, matches) -> list of records, defaults to one record per match holding the
+        matched tokens. It needs to be defined at module level to be usable by the parallel backend
+        
+        returns:
+        - None
+        """
+        if self._rule_backend != 'matcher':
+            raise ValueError("Extra patterns can only be registered with the 'matcher' rule backend")
+        if self._pattern_component is not None:
+            self._pattern_component.register_pattern(pattern_name, patterns, builder)
+        else:
+            self._rule_engine.add_rule(pattern_name, patterns, builder)
+        self._custom_rules[pattern_name] = (patterns, builder)
+        self._pattern_collection.append(pattern_name)
+        # sentences memoized so far miss the phrases of the new pattern
+        self._sentence_memo = None
+    
+    def _get_phrase_columns(self) -> list:
+        pattern_names = list(PATTERN_RULES) + list(self._custom_rules)
+        return [get_phrase_column(pattern_name) for pattern_name in pattern_names if pattern_name in self._pattern_collection]
+    
+    def _extract_doc(self, doc: Doc) -> dict:
+        if self._pattern_component is not None:
+            return self._pattern_component.get_extracts(doc)
+        return extract_patterns(doc, self._pattern_collection, rule_engine=self._rule_engine)
+    
+    def process_patterns(self, execution_mode: str = 'apply', batch_size: int = 64, n_process: int = None, chunk_size: int = 256, 
+                         export_dir: str = None, export_format: str = 'parquet', export_batch_size: int = 1024, keep_results: bool = True, 
+                         counting_mode: str = 'exact', sketch_params: dict = None, memo_size: int = 100000, memo_policy: str = 'lru', 
+                         dedup_mode: str = None, dedup_threshold: float = 0.8, max_chunk_chars: int = 10000):
         """
         This method is to run processes which would extract the input patterns
         decided, merge them with thr original dataframe and also store them as output
-        extract
+        extract. Every row is parsed only once and the parsed document is shared by all
+        the selected rules. The slot frequency tables are updated while the extraction runs
+        and the phrases can also be streamed to partitioned columnar files
         
         args:
+        - execution_mode (str): 'apply' to parse row by row through pandas apply, 'pipe' to stream
+        the textual column through spacy's nlp.pipe in batches or 'parallel' to split the rows into chunks
+        processed by a pool of worker processes (nlp.pipe with n_process when the rules run as a pipeline component)
+        or 'sentence' to parse and extract every distinct sentence only once, see _sentence_patterns, or 'chunked' to parse
+        long texts in length sorted windows of sentences, see _chunked_patterns
+        - batch_size (int): number of texts buffered by nlp.pipe per batch, used by 'pipe', 'parallel', 'sentence' and 'chunked' modes
+        - n_process (int): number of worker processes used by 'parallel' mode, defaults to the cpu count
+        - chunk_size (int): number of rows sent to a worker at a time, used only by 'parallel' mode
+        - export_dir (str): folder where the phrases of every pattern are written, partitioned by category, None to skip the export
+        - export_format (str): 'parquet' or 'arrow' (Arrow IPC), see utility.phrase_export
+        - export_batch_size (int): number of rows whose phrases are written together as one row group / record batch
+        - keep_results (bool): store the phrase columns in the overall extract, set it to False along with export_dir
+        so that the phrases are only written out and never held in memory all together
+        - counting_mode (str): 'exact' to count every slot value in FrequencyTables, 'sketch' for the memory bounded
+        approximate SketchTables (count-min sketch + space saving, see utility.sketch_tables for the error bounds)
+        - sketch_params (dict): keyword arguments of SketchTables e.g. {'width': 2**18, 'depth': 5, 'capacity': 5000}
+        - memo_size (int): number of sentences whose phrases are memoized, used only by 'sentence' mode
+        - memo_policy (str): 'lru' or 'lfu' eviction of the memoized sentences, used only by 'sentence' mode
+        - dedup_mode (str): None to process every row, 'fan_out' or 'flag' to first cluster the near duplicate rows
+        (see find_near_duplicates) and process only the first row of every cluster, the other rows of the cluster
+        getting a copy of its phrases without token indices and offsets ('fan_out') or no phrases ('flag'), IS_DUPLICATE
+        flagging them in both cases
+        - dedup_threshold (float): Jaccard similarity of the word shingles above which two rows are near duplicates
+        - max_chunk_chars (int): maximum number of characters per window, used only by 'chunked' mode
+        
+        returns:
         - None
+        """
+        if dedup_mode is not None and dedup_mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{dedup_mode}', expected one of {DEDUP_MODES}")
+        if not keep_results and export_dir is None:
+            raise ValueError("keep_results can only be False along with an export_dir, the phrases would be discarded otherwise")
+        texts = self._overall_extract[self._textual_col]
+        if dedup_mode is not None:
+            self.find_near_duplicates(threshold=dedup_threshold)
+            texts = texts[~self._overall_extract['IS_DUPLICATE'].to_numpy()]
+        
+        if execution_mode == 'parallel' and self._pattern_component is None and self._parse_cache is not None:
+            raise ValueError("The parse cache cannot be used by 'parallel' mode without use_component, use 'pipe' mode or the pipeline component instead")
+        
+        if execution_mode == 'apply' and self._parse_cache is not None:
+            # documents are read from and written to the parse cache, the misses being parsed one at a time as apply does
+            extracts = self._pipe_patterns(texts, batch_size=1)
+        elif execution_mode == 'apply':
+            tqdm.pandas(desc='Extracting {} phrases'.format(', '.join(self._pattern_collection).upper()))
+            extracts = texts.progress_apply(lambda x : self._extract_doc(self._spacy_loaded_model(x)))
+        elif execution_mode == 'pipe':
+            extracts = self._pipe_patterns(texts, batch_size=batch_size)
+        elif execution_mode == 'parallel' and self._pattern_component is not None:
+            extracts = self._pipe_patterns(texts, batch_size=batch_size, n_process=n_process or os.cpu_count())
+        elif execution_mode == 'parallel':
+            extracts = self._parallel_patterns(texts, batch_size=batch_size, n_process=n_process, chunk_size=chunk_size)
+        elif execution_mode == 'sentence':
+            if self._sentence_memo is None or (self._sentence_memo.get_max_size, self._sentence_memo.get_policy) != (memo_size, memo_policy):
+                self._sentence_memo = SentenceMemo(max_size=memo_size, policy=memo_policy)
+            extracts = self._sentence_patterns(texts, batch_size=batch_size)
+        elif execution_mode == 'chunked':
+            extracts = self._chunked_patterns(texts, batch_size=batch_size, max_chunk_chars=max_chunk_chars)
+        else:
+            raise ValueError(f"Unknown execution mode '{execution_mode}', expected one of ['apply','pipe','parallel','sentence','chunked']")
+        if dedup_mode is not None:
+            extracts = self._fan_out_patterns(extracts, dedup_mode)
+        
+        self._frequency_tables = create_frequency_tables({
+            pattern_name: slots for pattern_name, slots in SEGREGATION_SLOTS.items() if pattern_name in self._pattern_collection
+        }, counting_mode=counting_mode, sketch_params=sketch_params)
+        extracts = self._count_patterns(extracts)
+        
+        phrase_columns = self._get_phrase_columns()
+        if export_dir is None:
+            extracts = list(extracts)
+            extract_columns = {column_name: [extract[column_name] for extract in extracts] for column_name in phrase_columns}
+        else:
+            extract_columns = self._export_patterns(extracts, export_dir, export_format, export_batch_size, keep_results)
+        
+        if keep_results:
+            for column_name in phrase_columns:
+                self._overall_extract[column_name] = extract_columns[column_name]
+    
+    def _count_patterns(self, extracts):
+        """
+        This method updates the frequency tables with the phrases of every row as the extracts are produced
+        and passes the extracts through.
+        
+        args:
+        - extracts (iterable, dict): one extract dictionary per row, in the same order as the rows of the dataframe
+        
+        returns:
+        - generator: the same extracts
+        """
+        pattern_names = list(self._frequency_tables.get_slot_columns)
+        for category, extract in zip(self._get_categories(), extracts):
+            for pattern_name in pattern_names:
+                self._frequency_tables.update(pattern_name, category, extract[get_phrase_column(pattern_name)])
+            yield extract
+    
+    def _export_patterns(self, extracts, export_dir: str, export_format: str, export_batch_size: int, keep_results: bool) -> dict:
+        """
+        This method consumes the extracts as they are produced and writes them every export batch size
+        rows through the phrase exporter, one dataset per pattern partitioned by category.
+        
+        args:
+        - extracts (iterable, dict): one extract dictionary per row, in the same order as the rows of the dataframe
+        - export_dir (str): base folder of the export
+        - export_format (str): 'parquet' or 'arrow'
+        - export_batch_size (int): number of rows written together
+        - keep_results (bool): collect the phrase columns while exporting
+        
+        returns:
+        - dict: output column name -> list of phrases per row, empty lists when keep_results is False
+        """
+        pattern_columns = {pattern_name: get_phrase_column(pattern_name) for pattern_name in self._pattern_collection}
+        extract_columns = {column_name: [] for column_name in pattern_columns.values()}
+        # rows are exported under their doc ids, as the phrase index and the datasets are keyed, and under their
+        # row ids when the data holds no doc ids
+        if 'DOC_ID' in self._overall_extract.columns or self._overall_extract.index.name == 'DOC_ID':
+            row_ids, id_column, id_type = [str(doc_id) for doc_id in self._get_doc_ids()], 'DOC_ID', pa.string()
+        elif pd.api.types.is_integer_dtype(self._overall_extract.index):
+            row_ids, id_column, id_type = self._overall_extract.index.tolist(), 'ROW_ID', pa.int64()
+        else:
+            row_ids, id_column, id_type = [str(row_id) for row_id in self._overall_extract.index], 'ROW_ID', pa.string()
+        categories = self._get_categories()
+        
+        def write_batch(exporter, batch_start, batch_extracts):
+            for pattern_name, column_name in pattern_columns.items():
+                exporter.write_batch(pattern_name, row_ids[batch_start:batch_start+len(batch_extracts)], 
+                                     categories[batch_start:batch_start+len(batch_extracts)], 
+                                     [extract[column_name] for extract in batch_extracts])
+        
+        record_types = {pattern_name: PHRASE_RECORD_TYPES.get(pattern_name) for pattern_name in pattern_columns}
+        with PhraseExporter(export_dir, record_types, file_format=export_format, id_column=id_column, id_type=id_type) as exporter:
+            batch_start, batch_extracts = 0, []
+            for extract in extracts:
+                batch_extracts.append(extract)
+                if keep_results:
+                    for column_name in extract_columns:
+                        extract_columns[column_name].append(extract[column_name])
+                if len(batch_extracts) == export_batch_size:
+                    write_batch(exporter, batch_start, batch_extracts)
+                    batch_start, batch_extracts = batch_start + len(batch_extracts), []
+            if len(batch_extracts) != 0:
+                write_batch(exporter, batch_start, batch_extracts)
+        print(f"Exported phrases to {export_dir}: {exporter.get_n_rows}")
+        return extract_columns
+    
+    def _pipe_patterns(self, texts: pd.Series, batch_size: int = 64, n_process: int = 1):
+        """
+        This method streams the textual column through nlp.pipe so that spacy can batch the
+        documents and runs all the selected rules on each parsed document as it is yielded. When a
+        parse cache is configured, cached documents are loaded instead of being parsed again.
+        
+        args:
+        - texts (pd.Series, str): textual column of the rows to process
+        - batch_size (int): number of texts buffered by nlp.pipe per batch
+        - n_process (int): number of processes used by nlp.pipe, only worth it along with the pipeline component
+        
+        returns:
+        - generator: one extract dictionary per text, in the same order as the texts
+        """
+        if self._parse_cache is not None:
+            docs = self._parse_cache.pipe(texts, batch_size=batch_size)
+        else:
+            docs = self._spacy_loaded_model.pipe(texts, batch_size=batch_size, n_process=n_process)
+        for doc in tqdm(docs, total=len(texts), desc='Extracting {} phrases'.format(', '.join(self._pattern_collection).upper()), unit='doc'):
+            yield self._extract_doc(doc)
+    
+    def _parallel_patterns(self, texts: pd.Series, batch_size: int = 64, n_process: int = None, chunk_size: int = 256):
+        """
+        This method splits the textual column into chunks and extracts the phrases in a pool of worker
+        processes, each of which loads the spacy model once. Chunks are collected back in submission order
+        so that the extracts line up with the rows of the dataframe.
+        
+        args:
+        - texts (pd.Series, str): textual column of the rows to process
+        - batch_size (int): number of texts buffered by nlp.pipe per batch inside a worker
+        - n_process (int): number of worker processes, defaults to the cpu count
+        - chunk_size (int): number of rows sent to a worker at a time
+        
+        returns:
+        - generator: one extract dictionary per text, in the same order as the texts
+        """
+        texts = texts.tolist()
+        chunks = [texts[idx:idx+chunk_size] for idx in range(0, len(texts), chunk_size)]
+        n_process = n_process or os.cpu_count()
+        
+        with ProcessPoolExecutor(max_workers=n_process, 
+                                 initializer=_init_pattern_worker, 
+                                 initargs=(self._spacy_model_name, self._spacy_exclude_list, self._spacy_model_profile, 
+                                           self._rule_backend, self._custom_rules)) as executor:
+            futures = [executor.submit(_extract_chunk, chunk, self._pattern_collection, batch_size) for chunk in chunks]
+            with tqdm(total=len(texts), desc='Extracting {} phrases'.format(', '.join(self._pattern_collection).upper()), unit='doc') as progress_bar:
+                for future in futures:
+                    chunk_extracts = future.result()
+                    progress_bar.update(len(chunk_extracts))
+                    yield from chunk_extracts
+    
+    def _sentence_patterns(self, texts: pd.Series, batch_size: int = 64, block_size: int = 1024):
+        """
+        This method extracts the phrases sentence by sentence, so that sentences repeated across the documents
+        (syndicated paragraphs, bylines, legal footers) are parsed and extracted only once. The rows are taken
+        block by block: the sentences of a block are hashed, the distinct sentences missing from the sentence memo
+        are parsed through nlp.pipe (or the parse cache) and memoized along with their number of tokens, then the
+        phrases of the sentences of every row are shifted to the token indices and character offsets of the row
+        and concatenated. Every record therefore still belongs to the row of its originating document, only the
+        parse differs from the one of the whole text, each sentence being parsed out of its context.
+        
+        args:
+        - texts (pd.Series, str): textual column of the rows to process
+        - batch_size (int): number of sentences buffered by nlp.pipe per batch
+        - block_size (int): number of rows whose sentences are looked up and parsed together
         
         returns:
+        - generator: one extract dictionary per text, in the same order as the texts
+        """
+        texts = texts.tolist()
+        n_sentences, n_parsed = 0, 0
+        with tqdm(total=len(texts), desc='Extracting {} phrases by sentence'.format(', '.join(self._pattern_collection).upper()), unit='doc') as progress_bar:
+            for block_start in range(0, len(texts), block_size):
+                block_sentences = [
+                    [(char_offset, get_sentence_key(sentence), sentence) for char_offset, sentence in split_sentences(text)]
+                    for text in texts[block_start:block_start+block_size]
+                ]
+                # (number of tokens, extract) per distinct sentence of the block, held here as the memo may evict them
+                block_values, missing_sentences = dict(), dict()
+                for sentences in block_sentences:
+                    n_sentences += len(sentences)
+                    for _, key, sentence in sentences:
+                        if key in block_values or key in missing_sentences:
+                            continue
+                        value = self._sentence_memo.get(key)
+                        if value is None:
+                            missing_sentences[key] = sentence
+                        else:
+                            block_values[key] = value
+                
+                if self._parse_cache is not None:
+                    docs = self._parse_cache.pipe(list(missing_sentences.values()), batch_size=batch_size)
+                else:
+                    docs = self._spacy_loaded_model.pipe(missing_sentences.values(), batch_size=batch_size)
+                for key, doc in zip(missing_sentences, docs):
+                    block_values[key] = (len(doc), self._extract_doc(doc))
+                    self._sentence_memo.put(key, block_values[key])
+                n_parsed += len(missing_sentences)
+                progress_bar.set_postfix(sentences=n_sentences, parsed=n_parsed, memo_hit_rate=f'{self._sentence_memo.get_hit_rate:.2%}')
+                
+                for sentences in block_sentences:
+                    progress_bar.update(1)
+                    yield merge_span_extracts(self._pattern_collection, [(char_offset, *block_values[key]) for char_offset, key, _ in sentences])
+    
+    def _chunked_patterns(self, texts: pd.Series, batch_size: int = 64, max_chunk_chars: int = 10000, block_size: int = 1024):
+        """
+        This method bounds the memory and latency of parsing long documents by parsing them in windows of
+        consecutive sentences of at most max chunk chars characters, see chunk_text. The rows are taken block by
+        block: the chunks of a block are sorted by length before going through nlp.pipe (or the parse cache), so
+        that every batch holds chunks of similar lengths, then the phrases of the chunks of every row are shifted
+        to the token indices and character offsets of the row and concatenated.
+        
+        args:
+        - texts (pd.Series, str): textual column of the rows to process
+        - batch_size (int): number of chunks buffered by nlp.pipe per batch
+        - max_chunk_chars (int): maximum number of characters per chunk, capped by the max_length of the spacy model
+        - block_size (int): number of rows whose chunks are sorted and parsed together
+        
+        returns:
+        - generator: one extract dictionary per text, in the same order as the texts
+        """
+        texts = texts.tolist()
+        max_chunk_chars = min(max_chunk_chars, self._spacy_loaded_model.max_length)
+        with tqdm(total=len(texts), desc='Extracting {} phrases by chunk'.format(', '.join(self._pattern_collection).upper()), unit='doc') as progress_bar:
+            for block_start in range(0, len(texts), block_size):
+                block_chunks = [chunk_text(text, max_chunk_chars) for text in texts[block_start:block_start+block_size]]
+                chunks = [chunk for text_chunks in block_chunks for _, chunk in text_chunks]
+                chunk_order = sorted(range(len(chunks)), key=lambda idx: len(chunks[idx]))
+                sorted_chunks = [chunks[idx] for idx in chunk_order]
+                if self._parse_cache is not None:
+                    docs = self._parse_cache.pipe(sorted_chunks, batch_size=batch_size)
+                else:
+                    docs = self._spacy_loaded_model.pipe(sorted_chunks, batch_size=batch_size)
+                # (number of tokens, extract) per chunk, back in document order
+                chunk_values = [None] * len(chunks)
+                for idx, doc in zip(chunk_order, docs):
+                    chunk_values[idx] = (len(doc), self._extract_doc(doc))
+                
+                position = 0
+                for text_chunks in block_chunks:
+                    span_extracts = [(char_offset, *chunk_values[position+idx]) for idx, (char_offset, _) in enumerate(text_chunks)]
+                    position += len(text_chunks)
+                    progress_bar.update(1)
+                    yield merge_span_extracts(self._pattern_collection, span_extracts)
+    
+    def find_near_duplicates(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> pd.DataFrame:
+        """
+        This method clusters the near duplicate rows of the textual column (e.g. copies of the same wire story) through
+        MinHash signatures and LSH banding, see utility.near_duplicates. Every row is labelled with the position of the
+        first row of its cluster in CLUSTER_ID, the other rows of the cluster being flagged by IS_DUPLICATE.
+        
+        args:
+        - threshold (float): Jaccard similarity of the word shingles above which two rows are near duplicates
+        - num_perm (int): size of the MinHash signatures
+        - shingle_size (int): number of consecutive words per shingle
+        - seed (int): seed of the MinHash hash functions
+        
+        return:
+        - pd.DataFrame: DOC_ID and CLUSTER_ID of the near duplicate rows, first rows of their clusters included
+        """
+        min_hash_lsh = MinHashLSH(threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+        texts = self._overall_extract[self._textual_col].tolist()
+        signatures = min_hash_lsh.get_signatures(tqdm(texts, desc='Hashing texts', unit='doc'))
+        cluster_ids = min_hash_lsh.cluster(signatures=signatures)
+        self._overall_extract['CLUSTER_ID'] = cluster_ids
+        self._overall_extract['IS_DUPLICATE'] = cluster_ids != np.arange(len(cluster_ids))
+        
+        cluster_sizes = np.bincount(cluster_ids, minlength=len(cluster_ids))
+        in_cluster_mask = cluster_sizes[cluster_ids] > 1
+        print(f"{int(self._overall_extract['IS_DUPLICATE'].sum())} near duplicate rows in {int((cluster_sizes > 1).sum())} clusters")
+        return pd.DataFrame({'DOC_ID': np.asarray(self._get_doc_ids(), dtype=object)[in_cluster_mask], 'CLUSTER_ID': cluster_ids[in_cluster_mask]})
+    
+    def _fan_out_patterns(self, extracts, dedup_mode: str):
+        """
+        This method spreads the extracts of the first rows of the clusters over all the rows. The first row of a
+        cluster always comes before the other rows, so the extracts are streamed and only the extracts of the
+        clusters having near duplicates are held.
+        
+        args:
+        - extracts (iterable, dict): one extract dictionary per row not flagged by IS_DUPLICATE
+        - dedup_mode (str): 'fan_out' to copy the phrases of the first row of the cluster, their token indices and offsets
+        being reset to -1 since they refer to the text of the first row, 'flag' to leave them empty
+        
+        returns:
+        - generator: one extract dictionary per row, in the same order as the rows of the dataframe
+        """
+        extracts = iter(extracts)
+        cluster_ids = self._overall_extract['CLUSTER_ID'].to_numpy()
+        # number of near duplicates still to come per cluster, the extract of a cluster being dropped after its last one
+        n_pending = pd.Series(cluster_ids[self._overall_extract['IS_DUPLICATE'].to_numpy()]).value_counts().to_dict()
+        cluster_extracts = dict()
+        phrase_columns = {get_phrase_column(pattern_name): pattern_name for pattern_name in self._pattern_collection}
+        for position, cluster_id in enumerate(cluster_ids.tolist()):
+            if position == cluster_id:
+                extract = next(extracts)
+                if position in n_pending:
+                    cluster_extracts[position] = extract
+                yield extract
+                continue
+            n_pending[cluster_id] -= 1
+            if dedup_mode == 'fan_out':
+                yield {column_name: unlocate_records(pattern_name, cluster_extracts[cluster_id][column_name]) for column_name, pattern_name in phrase_columns.items()}
+            else:
+                yield {column_name: [] for column_name in phrase_columns}
+            if n_pending[cluster_id] == 0:
+                del cluster_extracts[cluster_id]
+    
+    def _get_categories(self) -> list:
+        # category of every row, DEFAULT_CATEGORY for all of them when the data holds no CATEGORIES column
+        if 'CATEGORIES' in self._overall_extract.columns:
+            return self._overall_extract['CATEGORIES'].tolist()
+        return [DEFAULT_CATEGORY] * len(self._overall_extract)
+    
+    def _get_doc_ids(self) -> list:
+        # documents are identified by the DOC_ID column when present and by the index otherwise
+        if 'DOC_ID' in self._overall_extract.columns:
+            return self._overall_extract['DOC_ID'].tolist()
+        return self._overall_extract.index.tolist()
+    
+    def get_texts(self, doc_ids: list) -> list:
+        """
+        This method returns the texts of the documents referred to by the segregated phrases or the index lookups.
+        
+        args:
+        - doc_ids (list): document ids
+        
+        return:
+        - list: textual column value per document id
+        """
+        texts = pd.Series(self._overall_extract[self._textual_col].tolist(), index=self._get_doc_ids())
+        return texts.loc[doc_ids].tolist()
+    
+    def build_index(self, index_path: str, batch_size: int = 1024) -> None:
+        """
+        This method indexes the extracted built-in phrases by their slot values in a persistent phrase index,
+        documents already present in the index are indexed again.
+        
+        args:
+        - index_path (str): path of the sqlite index file
+        - batch_size (int): number of documents indexed per transaction
+        
+        return:
         - None
         """
-        if 'nvn' in self._pattern_collection:
-            tqdm.pandas(desc='Extracting NVN phrases')
-            self._overall_extract['NVN_PHRASES'] = self._overall_extract[self._textual_col].progress_apply(lambda x : rule_nvn(x, spacy_loaded_model = self._spacy_loaded_model))
-            
-        if 'an' in self._pattern_collection:
-            tqdm.pandas(desc='Extracting AN phrases')
-            self._overall_extract['AN_PHRASES'] = self._overall_extract[self._textual_col].progress_apply(lambda x : rule_an(x, spacy_loaded_model = self._spacy_loaded_model))
+        pattern_names = [pattern_name for pattern_name in SEGREGATION_SLOTS if get_phrase_column(pattern_name) in self._overall_extract.columns]
+        if len(pattern_names) == 0:
+            print('Phrases are missing. Please run process_patterns with keep_results before building the index')
+            return
         
-        if 'npn' in self._pattern_collection:
-            tqdm.pandas(desc='Extracting NPN phrases')
-            self._overall_extract['NPN_PHRASES'] = self._overall_extract[self._textual_col].progress_apply(lambda x : rule_npn(x, spacy_loaded_model = self._spacy_loaded_model))
+        if self._phrase_index is not None:
+            self._phrase_index.close()
+        self._phrase_index = PhraseIndex(index_path)
+        doc_ids = self._get_doc_ids()
+        categories = self._get_categories()
+        self._phrase_index.remove_documents(doc_ids)
+        for pattern_name in pattern_names:
+            phrases = self._overall_extract[get_phrase_column(pattern_name)].tolist()
+            slot_fields = list(SEGREGATION_SLOTS[pattern_name].values())
+            for idx in tqdm(range(0, len(doc_ids), batch_size), desc=f'Indexing {pattern_name.upper()} phrases'):
+                self._phrase_index.add_documents(pattern_name, slot_fields, doc_ids[idx:idx+batch_size], 
+                                                 categories[idx:idx+batch_size], phrases[idx:idx+batch_size])
     
-        if 'nvn_mod' in self._pattern_collection:
-            tqdm.pandas(desc='Extracting NVN with Adjectives / Compound nouns based phrases')
-            self._overall_extract['NVN_MOD_PHRASES'] = self._overall_extract[self._textual_col].progress_apply(lambda x : rule_nvn_mod(x, spacy_loaded_model = self._spacy_loaded_model))
+    def query_phrases(self, pattern_name: str, category: str = None, limit: int = None, **slot_terms) -> pd.DataFrame:
+        """
+        This method looks up the indexed phrases of a pattern by their slot values, see build_index.
+        
+        args:
+        - pattern_name (str): name of the pattern e.g. 'nvn'
+        - category (str): category to restrict the lookup to, None for all the categories
+        - limit (int): maximum number of phrases to return
+        - slot_terms: record field -> slot text, matched case insensitively
+        e.g. query_phrases('nvn', subject='ONS', verb='revise') or query_phrases('an', category='politics', noun='election')
+        
+        return:
+        - pd.DataFrame: DOC_ID, CATEGORY and the record fields (slots, token indices and offsets) of the matching phrases
+        """
+        if self._phrase_index is None:
+            raise ValueError('Phrase index is missing. Please run build_index first')
+        return self._phrase_index.query(pattern_name, category=category, limit=limit, **slot_terms)
+    
+    def query_documents(self, pattern_name: str, category: str = None, **slot_terms) -> list:
+        """
+        This method returns the ids of the documents holding at least one indexed phrase matching the lookup, see query_phrases.
+        """
+        if self._phrase_index is None:
+            raise ValueError('Phrase index is missing. Please run build_index first')
+        return self._phrase_index.query_documents(pattern_name, category=category, **slot_terms)
+    
+    def build_knowledge_graph(self, pattern_collection: list = ['nvn','npn'], lowercase: bool = True):
+        """
+        This method builds the knowledge graph of the entities linked by the verbs of the NVN phrases and the
+        prepositions of the NPN phrases, from the frequency tables counted by process_patterns.
+        
+        args:
+        - pattern_collection (list, str): patterns whose slot tuples become edges
+        - lowercase (bool): whether entity names are lowercased before being interned
+        
+        return:
+        - KnowledgeGraph: graph which can be queried, exported or saved, see utility.knowledge_graph
+        """
+        if self._frequency_tables is None:
+            raise ValueError('Frequency tables are missing. Please run process_patterns first')
+        pattern_collection = [pattern_name for pattern_name in pattern_collection if pattern_name in self._frequency_tables.get_slot_columns]
+        builder = KnowledgeGraphBuilder(lowercase=lowercase).add_frequency_tables(self._frequency_tables, pattern_collection)
+        self._knowledge_graph = builder.build()
+        return self._knowledge_graph
     
     def extract_seg_nvn(self):
         """
@@ -275,64 +1162,8 @@ class PatternFinder:
         if 'NVN_PHRASES' not in self._overall_extract.columns:
             print('NVN Phrases are missing. Please re-run pattern finder with NVN phrases under pattern collectibles')
             return
-            
-        sample_data_copy = self._overall_extract[['ARTICLES','CATEGORIES','PREPROCESSED_TEXT','NVN_PHRASES']].copy().reset_index(drop=True)
-        # selecting non-empty output rows
-        nvn_sample_data = pd.DataFrame(columns=sample_data_copy.columns)
-        
-        try:
-            for row in tqdm(range(len(sample_data_copy)), desc='Selecting non empty rows'):
-                if len(sample_data_copy.loc[row,'NVN_PHRASES'])!=0:
-                    nvn_sample_data = pd.concat([nvn_sample_data, pd.DataFrame([sample_data_copy.loc[row,:]])], ignore_index=True)
-
-            # reset the index
-            nvn_sample_data.reset_index(inplace=True)
-            nvn_sample_data.drop('index', axis=1, inplace=True)   
-            print(nvn_sample_data.shape)
-        except Exception as ex:
-            print(ex)
-            pass
-        
-        verb_dict = dict()
-        dis_dict = dict()
-        dis_list = []
-        try:
-            # iterating over all the sentences
-            for i in range(len(nvn_sample_data)):
-                
-                # sentence containing the output
-                sentence = nvn_sample_data.loc[i,'PREPROCESSED_TEXT']
-                # catgeory info
-                category = nvn_sample_data.loc[i,'CATEGORIES']
-                # output of the sentence
-                output = nvn_sample_data.loc[i,'NVN_PHRASES']
-                
-                # iterating over all the outputs from the sentence
-                for sent in output:
-                    # separate subject, verb and object
-                    n1, v, n2 = sent['phrase'].split(sent['verb'])[0], sent['verb'], sent['phrase'].split(sent['verb'])[1]
-                    
-                    # append to list, along with the sentence
-                    dis_dict = {
-                        'PREPROCESSED_TEXT':sentence,
-                        'CATEGORY':category,
-                        'NOUN1':n1,
-                        'VERB':v,
-                        'NOUN2':n2}
-                    dis_list.append(dis_dict)
-                    
-                    # counting the number of sentences containing the verb
-                    verb = sent['phrase'].split()[1]
-                    if verb in verb_dict:
-                        verb_dict[verb]+=1
-                    else:
-                        verb_dict[verb]=1
-            
-            df_nvn_sep = pd.DataFrame(dis_list)
-        except Exception as ex:
-            print(ex)
-        finally:
-            self._nvn_seg_patterns = df_nvn_sep.copy()
+        
+        self._nvn_seg_patterns = segregate_phrases(self._overall_extract, 'nvn')
         
     def extract_seg_an(self):
         """
@@ -348,62 +1179,7 @@ class PatternFinder:
             print('AN Phrases are missing. Please re-run pattern finder with AN phrases under pattern collectibles')
             return
         
-        # selecting non-empty output rows
-        sample_data_copy = self._overall_extract[['ARTICLES','CATEGORIES','PREPROCESSED_TEXT','AN_PHRASES']].copy().reset_index(drop=True)
-        an_sample_data = pd.DataFrame(columns=sample_data_copy.columns)
-
-        try:
-            for row in tqdm(range(len(sample_data_copy)), desc='Selecting non empty rows'):
-                if len(sample_data_copy.loc[row,'AN_PHRASES'])!=0:
-                    an_sample_data = pd.concat([an_sample_data, pd.DataFrame([sample_data_copy.loc[row,:]])], ignore_index=True)
-
-            # reset the index
-            an_sample_data.reset_index(inplace=True)
-            an_sample_data.drop('index', axis=1, inplace=True)   
-            print(an_sample_data.shape)
-        except Exception as ex:
-            print(ex)
-            pass
-        
-        noun_dict = dict()
-        dis_dict = dict()
-        dis_list = []
-        try:
-            # iterating over all the sentences
-            for i in range(len(an_sample_data)):
-                
-                # sentence containing the output
-                sentence = an_sample_data.loc[i,'PREPROCESSED_TEXT']
-                # catgeory info
-                category = an_sample_data.loc[i,'CATEGORIES']
-                # output of the sentence
-                output = an_sample_data.loc[i,'AN_PHRASES']
-                
-                # iterating over all the outputs from the sentence
-                for sent in output:
-                    # separate adjective and noun
-                    adj, n = ''.join([item.strip() for item in sent['phrase'].split(sent['noun'])]), sent['noun']
-                    
-                    # append to list, along with the sentence
-                    dis_dict = {
-                        'PREPROCESSED_TEXT':sentence,
-                        'CATEGORY':category,
-                        'ADJ':adj,
-                        'NOUN':n}
-                    dis_list.append(dis_dict)
-                    
-                    # counting the number of sentences containing the noun
-                    noun = sent['noun']
-                    if noun in noun_dict:
-                        noun_dict[noun]+=1
-                    else:
-                        noun_dict[noun]=1
-
-            df_an_sep = pd.DataFrame(dis_list)
-        except Exception as ex:
-            print(ex)
-        finally:
-            self._an_seg_patterns = df_an_sep.copy()
+        self._an_seg_patterns = segregate_phrases(self._overall_extract, 'an')
             
     def extract_seg_npn(self):
         """
@@ -419,63 +1195,7 @@ class PatternFinder:
             print('NPN Phrases are missing. Please re-run pattern finder with NPN phrases under pattern collectibles')
             return
         
-        # selecting non-empty output rows
-        sample_data_copy = self._overall_extract[['ARTICLES','CATEGORIES','PREPROCESSED_TEXT','NPN_PHRASES']].copy().reset_index(drop=True)
-        npn_sample_data = pd.DataFrame(columns=sample_data_copy.columns)
-
-        try:
-            for row in tqdm(range(len(sample_data_copy)), desc='Selecting non empty rows'):
-                if len(sample_data_copy.loc[row,'NPN_PHRASES'])!=0:
-                    npn_sample_data = pd.concat([npn_sample_data, pd.DataFrame([sample_data_copy.loc[row,:]])], ignore_index=True)
-
-            # reset the index
-            npn_sample_data.reset_index(inplace=True)
-            npn_sample_data.drop('index', axis=1, inplace=True)   
-            print(npn_sample_data.shape)
-        except Exception as ex:
-            print(ex)
-            pass
-        
-        preposition_dict = dict()
-        dis_dict = dict()
-        dis_list = []
-        try:
-            # iterating over all the sentences
-            for i in range(len(npn_sample_data)):
-                
-                # sentence containing the output
-                sentence = npn_sample_data.loc[i,'PREPROCESSED_TEXT']
-                # catgeory info
-                category = npn_sample_data.loc[i,'CATEGORIES']
-                # output of the sentence
-                output = npn_sample_data.loc[i,'NPN_PHRASES']
-                
-                # iterating over all the outputs from the sentence
-                for sent in output:
-                    # separate subject, verb and object
-                    n1, prep, n2 = sent['phrase'].split()[:1], sent['phrase'].split()[1], sent['phrase'].split()[2:]
-                    
-                    # append to list, along with the sentence
-                    dis_dict = {
-                        'PREPROCESSED_TEXT':sentence,
-                        'CATEGORY':category,
-                        'NOUN1':n1,
-                        'PREPOSITION':prep,
-                        'NOUN2':n2}
-                    dis_list.append(dis_dict)
-                    
-                    # counting the number of sentences containing the verb
-                    preposition = sent['phrase'].split()[1]
-                    if prep in preposition_dict:
-                        preposition_dict[prep]+=1
-                    else:
-                        preposition_dict[prep]=1
-
-            df_npn_sep = pd.DataFrame(dis_list)
-        except Exception as ex:
-            print(ex)
-        finally:
-            self._npn_seg_patterns = df_npn_sep.copy()  
+        self._npn_seg_patterns = segregate_phrases(self._overall_extract, 'npn')
                     
     def extract_seg_nvn_an(self):
         """
@@ -492,105 +1212,59 @@ class PatternFinder:
             print('NVN MOD Phrases are missing. Please re-run pattern finder with NVN MOD phrases under pattern collectibles')
             return
         
-        # selecting non-empty output rows
-        sample_data_copy = self._overall_extract[['ARTICLES','CATEGORIES','PREPROCESSED_TEXT','NVN_MOD_PHRASES']].copy().reset_index(drop=True)
-        nvn_mod_sample_data = pd.DataFrame(columns=sample_data_copy.columns)
-
-        try:
-            for row in tqdm(range(len(sample_data_copy)), desc='Selecting non empty rows'):
-                if len(sample_data_copy.loc[row,'NVN_MOD_PHRASES'])!=0:
-                    nvn_mod_sample_data = pd.concat([nvn_mod_sample_data, pd.DataFrame([sample_data_copy.loc[row,:]])], ignore_index=True)
-
-            # reset the index
-            nvn_mod_sample_data.reset_index(inplace=True)
-            nvn_mod_sample_data.drop('index', axis=1, inplace=True)   
-            print(nvn_mod_sample_data.shape)
-        except Exception as ex:
-            print(ex)
-            pass
-        
-        verb_dict = dict()
-        dis_dict = dict()
-        dis_list = []
-        try:
-            # iterating over all the sentences
-            for i in range(len(nvn_mod_sample_data)):
-                
-                # sentence containing the output
-                sentence = nvn_mod_sample_data.loc[i,'PREPROCESSED_TEXT']
-                # catgeory info
-                category = nvn_mod_sample_data.loc[i,'CATEGORIES']
-                # output of the sentence
-                output = nvn_mod_sample_data.loc[i,'NVN_MOD_PHRASES']
-                
-                # iterating over all the outputs from the sentence
-                for sent in output:
-                    # separate subject, verb and object
-                    n1, v, n2 = sent['phrase'].split(sent['verb'])[0], sent['verb'], sent['phrase'].split(sent['verb'])[1]
-                    
-                    # append to list, along with the sentence
-                    dis_dict = {
-                        'PREPROCESSED_TEXT':sentence,
-                        'CATEGORY':category,
-                        'NOUN1':n1,
-                        'VERB':v,
-                        'NOUN2':n2}
-                    dis_list.append(dis_dict)
-                    
-                    # counting the number of sentences containing the verb
-                    verb = sent['verb']
-                    if verb in verb_dict:
-                        verb_dict[verb]+=1
-                    else:
-                        verb_dict[verb]=1
-
-            df_nvn_mod_sep = pd.DataFrame(dis_list)
-        except Exception as ex:
-            print(ex)
-        finally:
-            self._nvn_mod_seg_patterns = df_nvn_mod_sep.copy()
+        self._nvn_mod_seg_patterns = segregate_phrases(self._overall_extract, 'nvn_mod')
             
 if __name__ == "__main__":
-    # Test file path
-    test_data_path = os.path.join('input','news_articles_dataset.csv')
+    # Dataset ingested by preprocessing/preprocess.py, which imports its config as a top level module
+    sys.path.append(os.path.join(file_dir, 'preprocessing'))
+    import config
+    from preprocess import load_dataset
+    
+    # Test file path, the packed corpus of utility/packed_corpus.py being read instead when present
+    test_data_path = config.TRAINING_DATASET
+    packed_corpus_dir = os.path.join('input','news_articles_packed')
     
     # File reading configurations
     sample_frac = 0.1
     spacy_model_name = 'en_core_web_lg'
+    preprocessing_mode = 'parallel'
     
-    # Reading input file
-    input_data = pd.read_csv(test_data_path)
-    input_data.columns = [col_name.upper() for col_name in input_data.columns]
-    print(input_data.shape)
-    
-    # Performing stratified sampling for the input data
-    sample_data = input_data.groupby('CATEGORIES', group_keys=False).apply(lambda x: x.sample(frac=0.1, random_state=42))
-    print(sample_data.shape)
-    
-    # Preprocessing data before finding patterns
-    def preprocess_text(text):
-        result = remove_urls(text)
-        result = remove_mentions_hashtags(result)
-        result = remove_contractions(result)
-        result = remove_stopwords_punc_nos(result, 
-                                        remove_stopwords_flag=False, 
-                                        punc_2_remove=string.punctuation.replace('-','').replace('%','').replace('.',''), 
-                                        remove_digits_flag=False,
-                                        remove_pattern_punc_flag=True)
-        result = remove_extra_spaces(result)
-        return result
-    
-    tqdm.pandas(desc='Preprocessing Raw Texts')
-    sample_data['PREPROCESSED_TEXT'] = sample_data.ARTICLES.progress_apply(lambda x: preprocess_text(x))
-    
-    # Implementing Pattern finder class
-    pattern_finder_instance = PatternFinder(
-                                data=sample_data, 
-                                textual_col='PREPROCESSED_TEXT',
-                                # pattern_collection=['nvn']
-                                pattern_collection=['nvn','an','npn','nvn_mod']
-                            )
-    pattern_finder_instance.process_patterns() 
+    if is_packed_corpus(packed_corpus_dir):
+        # Performing stratified sampling over the positions of the packed articles
+        corpus = PackedCorpus(packed_corpus_dir)
+        print((len(corpus), corpus.get_n_bytes))
+        positions = pd.Series(corpus.get_categories())
+        sample_positions = positions.groupby(positions, group_keys=False).apply(lambda x: x.sample(frac=sample_frac, random_state=42)).index
+        
+        # Implementing Pattern finder class over the preprocessed sample
+        pattern_finder_instance = PatternFinder.from_packed_corpus(
+                                    corpus,
+                                    textual_col='PREPROCESSED_TEXT',
+                                    indices=sample_positions,
+                                    preprocessing_mode=preprocessing_mode,
+                                    pattern_collection=['nvn','an','npn','nvn_mod']
+                                )
+    else:
+        # Reading input dataset, sorted by category and filename so that the sample below is reproducible
+        input_data = load_dataset(test_data_path, file_format=config.DATASET_FORMAT)
+        input_data.columns = [col_name.upper() for col_name in input_data.columns]
+        print(input_data.shape)
+        
+        # Performing stratified sampling for the input data
+        sample_data = input_data.groupby('CATEGORIES', group_keys=False).apply(lambda x: x.sample(frac=sample_frac, random_state=42))
+        print(sample_data.shape)
+        
+        # Implementing Pattern finder class
+        pattern_finder_instance = PatternFinder(
+                                    data=sample_data, 
+                                    textual_col='PREPROCESSED_TEXT',
+                                    # pattern_collection=['nvn']
+                                    pattern_collection=['nvn','an','npn','nvn_mod']
+                                )
+        
+        # Preprocessing data before finding patterns
+        pattern_finder_instance.preprocess('ARTICLES', preprocessing_mode=preprocessing_mode)
+    pattern_finder_instance.process_patterns(execution_mode='pipe', batch_size=64)
     
     # Implement Segregating of NVN Phrases
     pattern_finder_instance.extract_seg_nvn()
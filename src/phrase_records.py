@@ -0,0 +1,135 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the typed phrase records emitted by the rules. Besides the phrase itself, every record
+carries the text of each slot along with the token index (<slot>_i) and the character offset (<slot>_idx)
+of the head token of the slot within the parsed document, so the phrases can be segregated into their
+slots without parsing the phrase text again. Missing slots hold '' as text and -1 as index and offset.
+"""
+from typing import NamedTuple
+
+class NVNRecord(NamedTuple):
+    """
+    NOUN (subject) <-> VERB <-> NOUN (object) phrase, also used by the compound / adjective NVN rule
+    where the subject and object slots include their adjectives e.g. 'annual rate'
+    """
+    phrase: str
+    verb: str
+    subject: str
+    object: str
+    subject_i: int
+    verb_i: int
+    object_i: int
+    subject_idx: int
+    verb_idx: int
+    object_idx: int
+
+class ANRecord(NamedTuple):
+    """
+    ADJECTIVE / COMPOUND <-> NOUN phrase, the adjective slot holds all the modifiers of the noun and
+    its token index / offset are the ones of the first modifier
+    """
+    phrase: str
+    noun: str
+    adjective: str
+    noun_i: int
+    adjective_i: int
+    noun_idx: int
+    adjective_idx: int
+
+class NPNRecord(NamedTuple):
+    """
+    NOUN <-> PREPOSITION <-> NOUN phrase, the second noun slot holds all the noun children on the right of
+    the preposition and its token index / offset are the ones of the first of them
+    """
+    phrase: str
+    preposition: str
+    noun1: str
+    noun2: str
+    noun1_i: int
+    preposition_i: int
+    noun2_i: int
+    noun1_idx: int
+    preposition_idx: int
+    noun2_idx: int
+
+# Record type emitted per built-in pattern
+PHRASE_RECORD_TYPES = {
+    'nvn': NVNRecord,
+    'an': ANRecord,
+    'npn': NPNRecord,
+    'nvn_mod': NVNRecord,
+}
+
+def restore_records(pattern_name: str, records: list) -> list:
+    """
+    This function rebuilds the typed records of a pattern which went through a serialization format
+    flattening tuples into lists or dictionaries (e.g. msgpack or json).
+
+    args:
+        pattern_name (str): name of the pattern which emitted the records
+        records (list): records, as typed records, lists or dictionaries
+
+    returns:
+        list: typed records, the records are returned as they are for patterns without a record type
+    """
+    record_type = PHRASE_RECORD_TYPES.get(pattern_name)
+    if record_type is None:
+        return records
+    return [
+        record if isinstance(record, record_type)
+        else record_type(**record) if isinstance(record, dict)
+        else record_type._make(record)
+        for record in records
+    ]
+
+def shift_records(pattern_name: str, records: list, token_offset: int, char_offset: int) -> list:
+    """
+    This function moves the records extracted from a span of a document (e.g. one of its sentences parsed on
+    its own) to the token indices and character offsets of the whole document, missing slots staying at -1.
+
+    args:
+        pattern_name (str): name of the pattern which emitted the records
+        records (list): typed records, with indices and offsets relative to the span
+        token_offset (int): index of the first token of the span within the document
+        char_offset (int): offset of the first character of the span within the document
+
+    returns:
+        list: shifted records, the records are returned as they are for patterns without a record type
+    """
+    record_type = PHRASE_RECORD_TYPES.get(pattern_name)
+    if record_type is None or (token_offset == 0 and char_offset == 0):
+        return records
+    return [
+        record._replace(**{
+            field_name: getattr(record, field_name) + (char_offset if field_name.endswith('_idx') else token_offset)
+            for field_name in record_type._fields
+            if field_name.endswith(('_i', '_idx')) and getattr(record, field_name) != -1
+        })
+        for record in records
+    ]
+
+def unlocate_records(pattern_name: str, records: list) -> list:
+    """
+    This function resets the token indices and character offsets of records to -1, for records copied to a
+    document other than the one they were extracted from (e.g. a near duplicate) where they point to no span.
+
+    args:
+        pattern_name (str): name of the pattern which emitted the records
+        records (list): typed records
+
+    returns:
+        list: records without location, the records are returned as they are for patterns without a record type
+    """
+    record_type = PHRASE_RECORD_TYPES.get(pattern_name)
+    if record_type is None:
+        return list(records)
+    location_fields = {field_name: -1 for field_name in record_type._fields if field_name.endswith(('_i', '_idx'))}
+    return [record._replace(**location_fields) for record in records]
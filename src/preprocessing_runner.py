@@ -0,0 +1,189 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script runs the preprocessing stage over a whole column of raw texts, so that it keeps up with the
+parallel parser behind it. The texts are preprocessed
+- 'apply': text by text on one core, as the progress_apply it replaces
+- 'vectorized': through pandas .str operations over the whole column, see TextPreprocessor.preprocess_series
+- 'parallel': chunk by chunk in a pool of worker processes, each of which builds its TextPreprocessor once
+All the modes give the same texts, for the flags of remove_stopwords_punc_nos. A packed corpus (see
+utility/packed_corpus.py) is preprocessed by preprocess_corpus without holding its raw texts in a column: in 'parallel'
+mode the workers are sent positions only and read the articles from their own memory map of the corpus.
+
+e.g. python src/preprocessing_runner.py --input-path input/news_articles_dataset --output-path output/preprocessed.parquet --preprocessing-mode parallel
+     python src/preprocessing_runner.py --input-path input/news_articles_packed --output-path output/preprocessed.parquet
+"""
+import os
+import sys
+import string
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+file_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(file_dir)
+
+from supporting_scripts_notebooks.sn_textual_preprocessing import TextPreprocessor
+from utility.packed_corpus import PackedCorpus, is_packed_corpus
+
+PREPROCESSING_MODES = ['apply', 'vectorized', 'parallel']
+# flags of remove_stopwords_punc_nos used ahead of the pattern finder
+PREPROCESSING_FLAGS = {
+    'remove_stopwords_flag': False,
+    'punc_2_remove': string.punctuation.replace('-','').replace('%','').replace('.',''),
+    'remove_digits_flag': False,
+    'remove_pattern_punc_flag': True,
+}
+
+_worker_preprocessor = None
+_worker_corpus = None
+
+def _init_preprocessing_worker(preprocessing_flags: dict, corpus_dir: str = None) -> None:
+    """
+    This function is the initializer of every worker process of the 'parallel' mode, compiling the
+    preprocessor once per process and mapping the packed corpus, if any.
+    """
+    global _worker_preprocessor, _worker_corpus
+    _worker_preprocessor = TextPreprocessor(**preprocessing_flags)
+    _worker_corpus = PackedCorpus(corpus_dir) if corpus_dir is not None else None
+
+def _preprocess_chunk(texts: list) -> list:
+    return [_worker_preprocessor(text) for text in texts]
+
+def _preprocess_corpus_chunk(indices: np.ndarray) -> list:
+    return [_worker_preprocessor(text) for text in _worker_corpus.take_texts(indices)]
+
+def _get_preprocessing_flags(preprocessing_mode: str, preprocessing_flags: dict) -> dict:
+    if preprocessing_mode not in PREPROCESSING_MODES:
+        raise ValueError(f"Unknown preprocessing mode '{preprocessing_mode}', expected one of {PREPROCESSING_MODES}")
+    unknown_flags = [flag_name for flag_name in preprocessing_flags if flag_name not in PREPROCESSING_FLAGS]
+    if len(unknown_flags) != 0:
+        raise ValueError(f"Unknown preprocessing flags {unknown_flags}, expected any of {list(PREPROCESSING_FLAGS)}")
+    return {**PREPROCESSING_FLAGS, **preprocessing_flags}
+
+def preprocess_texts(texts: pd.Series, preprocessing_mode: str = 'parallel', n_process: int = None, chunk_size: int = 256,
+                     **preprocessing_flags) -> pd.Series:
+    """
+    This function preprocesses a column of raw texts with the selected mode.
+
+    args:
+        texts (pd.Series, str): raw texts
+        preprocessing_mode (str, optional): 'apply', 'vectorized' or 'parallel'. Defaults to 'parallel'.
+        n_process (int, optional): number of worker processes of the 'parallel' mode, defaults to the cpu count. Defaults to None.
+        chunk_size (int, optional): number of texts sent to a worker at a time in 'parallel' mode. Defaults to 256.
+        preprocessing_flags: remove_stopwords_flag, punc_2_remove, remove_digits_flag and remove_pattern_punc_flag as in
+        remove_stopwords_punc_nos, defaulting to PREPROCESSING_FLAGS
+
+    returns:
+        pd.Series: preprocessed texts, with the index of the raw texts
+    """
+    preprocessing_flags = _get_preprocessing_flags(preprocessing_mode, preprocessing_flags)
+
+    if preprocessing_mode == 'vectorized':
+        return TextPreprocessor(**preprocessing_flags).preprocess_series(texts)
+
+    if preprocessing_mode == 'apply':
+        text_preprocessor = TextPreprocessor(**preprocessing_flags)
+        results = [text_preprocessor(text) for text in tqdm(texts.tolist(), desc='Preprocessing Raw Texts', unit='doc')]
+        return pd.Series(results, index=texts.index, dtype=object)
+
+    text_list = texts.tolist()
+    chunks = [text_list[idx:idx+chunk_size] for idx in range(0, len(text_list), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=n_process or os.cpu_count(),
+                             initializer=_init_preprocessing_worker,
+                             initargs=(preprocessing_flags,)) as executor:
+        with tqdm(total=len(text_list), desc='Preprocessing Raw Texts', unit='doc') as progress_bar:
+            for chunk_results in executor.map(_preprocess_chunk, chunks):
+                results.extend(chunk_results)
+                progress_bar.update(len(chunk_results))
+    return pd.Series(results, index=texts.index, dtype=object)
+
+def preprocess_corpus(corpus: PackedCorpus, indices=None, textual_col: str = 'PREPROCESSED_TEXT', preprocessing_mode: str = 'parallel',
+                      n_process: int = None, chunk_size: int = 256, **preprocessing_flags) -> pd.DataFrame:
+    """
+    This function preprocesses the articles of a packed corpus into the dataframe the pattern finder works on.
+    In 'parallel' mode the workers map the corpus themselves and are sent chunks of positions, so the raw texts
+    are neither pickled nor held in the parent process, and all the workers read the same pages.
+
+    args:
+        corpus (PackedCorpus): packed corpus of the raw texts
+        indices (list, int, optional): positions of the articles to preprocess, see PackedCorpus.get_indices. Defaults to all of them.
+        textual_col (str, optional): column of the preprocessed texts. Defaults to 'PREPROCESSED_TEXT'.
+        preprocessing_mode (str, optional): 'apply', 'vectorized' or 'parallel'. Defaults to 'parallel'.
+        n_process (int, optional): number of worker processes of the 'parallel' mode, defaults to the cpu count. Defaults to None.
+        chunk_size (int, optional): number of texts preprocessed by a worker at a time in 'parallel' mode. Defaults to 256.
+        preprocessing_flags: flags of remove_stopwords_punc_nos, defaulting to PREPROCESSING_FLAGS
+
+    returns:
+        pd.DataFrame: DOC_ID, CATEGORIES and textual column per article, in the order of the positions
+    """
+    preprocessing_flags = _get_preprocessing_flags(preprocessing_mode, preprocessing_flags)
+    indices = np.arange(len(corpus)) if indices is None else np.asarray(indices, dtype=np.int64)
+    data = pd.DataFrame({'DOC_ID': corpus.get_doc_ids(indices), 'CATEGORIES': corpus.get_categories(indices)})
+
+    if preprocessing_mode != 'parallel':
+        data[textual_col] = preprocess_texts(pd.Series(corpus.take_texts(indices), dtype=object), preprocessing_mode=preprocessing_mode,
+                                             **preprocessing_flags).tolist()
+        return data
+
+    chunks = [indices[idx:idx+chunk_size] for idx in range(0, len(indices), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=n_process or os.cpu_count(),
+                             initializer=_init_preprocessing_worker,
+                             initargs=(preprocessing_flags, corpus.get_corpus_dir)) as executor:
+        with tqdm(total=len(indices), desc='Preprocessing Raw Texts', unit='doc') as progress_bar:
+            for chunk_results in executor.map(_preprocess_corpus_chunk, chunks):
+                results.extend(chunk_results)
+                progress_bar.update(len(chunk_results))
+    data[textual_col] = results
+    return data
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Preprocess a column of raw texts ahead of the pattern finder')
+    parser.add_argument('--input-path', default=os.path.join('input','news_articles_dataset'), help='csv file, parquet file, parquet dataset folder or packed corpus folder of the raw texts')
+    parser.add_argument('--output-path', default=os.path.join('output','preprocessed_articles.parquet'), help='csv or parquet file of the preprocessed texts')
+    parser.add_argument('--raw-col', default='ARTICLES', help='column of the raw texts')
+    parser.add_argument('--textual-col', default='PREPROCESSED_TEXT', help='column of the preprocessed texts')
+    parser.add_argument('--preprocessing-mode', default='parallel', choices=PREPROCESSING_MODES, help='preprocessing mode')
+    parser.add_argument('--n-process', type=int, default=None, help='number of worker processes of the parallel mode')
+    parser.add_argument('--chunk-size', type=int, default=256, help='number of texts sent to a worker at a time')
+    parser.add_argument('--remove-stopwords', action='store_true', help='remove the stopwords')
+    parser.add_argument('--punc-2-remove', default=PREPROCESSING_FLAGS['punc_2_remove'], help='punctuations to remove')
+    parser.add_argument('--remove-digits', action='store_true', help='remove the digits')
+    parser.add_argument('--keep-pattern-punc', action='store_true', help='keep [.,;:] not surrounded by digits')
+    args = parser.parse_args()
+
+    preprocessing_flags = {'remove_stopwords_flag': args.remove_stopwords,
+                           'punc_2_remove': args.punc_2_remove,
+                           'remove_digits_flag': args.remove_digits,
+                           'remove_pattern_punc_flag': not args.keep_pattern_punc}
+    if is_packed_corpus(args.input_path):
+        input_data = preprocess_corpus(PackedCorpus(args.input_path),
+                                       textual_col=args.textual_col,
+                                       preprocessing_mode=args.preprocessing_mode,
+                                       n_process=args.n_process,
+                                       chunk_size=args.chunk_size,
+                                       **preprocessing_flags)
+    else:
+        input_data = pd.read_parquet(args.input_path) if args.input_path.endswith('.parquet') or os.path.isdir(args.input_path) else pd.read_csv(args.input_path)
+        input_data.columns = [col_name.upper() for col_name in input_data.columns]
+        input_data[args.textual_col] = preprocess_texts(input_data[args.raw_col.upper()],
+                                                        preprocessing_mode=args.preprocessing_mode,
+                                                        n_process=args.n_process,
+                                                        chunk_size=args.chunk_size,
+                                                        **preprocessing_flags)
+    os.makedirs(os.path.dirname(args.output_path) or '.', exist_ok=True)
+    if args.output_path.endswith('.parquet'):
+        input_data.to_parquet(args.output_path, index=False)
+    else:
+        input_data.to_csv(args.output_path, index=False)
+    print(input_data.shape)
@@ -0,0 +1,294 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the declarative rule engine. Every pattern is expressed as spacy DependencyMatcher
+patterns, all of them are matched in a single pass over a parsed document and a builder function turns
+the matched tokens of a rule into phrase records. The built-in NVN, AN, NPN and NVN MOD rules produce the
+same typed records as the hand written rules of pattern_finder, extra rules can be registered without writing
+any new token loops.
+"""
+from collections import defaultdict
+from spacy.matcher import DependencyMatcher
+from spacy.tokens import Doc
+from src.phrase_records import NVNRecord, ANRecord, NPNRecord
+
+SUBJECT_DEPS = ['nsubj','nsubjpass']
+AN_NOUN_DEPS = ['dobj','pobj','nsubj','nsubjpass']
+
+# verb with a noun / pronoun subject on its left and a noun direct object on its right
+NVN_PATTERNS = [
+    [
+        {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"POS": "VERB"}},
+        {"LEFT_ID": "verb", "REL_OP": ">--", "RIGHT_ID": "subject",
+         "RIGHT_ATTRS": {"DEP": {"IN": SUBJECT_DEPS}, "POS": {"IN": ['NOUN','PROPN','PRON']}}},
+        {"LEFT_ID": "verb", "REL_OP": ">++", "RIGHT_ID": "object",
+         "RIGHT_ATTRS": {"DEP": "dobj", "POS": {"IN": ['NOUN','PROPN']}}},
+    ],
+]
+
+# subject / object noun with an adjective or a compound child
+AN_PATTERNS = [
+    [
+        {"RIGHT_ID": "noun", "RIGHT_ATTRS": {"POS": "NOUN", "DEP": {"IN": AN_NOUN_DEPS}}},
+        {"LEFT_ID": "noun", "REL_OP": ">", "RIGHT_ID": "modifier", "RIGHT_ATTRS": {"POS": "ADJ"}},
+    ],
+    [
+        {"RIGHT_ID": "noun", "RIGHT_ATTRS": {"POS": "NOUN", "DEP": {"IN": AN_NOUN_DEPS}}},
+        {"LEFT_ID": "noun", "REL_OP": ">", "RIGHT_ID": "modifier", "RIGHT_ATTRS": {"DEP": "compound"}},
+    ],
+]
+
+# preposition headed by a noun, optionally with noun / proper noun children on its right
+NPN_PATTERNS = [
+    [
+        {"RIGHT_ID": "preposition", "RIGHT_ATTRS": {"POS": "ADP"}},
+        {"LEFT_ID": "preposition", "REL_OP": "<", "RIGHT_ID": "head", "RIGHT_ATTRS": {"POS": "NOUN"}},
+    ],
+    [
+        {"RIGHT_ID": "preposition", "RIGHT_ATTRS": {"POS": "ADP"}},
+        {"LEFT_ID": "preposition", "REL_OP": "<", "RIGHT_ID": "head", "RIGHT_ATTRS": {"POS": "NOUN"}},
+        {"LEFT_ID": "preposition", "REL_OP": ">++", "RIGHT_ID": "object", "RIGHT_ATTRS": {"POS": {"IN": ['NOUN','PROPN']}}},
+    ],
+]
+
+# NVN along with the adjectives attached to the subject and to the object
+NVN_MOD_PATTERNS = NVN_PATTERNS + [
+    [
+        {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"POS": "VERB"}},
+        {"LEFT_ID": "verb", "REL_OP": ">--", "RIGHT_ID": "subject",
+         "RIGHT_ATTRS": {"DEP": {"IN": SUBJECT_DEPS}, "POS": {"IN": ['NOUN','PROPN','PRON']}}},
+        {"LEFT_ID": "subject", "REL_OP": ">", "RIGHT_ID": "modifier", "RIGHT_ATTRS": {"POS": "ADJ"}},
+    ],
+    [
+        {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"POS": "VERB"}},
+        {"LEFT_ID": "verb", "REL_OP": ">++", "RIGHT_ID": "object",
+         "RIGHT_ATTRS": {"DEP": "dobj", "POS": {"IN": ['NOUN','PROPN']}}},
+        {"LEFT_ID": "object", "REL_OP": ">", "RIGHT_ID": "modifier", "RIGHT_ATTRS": {"POS": "ADJ"}},
+    ],
+]
+
+def _group_verb_arguments(matches: list) -> dict:
+    # verb index -> (subject indices, object indices) found across all the matches of the verb
+    verb_arguments = defaultdict(lambda: (set(), set()))
+    for match in matches:
+        if 'subject' in match and 'object' in match:
+            verb_arguments[match['verb']][0].add(match['subject'])
+            verb_arguments[match['verb']][1].add(match['object'])
+    return verb_arguments
+
+def build_nvn(doc: Doc, matches: list) -> list:
+    """
+    This function builds the NVN records out of the matched verbs, subjects and objects.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document which was matched
+        matches (list, dict): node name -> token index, one dictionary per match
+
+    returns:
+        list: list of NVNRecord where each record is representation of one NVN phrase being detected
+    """
+    sent = []
+    for verb_i, (subject_ids, object_ids) in sorted(_group_verb_arguments(matches).items()):
+        verb = doc[verb_i]
+        phrase = ''
+        for subject_i in sorted(subject_ids):
+            subject = doc[subject_i]
+            phrase += subject.text
+            phrase += ' '+verb.lemma_
+            for object_i in sorted(object_ids):
+                obj = doc[object_i]
+                phrase += ' '+obj.text
+                sent.append(NVNRecord(phrase, verb.lemma_, subject.text, obj.text,
+                                      subject.i, verb.i, obj.i, subject.idx, verb.idx, obj.idx))
+    return sent
+
+def build_an(doc: Doc, matches: list) -> list:
+    """
+    This function builds the AN records out of the matched nouns and their adjective / compound modifiers.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document which was matched
+        matches (list, dict): node name -> token index, one dictionary per match
+
+    returns:
+        list: list of ANRecord where each record is representation of one AN phrase being detected
+    """
+    noun_modifiers = defaultdict(set)
+    for match in matches:
+        noun_modifiers[match['noun']].add(match['modifier'])
+
+    pat = []
+    for noun_i, modifier_ids in sorted(noun_modifiers.items()):
+        noun, modifiers = doc[noun_i], [doc[modifier_i] for modifier_i in sorted(modifier_ids)]
+        adjective = ' '.join(modifier.text for modifier in modifiers)
+        pat.append(ANRecord(adjective + ' ' + noun.text, noun.text, adjective,
+                            noun.i, modifiers[0].i, noun.idx, modifiers[0].idx))
+    return pat
+
+def build_npn(doc: Doc, matches: list) -> list:
+    """
+    This function builds the NPN records out of the matched prepositions, their head nouns and objects.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document which was matched
+        matches (list, dict): node name -> token index, one dictionary per match
+
+    returns:
+        list: list of NPNRecord where each record is representation of one NPN phrase being detected
+    """
+    preposition_objects = defaultdict(set)
+    for match in matches:
+        object_ids = preposition_objects[match['preposition']]
+        if 'object' in match:
+            object_ids.add(match['object'])
+
+    sent = []
+    for preposition_i, object_ids in sorted(preposition_objects.items()):
+        preposition, objects = doc[preposition_i], [doc[object_i] for object_i in sorted(object_ids)]
+        noun2 = ' '.join(obj.text for obj in objects)
+        phrase = preposition.head.text + ' ' + preposition.text + ''.join(' '+obj.text for obj in objects)
+        sent.append(NPNRecord(phrase, preposition.text, preposition.head.text, noun2,
+                              preposition.head.i, preposition.i, objects[0].i if objects else -1,
+                              preposition.head.idx, preposition.idx, objects[0].idx if objects else -1))
+    return sent
+
+def build_nvn_mod(doc: Doc, matches: list) -> list:
+    """
+    This function builds the compound / adjective NVN records out of the matched verbs, subjects, objects
+    and the adjectives attached to the subjects and objects.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document which was matched
+        matches (list, dict): node name -> token index, one dictionary per match
+
+    returns:
+        list: list of NVNRecord where each record is representation of one NVN phrase being detected
+    """
+    noun_adjectives = defaultdict(set)
+    for match in matches:
+        if 'modifier' in match:
+            noun_adjectives[match.get('subject', match.get('object'))].add(match['modifier'])
+
+    def adjectives(noun_i):
+        return ''.join(' '+doc[modifier_i].text for modifier_i in sorted(noun_adjectives[noun_i]))
+
+    sent = []
+    for verb_i, (subject_ids, object_ids) in sorted(_group_verb_arguments(matches).items()):
+        verb = doc[verb_i]
+        phrase = ''
+        for subject_i in sorted(subject_ids):
+            subject = adjectives(subject_i) + ' ' + doc[subject_i].text
+            phrase += subject
+            phrase += ' '+verb.lemma_
+            for object_i in sorted(object_ids):
+                obj = adjectives(object_i)+' '+doc[object_i].text
+                phrase += obj
+                sent.append(NVNRecord(phrase, verb.lemma_, subject.strip(), obj.strip(),
+                                      subject_i, verb_i, object_i, doc[subject_i].idx, verb.idx, doc[object_i].idx))
+    return sent
+
+def build_matched_tokens(doc: Doc, matches: list) -> list:
+    """
+    This function is the default builder of registered rules. Every match becomes one record holding the
+    matched tokens joined in document order along with the text of every matched node.
+
+    args:
+        doc (spacy.tokens.Doc): Parsed document which was matched
+        matches (list, dict): node name -> token index, one dictionary per match
+
+    returns:
+        list: list of dictionaries e.g. [{'phrase': 'rate of growth', 'head': 'rate', 'object': 'growth'}]
+    """
+    records = []
+    for match in matches:
+        record = {'phrase': ' '.join(doc[token_i].text for token_i in sorted(match.values()))}
+        record.update({node_name: doc[token_i].text for node_name, token_i in match.items()})
+        records.append(record)
+    return records
+
+# Built-in rules: pattern name -> (dependency matcher patterns, builder)
+BUILTIN_RULES = {
+    'nvn': (NVN_PATTERNS, build_nvn),
+    'an': (AN_PATTERNS, build_an),
+    'npn': (NPN_PATTERNS, build_npn),
+    'nvn_mod': (NVN_MOD_PATTERNS, build_nvn_mod),
+}
+
+class RuleEngine:
+    def __init__(self, vocab, custom_rules: dict = None) -> None:
+        """
+        This is the rule engine class which is responsible for compiling the rules into a single
+        DependencyMatcher and turning its matches into phrase records.
+
+        args:
+        - vocab (spacy.vocab.Vocab): vocab of the spacy model producing the documents
+        - custom_rules (dict): optional pattern name -> (dependency matcher patterns, builder or None) registered
+        on top of the built-in rules
+
+        return:
+        - None
+        """
+        self._vocab = vocab
+        self._matcher = DependencyMatcher(vocab)
+        # matcher key -> (pattern name, node names in the order of the matched token ids)
+        self._pattern_nodes = dict()
+        # pattern name -> builder
+        self._builders = dict()
+        for pattern_name, (patterns, builder) in {**BUILTIN_RULES, **(custom_rules or {})}.items():
+            self.add_rule(pattern_name, patterns, builder)
+
+    #region Properties
+    @property
+    def get_pattern_names(self):
+        return list(self._builders)
+    #endregion
+
+    def add_rule(self, pattern_name: str, patterns: list, builder=None) -> None:
+        """
+        This method registers a rule made of one or more DependencyMatcher patterns. Every pattern is added
+        under its own matcher key so that the matched token ids can be mapped back to the node names.
+
+        args:
+        - pattern_name (str): name of the rule e.g. 'nvn'
+        - patterns (list): list of DependencyMatcher patterns, each a list of node dictionaries
+        - builder (function): builder(doc, matches) -> list of records, defaults to build_matched_tokens
+
+        return:
+        - None
+        """
+        if pattern_name in self._builders:
+            raise ValueError(f"Rule '{pattern_name}' is already registered")
+        for pattern_idx, pattern in enumerate(patterns):
+            matcher_key = f'{pattern_name}::{pattern_idx}'
+            self._matcher.add(matcher_key, [pattern])
+            self._pattern_nodes[self._vocab.strings[matcher_key]] = (pattern_name, [node['RIGHT_ID'] for node in pattern])
+        self._builders[pattern_name] = builder or build_matched_tokens
+
+    def __call__(self, doc: Doc, pattern_collection: list) -> dict:
+        """
+        This method matches all the rules over the document in one pass and builds the records of the
+        selected patterns.
+
+        args:
+        - doc (spacy.tokens.Doc): Parsed document
+        - pattern_collection (list, str): patterns to extract
+
+        return:
+        - dict: pattern name -> list of records
+        """
+        rule_matches = {pattern_name: [] for pattern_name in self._builders if pattern_name in pattern_collection}
+        for match_id, token_ids in self._matcher(doc):
+            pattern_name, node_names = self._pattern_nodes[match_id]
+            if pattern_name in rule_matches:
+                rule_matches[pattern_name].append(dict(zip(node_names, token_ids)))
+        return {
+            pattern_name: self._builders[pattern_name](doc, matches)
+            for pattern_name, matches in rule_matches.items()
+        }
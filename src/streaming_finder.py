@@ -0,0 +1,236 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script runs the pattern finder out of core, straight from the raw article files to the phrase
+outputs. Every stage is a generator (walk files -> read -> preprocess -> parse -> extract -> write), so
+only one nlp.pipe batch of documents and one write batch of phrases are held in memory at any time
+whatever the size of the corpus, the frequency tables staying bounded in memory only with the 'sketch' counting
+mode ('exact' counts every distinct slot value). The articles are read from a packed corpus (see utility/packed_corpus.py)
+instead of the article files when the articles path is one.
+
+e.g. python src/streaming_finder.py --articles-path input/news_articles --output-dir output/phrases --output-format parquet
+"""
+import os
+import sys
+import argparse
+import datetime
+from tqdm import tqdm
+file_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(file_dir)
+
+import pyarrow as pa
+from src.pattern_finder import PATTERN_RULES, RULE_BACKENDS, SEGREGATION_SLOTS, extract_patterns, get_phrase_column, preprocess_text
+from src.phrase_records import PHRASE_RECORD_TYPES
+from src.rule_engine import RuleEngine
+from utility.utility import load_spacy_model
+from utility.phrase_export import PhraseExporter, EXPORT_FORMATS
+from utility.incremental_store import PhraseStore
+from utility.packed_corpus import PackedCorpus, is_packed_corpus
+from utility.sketch_tables import COUNTING_MODES, create_frequency_tables, get_sketch_shape
+
+OUTPUT_FORMATS = EXPORT_FORMATS + ['jsonl']
+
+def iter_article_entries(articles_path: str, category_list: list):
+    """
+    This function lazily walks the category folders and yields one entry per article file, the folders
+    are scanned through os.scandir so that their listings are never materialized.
+
+    args:
+        articles_path (str): base folder path for articles
+        category_list (list, str): category folders to walk
+
+    returns:
+        generator: {'doc_id', 'path', 'category'} per article file
+    """
+    for category in category_list:
+        category_path = os.path.join(articles_path, category)
+        if not os.path.isdir(category_path):
+            continue
+        with os.scandir(category_path) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.is_file() and dir_entry.name.endswith('.txt'):
+                    yield {'doc_id': f'{category}/{dir_entry.name}', 'path': dir_entry.path, 'category': category}
+
+def iter_preprocessed_articles(article_entries):
+    """
+    This function reads and preprocesses the articles one at a time.
+
+    args:
+        article_entries (iterable, dict): article entries from iter_article_entries
+
+    returns:
+        generator: (preprocessed text, article entry) per article, as expected by nlp.pipe(as_tuples=True)
+    """
+    for entry in article_entries:
+        with open(entry['path'], mode = 'r', encoding = "ISO-8859-1") as file:
+            article = file.read()
+        yield preprocess_text(article), entry
+
+def iter_packed_articles(corpus: PackedCorpus, category_list: list, batch_size: int = 1024):
+    """
+    This function preprocesses the articles of a packed corpus one at a time, the articles being decoded
+    from the memory mapped corpus batch by batch.
+
+    args:
+        corpus (PackedCorpus): packed corpus of the articles
+        category_list (list, str): categories to stream
+        batch_size (int, optional): number of articles decoded at a time. Defaults to 1024.
+
+    returns:
+        generator: (preprocessed text, article entry) per article, as expected by nlp.pipe(as_tuples=True)
+    """
+    for doc_id, category, article in corpus.iter_articles(category_list=category_list, batch_size=batch_size):
+        yield preprocess_text(article), {'doc_id': doc_id, 'category': category}
+
+def iter_extracts(spacy_loaded_model, preprocessed_articles, pattern_collection: list, rule_engine: RuleEngine = None,
+                  batch_size: int = 64, n_process: int = 1):
+    """
+    This function parses the preprocessed articles through nlp.pipe and runs the selected rules on every
+    document as soon as it is yielded, the parsed document is dropped right after.
+
+    args:
+        spacy_loaded_model (spacy model object): loaded spacy model
+        preprocessed_articles (iterable, tuple): (preprocessed text, article entry) per article
+        pattern_collection (list, str): patterns to extract
+        rule_engine (RuleEngine, optional): compiled rules of the 'matcher' backend. Defaults to None.
+        batch_size (int, optional): number of texts buffered by nlp.pipe per batch. Defaults to 64.
+        n_process (int, optional): number of processes used by nlp.pipe to parse. Defaults to 1.
+
+    returns:
+        generator: (article entry, extract dictionary) per article
+    """
+    for doc, entry in spacy_loaded_model.pipe(preprocessed_articles, as_tuples=True, batch_size=batch_size, n_process=n_process):
+        yield entry, extract_patterns(doc, pattern_collection, rule_engine=rule_engine)
+
+def iter_batches(items, batch_size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if len(batch) != 0:
+        yield batch
+
+def process_streaming(articles_path: str,
+                      output_dir: str,
+                      output_format: str = 'parquet',
+                      category_list: list = ['business', 'entertainment', 'politics', 'sport', 'tech'],
+                      pattern_collection: list = ['nvn','an','npn','nvn_mod'],
+                      spacy_model_name: str = 'en_core_web_lg',
+                      rule_backend: str = 'rules',
+                      batch_size: int = 64,
+                      write_batch_size: int = 1024,
+                      n_process: int = 1,
+                      counting_mode: str = 'exact',
+                      sketch_params: dict = None) -> dict:
+    """
+    This function is responsible for streaming the raw article files through preprocessing, parsing and
+    extraction into the phrase outputs, writing them every write batch size articles. The frequency tables of
+    the slots are updated batch by batch and saved as frequency_tables.pkl in the output folder.
+
+    args:
+    - articles_path (str): base folder path for articles, or folder of a packed corpus
+    - output_dir (str): folder of the phrase outputs
+    - output_format (str): 'parquet' or 'arrow' for the category partitioned datasets of utility.phrase_export,
+    'jsonl' for the phrase store of utility.incremental_store
+    - category_list (list, str): categories to be considered
+    - pattern_collection (list, str): patterns to process
+    - spacy_model_name (str): spacy model to be used for accessing the POS tags and dependencies
+    - rule_backend (str): 'rules' or 'matcher'
+    - batch_size (int): number of texts buffered by nlp.pipe per batch
+    - write_batch_size (int): number of articles whose phrases are written together
+    - n_process (int): number of processes used by nlp.pipe to parse
+    - counting_mode (str): 'exact' for FrequencyTables, whose counters grow with the number of distinct slot values,
+    or 'sketch' for the memory bounded SketchTables which keep the memory flat over large corpora
+    - sketch_params (dict): keyword arguments of SketchTables e.g. {'width': 2**18, 'capacity': 5000}
+
+    return:
+    - dict: pattern name -> number of phrases written
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}")
+    if rule_backend not in RULE_BACKENDS:
+        raise ValueError(f"Unknown rule backend '{rule_backend}', expected one of {RULE_BACKENDS}")
+    unknown_patterns = [pattern_name for pattern_name in pattern_collection if pattern_name not in PATTERN_RULES]
+    if len(unknown_patterns) != 0:
+        raise ValueError(f"Unknown patterns {unknown_patterns}, expected any of {list(PATTERN_RULES)}")
+
+    # the output folder holds the frequency tables even when no phrase is written
+    os.makedirs(output_dir, exist_ok=True)
+    spacy_loaded_model = load_spacy_model(spacy_model_name, profile='rules')
+    rule_engine = RuleEngine(spacy_loaded_model.vocab) if rule_backend == 'matcher' else None
+
+    if is_packed_corpus(articles_path):
+        preprocessed_articles = iter_packed_articles(PackedCorpus(articles_path), category_list)
+    else:
+        preprocessed_articles = iter_preprocessed_articles(iter_article_entries(articles_path, category_list))
+    extracts = iter_extracts(spacy_loaded_model, preprocessed_articles, pattern_collection,
+                             rule_engine=rule_engine, batch_size=batch_size, n_process=n_process)
+    extracts = tqdm(extracts, desc='Extracting {} phrases'.format(', '.join(pattern_collection).upper()), unit='doc')
+
+    n_phrases = {pattern_name: 0 for pattern_name in pattern_collection}
+    frequency_tables = create_frequency_tables({pattern_name: SEGREGATION_SLOTS[pattern_name] for pattern_name in pattern_collection},
+                                               counting_mode=counting_mode, sketch_params=sketch_params)
+    if output_format == 'jsonl':
+        run_id = datetime.datetime.now().isoformat()
+        phrase_store = PhraseStore(output_dir)
+        for batch in iter_batches(extracts, write_batch_size):
+            phrase_store.append([{'DOC_ID': entry['doc_id'], 'CATEGORIES': entry['category'], **extract} for entry, extract in batch], run_id)
+            for pattern_name in pattern_collection:
+                phrases = [extract[get_phrase_column(pattern_name)] for _, extract in batch]
+                frequency_tables.update_batch(pattern_name, [entry['category'] for entry, _ in batch], phrases)
+                n_phrases[pattern_name] += sum(len(records) for records in phrases)
+    else:
+        record_types = {pattern_name: PHRASE_RECORD_TYPES[pattern_name] for pattern_name in pattern_collection}
+        with PhraseExporter(output_dir, record_types, file_format=output_format, id_column='DOC_ID', id_type=pa.string()) as exporter:
+            for batch in iter_batches(extracts, write_batch_size):
+                doc_ids = [entry['doc_id'] for entry, _ in batch]
+                categories = [entry['category'] for entry, _ in batch]
+                for pattern_name in pattern_collection:
+                    phrases = [extract[get_phrase_column(pattern_name)] for _, extract in batch]
+                    exporter.write_batch(pattern_name, doc_ids, categories, phrases)
+                    frequency_tables.update_batch(pattern_name, categories, phrases)
+            n_phrases.update(exporter.get_n_rows)
+
+    frequency_tables.save(os.path.join(output_dir, 'frequency_tables.pkl'))
+    return n_phrases
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stream raw article files through the pattern finder into phrase outputs')
+    parser.add_argument('--articles-path', default=os.path.join('input','news_articles'), help='base folder path for articles or packed corpus folder')
+    parser.add_argument('--output-dir', default=os.path.join('output','phrases'), help='folder of the phrase outputs')
+    parser.add_argument('--output-format', default='parquet', choices=OUTPUT_FORMATS, help='format of the phrase outputs')
+    parser.add_argument('--categories', nargs='+', default=['business', 'entertainment', 'politics', 'sport', 'tech'], help='categories to be considered')
+    parser.add_argument('--patterns', nargs='+', default=['nvn','an','npn','nvn_mod'], choices=list(PATTERN_RULES), help='patterns to process')
+    parser.add_argument('--spacy-model', default='en_core_web_lg', help='spacy model name or path')
+    parser.add_argument('--rule-backend', default='rules', choices=RULE_BACKENDS, help='rule backend')
+    parser.add_argument('--batch-size', type=int, default=64, help='number of texts buffered by nlp.pipe per batch')
+    parser.add_argument('--write-batch-size', type=int, default=1024, help='number of articles whose phrases are written together')
+    parser.add_argument('--n-process', type=int, default=1, help='number of processes used by nlp.pipe to parse')
+    parser.add_argument('--counting-mode', default='exact', choices=COUNTING_MODES, help="exact or sketch based frequency tables, the memory staying flat only with 'sketch'")
+    parser.add_argument('--sketch-epsilon', type=float, default=1e-4, help='relative overcount of the count-min sketch, sketch mode only')
+    parser.add_argument('--sketch-delta', type=float, default=0.01, help='failure probability of the count-min sketch, sketch mode only')
+    parser.add_argument('--sketch-capacity', type=int, default=1000, help='counters per space saving summary, sketch mode only')
+    args = parser.parse_args()
+
+    n_phrases = process_streaming(args.articles_path, args.output_dir,
+                                  output_format=args.output_format,
+                                  category_list=args.categories,
+                                  pattern_collection=args.patterns,
+                                  spacy_model_name=args.spacy_model,
+                                  rule_backend=args.rule_backend,
+                                  batch_size=args.batch_size,
+                                  write_batch_size=args.write_batch_size,
+                                  n_process=args.n_process,
+                                  counting_mode=args.counting_mode,
+                                  sketch_params=dict(zip(['width', 'depth'], get_sketch_shape(args.sketch_epsilon, args.sketch_delta)),
+                                                     capacity=args.sketch_capacity))
+    print(n_phrases)
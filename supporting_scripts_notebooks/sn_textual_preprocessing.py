@@ -20,9 +20,11 @@ This script is intended to perform textual preprocessing on intended texts. It p
 import re
 import nltk
 import string
+import pandas as pd
 
 from nltk.stem import PorterStemmer
 from nltk.stem.wordnet import WordNetLemmatizer
+from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize, sent_tokenize
 
 contractions = {
@@ -148,6 +150,7 @@ contractions = {
 
 porter = PorterStemmer()
 wordnet_lemmatizer = WordNetLemmatizer()
+stop_words = None
 
 def convert_lower(text):
     result = text.lower()
@@ -175,6 +178,13 @@ def remove_contractions(text):
             text = text.replace(word, contractions[word.lower()])
     return text
 
+def remove_stopwords(text):
+    # removing the english stopwords of nltk, loaded on the first call
+    global stop_words
+    if stop_words is None:
+        stop_words = set(stopwords.words('english'))
+    return ' '.join(word for word in text.split() if word.lower() not in stop_words)
+
 def remove_stopwords_punc_nos(text, 
                               remove_stopwords_flag=False, 
                               punc_2_remove=string.punctuation, 
@@ -257,4 +267,83 @@ def spell_checker(text):
     final_text = []
     for word in words:
         final_text.append(check_word_spelling(word))
-    return ' '.join(final_text)
\ No newline at end of file
+    return ' '.join(final_text)
+
+class TextPreprocessor:
+    def __init__(self, remove_stopwords_flag=False, punc_2_remove=string.punctuation, remove_digits_flag=True, remove_pattern_punc_flag=False):
+        """
+        This is the compiled counterpart of the chain remove_urls -> remove_mentions_hashtags -> remove_contractions
+        -> remove_stopwords_punc_nos -> remove_extra_spaces, giving identical output. The regexes and translation
+        table are built once here instead of on every call:
+        - URLs, then mentions and hashtags together, are removed by precompiled regexes, skipped for the texts
+        holding no '://' or no '@' and '#'
+        - punctuations and digits are deleted by one translation table per sentence
+        - only runs of several spaces are rewritten when removing the extra spaces
+        Sentences are still split by sent_tokenize, on which the output depends, and contractions are still replaced
+        by remove_contractions, its replacements within the whole text being order dependent.
+
+        args:
+        - remove_stopwords_flag (bool): whether stopwords are removed, as in remove_stopwords_punc_nos
+        - punc_2_remove (str): punctuations to remove, as in remove_stopwords_punc_nos
+        - remove_digits_flag (bool): whether digits are removed, as in remove_stopwords_punc_nos
+        - remove_pattern_punc_flag (bool): whether [.,;:] not surrounded by digits are removed, as in remove_stopwords_punc_nos
+
+        return:
+        - None
+        """
+        self._remove_stopwords_flag = remove_stopwords_flag
+        self._url_regex = re.compile(r'https?://\S+')
+        # removing the mentions then the hashtags gives the same text as removing both at once
+        self._mention_hashtag_regex = re.compile('[@#][A-Za-z0-9_]+')
+        self._delete_table = str.maketrans('', '', punc_2_remove + (string.digits if remove_digits_flag else ''))
+        self._pattern_punc_regex = re.compile(r"(?<!\d)[.,;:](?!\d)") if remove_pattern_punc_flag else None
+        self._spaces_regex = re.compile('  +')
+
+    def remove_markup(self, text):
+        # URLs first, as a mention or hashtag may run into a URL e.g. '@namehttp://...'
+        result = self._url_regex.sub('', text) if '://' in text else text
+        if '@' in result or '#' in result:
+            result = self._mention_hashtag_regex.sub('', result)
+        return result
+
+    def remove_punc_nos(self, text):
+        sentence_list = sent_tokenize(text)
+        if self._remove_stopwords_flag:
+            sentence_list = [remove_stopwords(sentence) for sentence in sentence_list]
+        result_list = [sentence.translate(self._delete_table).strip() for sentence in sentence_list]
+        if self._pattern_punc_regex is not None:
+            result_list = [self._pattern_punc_regex.sub('', sentence) for sentence in result_list]
+        return '. '.join(result_list)
+
+    def __call__(self, text):
+        result = self.remove_markup(text)
+        result = remove_contractions(result)
+        result = self.remove_punc_nos(result)
+        return self._spaces_regex.sub(' ', result).strip()
+
+    def preprocess_series(self, texts):
+        """
+        This method preprocesses a series of texts as __call__ does text by text, through pandas .str operations
+        over the whole series. Contractions and sentence splitting are still mapped text by text, the sentences
+        of all the texts are then cleaned together and joined back per text.
+
+        args:
+        - texts (pd.Series, str): texts to preprocess
+
+        return:
+        - pd.Series: preprocessed texts, with the index of the input series
+        """
+        results = pd.Series(texts.tolist(), dtype=object)
+        results = results.str.replace(self._url_regex, '', regex=True)
+        results = results.str.replace(self._mention_hashtag_regex, '', regex=True)
+        results = results.map(remove_contractions)
+        # texts without any sentence keep one empty sentence, joined back into an empty text
+        sentences = results.map(lambda text: sent_tokenize(text) or ['']).explode()
+        if self._remove_stopwords_flag:
+            sentences = sentences.map(remove_stopwords)
+        sentences = sentences.str.translate(self._delete_table).str.strip()
+        if self._pattern_punc_regex is not None:
+            sentences = sentences.str.replace(self._pattern_punc_regex, '', regex=True)
+        results = sentences.groupby(level=0, sort=False).agg('. '.join)
+        results = results.str.replace(self._spaces_regex, ' ', regex=True).str.strip()
+        return pd.Series(results.tolist(), index=texts.index, dtype=object)
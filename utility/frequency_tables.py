@@ -0,0 +1,197 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the frequency tables of the extracted phrases. Slot values (e.g. verbs, nouns,
+prepositions) and whole slot tuples (e.g. (subject, verb, object) triples) are counted globally and per
+category as the batches of phrase records stream in. Tables of different batches, processes or workers
+are merged by adding their counters, so that top k queries never rescan the segregated phrases.
+"""
+import pickle
+from collections import Counter
+import pandas as pd
+
+class FrequencyTables:
+    def __init__(self, slot_columns: dict) -> None:
+        """
+        This is the frequency tables class which is responsible for counting the slots of the phrase records.
+
+        args:
+        - slot_columns (dict): pattern name -> {slot column: record field} e.g. {'nvn': {'NOUN1': 'subject', 'VERB': 'verb', 'NOUN2': 'object'}}
+
+        return:
+        - None
+        """
+        self._slot_columns = {pattern_name: dict(slots) for pattern_name, slots in slot_columns.items()}
+        # pattern name -> category -> slot column -> Counter of slot values
+        self._slot_counts = {pattern_name: dict() for pattern_name in self._slot_columns}
+        # pattern name -> category -> Counter of slot tuples
+        self._tuple_counts = {pattern_name: dict() for pattern_name in self._slot_columns}
+
+    #region Properties
+    @property
+    def get_slot_columns(self):
+        return self._slot_columns
+
+    @property
+    def get_categories(self):
+        return sorted({category for category_counts in self._tuple_counts.values() for category in category_counts})
+    #endregion
+
+    def update(self, pattern_name: str, category: str, records: list) -> None:
+        """
+        This method counts the slots of the phrase records of one document.
+
+        args:
+        - pattern_name (str): name of the pattern which emitted the records, patterns without slot columns are ignored
+        - category (str): category of the document
+        - records (list): phrase records of the document
+
+        return:
+        - None
+        """
+        slots = self._slot_columns.get(pattern_name)
+        if slots is None or len(records) == 0:
+            return
+        if category not in self._tuple_counts[pattern_name]:
+            self._slot_counts[pattern_name][category] = {slot_column: Counter() for slot_column in slots}
+            self._tuple_counts[pattern_name][category] = Counter()
+
+        slot_tuples = [tuple(getattr(record, field_name) for field_name in slots.values()) for record in records]
+        for slot_idx, slot_column in enumerate(slots):
+            self._slot_counts[pattern_name][category][slot_column].update(slot_tuple[slot_idx] for slot_tuple in slot_tuples)
+        self._tuple_counts[pattern_name][category].update(slot_tuples)
+
+    def update_batch(self, pattern_name: str, categories: list, phrases: list) -> None:
+        """
+        This method counts the slots of the phrase records of a batch of documents.
+
+        args:
+        - pattern_name (str): name of the pattern which emitted the records
+        - categories (list, str): category of each document of the batch
+        - phrases (list, list): phrase records of each document of the batch
+
+        return:
+        - None
+        """
+        for category, records in zip(categories, phrases):
+            self.update(pattern_name, category, records)
+
+    def merge(self, other: 'FrequencyTables') -> 'FrequencyTables':
+        """
+        This method adds the counts of other frequency tables (e.g. of another worker) to these ones.
+
+        args:
+        - other (FrequencyTables): tables to merge in
+
+        return:
+        - FrequencyTables: these tables, merged in place
+        """
+        for pattern_name, slots in other._slot_columns.items():
+            self._slot_columns.setdefault(pattern_name, slots)
+            self._slot_counts.setdefault(pattern_name, dict())
+            self._tuple_counts.setdefault(pattern_name, dict())
+            for category, tuple_counts in other._tuple_counts[pattern_name].items():
+                if category not in self._tuple_counts[pattern_name]:
+                    self._slot_counts[pattern_name][category] = {slot_column: Counter() for slot_column in slots}
+                    self._tuple_counts[pattern_name][category] = Counter()
+                for slot_column, slot_counts in other._slot_counts[pattern_name][category].items():
+                    self._slot_counts[pattern_name][category][slot_column].update(slot_counts)
+                self._tuple_counts[pattern_name][category].update(tuple_counts)
+        return self
+
+    def __iadd__(self, other: 'FrequencyTables') -> 'FrequencyTables':
+        return self.merge(other)
+
+    def get_slot_counts(self, pattern_name: str, slot_column: str, category: str = None) -> Counter:
+        """
+        This method returns the counts of the values of a slot, for one category or across all of them.
+        """
+        if category is not None:
+            return Counter(self._slot_counts[pattern_name].get(category, dict()).get(slot_column, Counter()))
+        slot_counts = Counter()
+        for category_counts in self._slot_counts[pattern_name].values():
+            slot_counts.update(category_counts[slot_column])
+        return slot_counts
+
+    def get_tuple_counts(self, pattern_name: str, category: str = None) -> Counter:
+        """
+        This method returns the counts of the slot tuples of a pattern, for one category or across all of them.
+        """
+        if category is not None:
+            return Counter(self._tuple_counts[pattern_name].get(category, Counter()))
+        tuple_counts = Counter()
+        for category_counts in self._tuple_counts[pattern_name].values():
+            tuple_counts.update(category_counts)
+        return tuple_counts
+
+    def most_common(self, pattern_name: str, slot_column: str, k: int = 10, category: str = None) -> list:
+        """
+        This method returns the k most frequent values of a slot e.g. the top verbs of the NVN phrases.
+
+        args:
+        - pattern_name (str): name of the pattern e.g. 'nvn'
+        - slot_column (str): slot column e.g. 'VERB'
+        - k (int): number of values to return
+        - category (str): category to restrict the counts to, None for the global counts
+
+        return:
+        - list: (value, count) tuples, most frequent first
+        """
+        return self.get_slot_counts(pattern_name, slot_column, category=category).most_common(k)
+
+    def most_common_tuples(self, pattern_name: str, k: int = 10, category: str = None) -> list:
+        """
+        This method returns the k most frequent slot tuples of a pattern e.g. the top (subject, verb, object) triples.
+
+        args:
+        - pattern_name (str): name of the pattern e.g. 'nvn'
+        - k (int): number of tuples to return
+        - category (str): category to restrict the counts to, None for the global counts
+
+        return:
+        - list: (slot tuple, count) tuples, most frequent first
+        """
+        return self.get_tuple_counts(pattern_name, category=category).most_common(k)
+
+    def to_frame(self, pattern_name: str, slot_column: str = None) -> pd.DataFrame:
+        """
+        This method returns the per category counts of a slot, or of the slot tuples when no slot column is given.
+
+        args:
+        - pattern_name (str): name of the pattern e.g. 'nvn'
+        - slot_column (str): slot column e.g. 'VERB', None for the slot tuples
+
+        return:
+        - pd.DataFrame: CATEGORY, the slot column(s) and COUNTER, sorted by decreasing counts
+        """
+        slot_columns = [slot_column] if slot_column is not None else list(self._slot_columns[pattern_name])
+        rows = []
+        for category in self._tuple_counts[pattern_name]:
+            if slot_column is not None:
+                category_counts = self._slot_counts[pattern_name][category][slot_column]
+                rows.extend((category, value, count) for value, count in category_counts.items())
+            else:
+                category_counts = self._tuple_counts[pattern_name][category]
+                rows.extend((category, *slot_tuple, count) for slot_tuple, count in category_counts.items())
+        frame = pd.DataFrame(rows, columns=['CATEGORY'] + slot_columns + ['COUNTER'])
+        return frame.sort_values(['COUNTER'] + slot_columns, ascending=[False] + [True]*len(slot_columns), ignore_index=True)
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, mode='wb') as file:
+            pickle.dump({'slot_columns': self._slot_columns, 'slot_counts': self._slot_counts, 'tuple_counts': self._tuple_counts}, file)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'FrequencyTables':
+        with open(file_path, mode='rb') as file:
+            state = pickle.load(file)
+        frequency_tables = cls(state['slot_columns'])
+        frequency_tables._slot_counts = state['slot_counts']
+        frequency_tables._tuple_counts = state['tuple_counts']
+        return frequency_tables
@@ -0,0 +1,219 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the building blocks of incremental extraction
+- DocumentManifest keeps track of the processed article files (path, mtime, size, content hash)
+and detects new, modified and deleted files between runs
+- PhraseStore is an append only JSON lines store of extracted phrases per document where the
+latest record of a document wins and deleted documents are tombstoned
+"""
+import os
+import json
+import hashlib
+import pandas as pd
+
+def to_json_value(value):
+    """
+    This function converts the typed phrase records (named tuples) nested in a value into dictionaries,
+    since json would otherwise write them as plain lists and drop their field names.
+    """
+    if hasattr(value, '_asdict'):
+        return {key: to_json_value(item) for key, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json_value(item) for key, item in value.items()}
+    return value
+
+def get_file_hash(file_path: str) -> str:
+    """
+    This function returns the sha1 hash of the content of a file.
+    """
+    with open(file_path, mode='rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+class DocumentManifest:
+    def __init__(self, manifest_path: str) -> None:
+        """
+        This is the manifest class which is responsible for remembering which article files were
+        processed, so that only new or modified files are extracted again.
+
+        args:
+        - manifest_path (str): path of the json manifest file
+
+        return:
+        - None
+        """
+        self._manifest_path = manifest_path
+        # document id -> {'path', 'category', 'mtime', 'size', 'hash'}
+        self._entries = dict()
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, mode='r', encoding='utf-8') as file:
+                self._entries = json.load(file)
+
+    #region Properties
+    @property
+    def get_entries(self):
+        return self._entries
+    #endregion
+
+    def __len__(self):
+        return len(self._entries)
+
+    def scan(self, articles_path: str, category_list: list) -> tuple:
+        """
+        This method walks the category folders and compares every article file with the manifest. Files
+        whose mtime and size did not change are skipped without being read, the others are hashed and
+        reported only if their content changed.
+
+        args:
+        - articles_path (str): base folder path for articles
+        - category_list (list, str): category folders to scan
+
+        return:
+        - list: entries of the new or modified files, each with doc_id, path, category, mtime, size and hash
+        - list: document ids of the files which are present in the manifest but not on disk anymore
+        """
+        changed_entries, seen_doc_ids = [], set()
+        for category in category_list:
+            category_path = os.path.join(articles_path, category)
+            if not os.path.isdir(category_path):
+                continue
+            for file_name in sorted(os.listdir(category_path)):
+                if not file_name.endswith('.txt'):
+                    continue
+                file_path = os.path.join(category_path, file_name)
+                doc_id = f'{category}/{file_name}'
+                seen_doc_ids.add(doc_id)
+
+                file_stat = os.stat(file_path)
+                entry = self._entries.get(doc_id)
+                if entry is not None and entry['mtime'] == file_stat.st_mtime and entry['size'] == file_stat.st_size:
+                    continue
+
+                file_hash = get_file_hash(file_path)
+                if entry is not None and entry['hash'] == file_hash:
+                    # touched without any change in content
+                    entry['mtime'], entry['size'] = file_stat.st_mtime, file_stat.st_size
+                    continue
+
+                changed_entries.append({
+                    'doc_id': doc_id,
+                    'path': file_path,
+                    'category': category,
+                    'mtime': file_stat.st_mtime,
+                    'size': file_stat.st_size,
+                    'hash': file_hash})
+
+        deleted_doc_ids = [
+            doc_id for doc_id, entry in self._entries.items()
+            if doc_id not in seen_doc_ids and entry['category'] in category_list
+        ]
+        return changed_entries, deleted_doc_ids
+
+    def update(self, entries: list) -> None:
+        for entry in entries:
+            self._entries[entry['doc_id']] = {key: value for key, value in entry.items() if key != 'doc_id'}
+
+    def remove(self, doc_ids: list) -> None:
+        for doc_id in doc_ids:
+            self._entries.pop(doc_id, None)
+
+    def save(self) -> None:
+        temp_manifest_path = self._manifest_path + '.tmp'
+        with open(temp_manifest_path, mode='w', encoding='utf-8') as file:
+            json.dump(self._entries, file)
+        os.replace(temp_manifest_path, self._manifest_path)
+
+class PhraseStore:
+    def __init__(self, store_dir: str) -> None:
+        """
+        This is the phrase store class which is responsible for persisting the extracted phrases of every
+        document across incremental runs. Records are only ever appended, a re-extracted document gets a
+        newer record and a deleted document gets a tombstone record.
+
+        args:
+        - store_dir (str): folder of the store
+
+        return:
+        - None
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        self._records_path = os.path.join(store_dir, 'phrases.jsonl')
+
+    def append(self, records: list, run_id: str) -> None:
+        """
+        This method appends the extracted records of a run to the store.
+
+        args:
+        - records (list, dict): one dictionary per document, each holding at least a DOC_ID key, phrase records
+        are stored as dictionaries
+        - run_id (str): identifier of the run which produced the records
+
+        return:
+        - None
+        """
+        with open(self._records_path, mode='a', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps({**to_json_value(record), 'RUN_ID': run_id, 'DELETED': False}) + '\n')
+
+    def tombstone(self, doc_ids: list, run_id: str) -> None:
+        """
+        This method marks the documents as deleted so that their phrases are dropped while loading.
+
+        args:
+        - doc_ids (list, str): ids of the deleted documents
+        - run_id (str): identifier of the run which detected the deletion
+
+        return:
+        - None
+        """
+        with open(self._records_path, mode='a', encoding='utf-8') as file:
+            for doc_id in doc_ids:
+                file.write(json.dumps({'DOC_ID': doc_id, 'RUN_ID': run_id, 'DELETED': True}) + '\n')
+
+    def _iter_latest_records(self):
+        latest_records = dict()
+        if os.path.exists(self._records_path):
+            with open(self._records_path, mode='r', encoding='utf-8') as file:
+                for line in file:
+                    record = json.loads(line)
+                    latest_records[record['DOC_ID']] = record
+        return (record for record in latest_records.values() if not record['DELETED'])
+
+    def load(self) -> pd.DataFrame:
+        """
+        This method loads the live phrases of the store, i.e. the latest record of every document
+        which has not been tombstoned.
+
+        args:
+        - None
+
+        return:
+        - pd.DataFrame: one row per live document
+        """
+        return pd.DataFrame(list(self._iter_latest_records())).drop(columns=['DELETED'], errors='ignore')
+
+    def compact(self) -> None:
+        """
+        This method rewrites the store keeping only the live records, dropping superseded records
+        and tombstones.
+
+        args:
+        - None
+
+        return:
+        - None
+        """
+        temp_records_path = self._records_path + '.tmp'
+        with open(temp_records_path, mode='w', encoding='utf-8') as file:
+            for record in self._iter_latest_records():
+                file.write(json.dumps(record) + '\n')
+        os.replace(temp_records_path, self._records_path)
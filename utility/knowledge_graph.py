@@ -0,0 +1,466 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the knowledge graph built from the NVN and NPN phrases, as a compact triple store.
+Entities (subjects, objects and nouns) and relations (verbs and prepositions) are interned to integer ids,
+entity ids following the sorted order of the entity names so that a name is looked up by binary search.
+Every distinct (source, relation, target) triple is one edge, weighted by its count in every category.
+
+Edges are stored as compressed sparse rows (CSR): the outgoing edges of entity i are the positions
+indptr[i]:indptr[i+1] of the edge arrays, sorted by target. A second index (in_indptr, in_edges) lists the
+incoming edges of every entity. All arrays are plain numpy arrays saved as .npy files, and the entity names
+as one utf-8 blob with their offsets, so that a saved graph is loaded by memory mapping without parsing.
+"""
+import os
+import json
+import bisect
+import numpy as np
+import pandas as pd
+from collections import Counter
+from xml.sax.saxutils import escape, quoteattr
+
+# pattern name -> position of the (source, relation, target) slots within the slot tuples of the frequency tables
+GRAPH_PATTERNS = {'nvn': (0, 1, 2), 'npn': (0, 1, 2), 'nvn_mod': (0, 1, 2)}
+GRAPH_DIRECTIONS = ['out', 'in', 'both']
+
+def get_entity_name(value: str, lowercase: bool = True) -> str:
+    value = ' '.join(value.split())
+    return value.lower() if lowercase else value
+
+class StringTable:
+    def __init__(self, blob, offsets) -> None:
+        """
+        This is the string table class which is responsible for holding the sorted entity names as one utf-8
+        blob and their offsets, the name of id i being blob[offsets[i]:offsets[i+1]].
+
+        args:
+        - blob (np.ndarray, uint8): utf-8 encoded names, concatenated
+        - offsets (np.ndarray, int64): start of every name within the blob, followed by the blob size
+
+        return:
+        - None
+        """
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return bytes(self._blob[self._offsets[idx]:self._offsets[idx+1]]).decode('utf-8')
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def index(self, value: str) -> int:
+        idx = bisect.bisect_left(self, value)
+        if idx == len(self) or self[idx] != value:
+            raise KeyError(value)
+        return idx
+
+    @classmethod
+    def from_strings(cls, values: list) -> 'StringTable':
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+class KnowledgeGraph:
+    def __init__(self, entities: StringTable, relations: list, categories: list, indptr: np.ndarray, sources: np.ndarray,
+                 targets: np.ndarray, edge_relations: np.ndarray, category_weights: np.ndarray, in_indptr: np.ndarray,
+                 in_edges: np.ndarray, lowercase: bool = True) -> None:
+        """
+        This is the knowledge graph class which is responsible for answering the neighbour, degree and path
+        queries over the CSR arrays and exporting them. Graphs are created by KnowledgeGraphBuilder.build or load.
+
+        args:
+        - entities (StringTable): sorted entity names, the position of a name being its id
+        - relations (list, str): relation names, the position of a name being its id
+        - categories (list, str): category names, the position of a name being its column of category_weights
+        - indptr (np.ndarray, int64): outgoing edges of entity i at indptr[i]:indptr[i+1]
+        - sources, targets (np.ndarray, int32): source and target entity id of every edge
+        - edge_relations (np.ndarray, int32): relation id of every edge
+        - category_weights (np.ndarray, int32): count of every edge (rows) in every category (columns)
+        - in_indptr (np.ndarray, int64): incoming edges of entity i at in_edges[in_indptr[i]:in_indptr[i+1]]
+        - in_edges (np.ndarray, int64): edge ids sorted by target
+        - lowercase (bool): whether the entity names were lowercased, queried names are normalized alike
+
+        return:
+        - None
+        """
+        self._entities = entities
+        self._relations = list(relations)
+        self._categories = list(categories)
+        self._indptr = indptr
+        self._sources = sources
+        self._targets = targets
+        self._edge_relations = edge_relations
+        self._category_weights = category_weights
+        self._in_indptr = in_indptr
+        self._in_edges = in_edges
+        self._lowercase = lowercase
+        self._weights = None
+
+    #region Properties
+    @property
+    def get_entities(self):
+        return self._entities
+
+    @property
+    def get_relations(self):
+        return self._relations
+
+    @property
+    def get_categories(self):
+        return self._categories
+
+    @property
+    def get_n_entities(self):
+        return len(self._entities)
+
+    @property
+    def get_n_edges(self):
+        return len(self._targets)
+
+    @property
+    def get_weights(self):
+        # total count of every edge across the categories, computed on first use
+        if self._weights is None:
+            self._weights = self._category_weights.sum(axis=1, dtype=np.int64)
+        return self._weights
+    #endregion
+
+    def get_entity_id(self, entity: str) -> int:
+        """
+        This method returns the id of an entity name, raising a KeyError for an unknown entity.
+        """
+        return self._entities.index(get_entity_name(entity, self._lowercase))
+
+    def _get_edge_weights(self, edge_ids: np.ndarray, category: str = None) -> np.ndarray:
+        if category is None:
+            return self.get_weights[edge_ids]
+        return self._category_weights[edge_ids, self._categories.index(category)].astype(np.int64)
+
+    def _get_edge_ids(self, entity_ids: np.ndarray, direction: str) -> np.ndarray:
+        # edge ids of the outgoing ('out') or incoming ('in') edges of several entities, gathered without a python loop
+        indptr = self._indptr if direction == 'out' else self._in_indptr
+        starts, ends = indptr[entity_ids], indptr[entity_ids + 1]
+        lengths = ends - starts
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        return positions if direction == 'out' else self._in_edges[positions]
+
+    def _get_direction_edge_ids(self, entity_ids: np.ndarray, direction: str) -> np.ndarray:
+        if direction not in GRAPH_DIRECTIONS:
+            raise ValueError(f"Unknown direction '{direction}', expected one of {GRAPH_DIRECTIONS}")
+        if direction == 'both':
+            return np.concatenate([self._get_edge_ids(entity_ids, 'out'), self._get_edge_ids(entity_ids, 'in')])
+        return self._get_edge_ids(entity_ids, direction)
+
+    def edges_frame(self, edge_ids: np.ndarray = None, category: str = None) -> pd.DataFrame:
+        """
+        This method returns edges as a dataframe, all of them by default.
+
+        args:
+        - edge_ids (np.ndarray): ids of the edges to return, None for all the edges
+        - category (str): category whose counts are reported as WEIGHT, None for the counts across the categories
+
+        return:
+        - pd.DataFrame: SOURCE, RELATION, TARGET, WEIGHT and one column of counts per category
+        """
+        edge_ids = np.arange(self.get_n_edges) if edge_ids is None else np.asarray(edge_ids, dtype=np.int64)
+        relations = np.array(self._relations, dtype=object)
+        frame = pd.DataFrame({
+            'SOURCE': [self._entities[entity_id] for entity_id in self._sources[edge_ids]],
+            'RELATION': relations[self._edge_relations[edge_ids]],
+            'TARGET': [self._entities[entity_id] for entity_id in self._targets[edge_ids]],
+            'WEIGHT': self._get_edge_weights(edge_ids, category)})
+        for category_idx, category_name in enumerate(self._categories):
+            frame[category_name.upper()] = self._category_weights[edge_ids, category_idx]
+        return frame
+
+    def neighbors(self, entity: str, direction: str = 'out', relation: str = None, category: str = None) -> pd.DataFrame:
+        """
+        This method returns the edges linking an entity to its neighbours e.g. what the subject 'government' does
+        to which objects, or which subjects act upon the object 'tax' with direction='in'.
+
+        args:
+        - entity (str): entity name
+        - direction (str): 'out' for the edges from the entity, 'in' for the edges to the entity, 'both' for both
+        - relation (str): relation to restrict the edges to e.g. 'cut', None for every relation
+        - category (str): category to restrict the edges to, None for every category
+
+        return:
+        - pd.DataFrame: edges as in edges_frame, by decreasing weight
+        """
+        edge_ids = self._get_direction_edge_ids(np.array([self.get_entity_id(entity)]), direction)
+        if relation is not None:
+            relation_id = self._relations.index(relation) if relation in self._relations else -1
+            edge_ids = edge_ids[self._edge_relations[edge_ids] == relation_id]
+        weights = self._get_edge_weights(edge_ids, category)
+        if category is not None:
+            edge_ids, weights = edge_ids[weights > 0], weights[weights > 0]
+        edge_ids = edge_ids[np.argsort(-weights, kind='stable')]
+        return self.edges_frame(edge_ids, category=category)
+
+    def degree(self, entity: str, direction: str = 'out', weighted: bool = False, category: str = None) -> int:
+        """
+        This method returns the number of distinct edges of an entity, or the sum of their counts when weighted.
+        """
+        edge_ids = self._get_direction_edge_ids(np.array([self.get_entity_id(entity)]), direction)
+        weights = self._get_edge_weights(edge_ids, category)
+        return int(weights.sum()) if weighted else int((weights > 0).sum())
+
+    def get_degrees(self, direction: str = 'out', weighted: bool = False) -> np.ndarray:
+        """
+        This method returns the degree of every entity, indexed by entity id, in one vectorized pass.
+        """
+        if direction not in GRAPH_DIRECTIONS:
+            raise ValueError(f"Unknown direction '{direction}', expected one of {GRAPH_DIRECTIONS}")
+        degrees = np.zeros(self.get_n_entities, dtype=np.int64)
+        weights = self.get_weights if weighted else None
+        if direction in ['out', 'both']:
+            degrees += np.bincount(self._sources, weights=weights, minlength=self.get_n_entities).astype(np.int64)
+        if direction in ['in', 'both']:
+            degrees += np.bincount(self._targets, weights=weights, minlength=self.get_n_entities).astype(np.int64)
+        return degrees
+
+    def top_entities(self, k: int = 10, direction: str = 'both', weighted: bool = True) -> pd.DataFrame:
+        """
+        This method returns the k entities of highest degree.
+
+        return:
+        - pd.DataFrame: ENTITY and DEGREE, by decreasing degree
+        """
+        degrees = self.get_degrees(direction=direction, weighted=weighted)
+        entity_ids = np.argsort(-degrees, kind='stable')[:k]
+        return pd.DataFrame({'ENTITY': [self._entities[entity_id] for entity_id in entity_ids], 'DEGREE': degrees[entity_ids]})
+
+    def shortest_path(self, source: str, target: str, max_hops: int = 6, directed: bool = False) -> list:
+        """
+        This method finds a path of fewest edges between two entities, through a breadth first search expanding
+        a whole frontier of entities at once.
+
+        args:
+        - source (str): entity name to start from
+        - target (str): entity name to reach
+        - max_hops (int): maximum number of edges of the path
+        - directed (bool): whether edges are only followed from source to target, otherwise in both directions
+
+        return:
+        - list: (source, relation, target) triple of every edge along the path, as stored, empty when no path
+        exists within max_hops
+        """
+        source_id, target_id = self.get_entity_id(source), self.get_entity_id(target)
+        if source_id == target_id:
+            return []
+        # entity id -> edge id through which it was reached, -1 when not visited yet
+        parent_edges = np.full(self.get_n_entities, -1, dtype=np.int64)
+        visited = np.zeros(self.get_n_entities, dtype=bool)
+        visited[source_id] = True
+        frontier = np.array([source_id])
+        for _ in range(max_hops):
+            edge_ids = self._get_edge_ids(frontier, 'out')
+            reached = [(edge_ids, self._targets[edge_ids])]
+            if not directed:
+                in_edge_ids = self._get_edge_ids(frontier, 'in')
+                reached.append((in_edge_ids, self._sources[in_edge_ids]))
+            edge_ids = np.concatenate([edge_ids for edge_ids, _ in reached])
+            entity_ids = np.concatenate([entity_ids for _, entity_ids in reached]).astype(np.int64)
+            new = ~visited[entity_ids]
+            entity_ids, first = np.unique(entity_ids[new], return_index=True)
+            if len(entity_ids) == 0:
+                return []
+            parent_edges[entity_ids] = edge_ids[new][first]
+            visited[entity_ids] = True
+            if visited[target_id]:
+                break
+            frontier = entity_ids
+        if not visited[target_id]:
+            return []
+
+        path, entity_id = [], target_id
+        while entity_id != source_id:
+            edge_id = parent_edges[entity_id]
+            path.append((self._entities[self._sources[edge_id]], self._relations[self._edge_relations[edge_id]], self._entities[self._targets[edge_id]]))
+            entity_id = self._sources[edge_id] if self._targets[edge_id] == entity_id else self._targets[edge_id]
+        return path[::-1]
+
+    def to_edge_list(self, file_path: str, sep: str = '\t', chunk_size: int = 1000000) -> None:
+        """
+        This method writes the edges as a delimited edge list (see edges_frame for the columns), chunk by chunk.
+        """
+        for start in range(0, max(self.get_n_edges, 1), chunk_size):
+            edge_ids = np.arange(start, min(start + chunk_size, self.get_n_edges))
+            self.edges_frame(edge_ids).to_csv(file_path, sep=sep, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+
+    def to_graphml(self, file_path: str) -> None:
+        """
+        This method writes the graph as a directed GraphML file, with the entity name of every node and the
+        relation, total weight and weight per category of every edge, streaming it node by node and edge by edge.
+        """
+        with open(file_path, mode='w', encoding='utf-8') as file:
+            file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            file.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+            file.write('  <key id="name" for="node" attr.name="name" attr.type="string"/>\n')
+            file.write('  <key id="relation" for="edge" attr.name="relation" attr.type="string"/>\n')
+            file.write('  <key id="weight" for="edge" attr.name="weight" attr.type="long"/>\n')
+            for category_idx, category_name in enumerate(self._categories):
+                file.write(f'  <key id="weight_{category_idx}" for="edge" attr.name={quoteattr("weight_" + category_name)} attr.type="long"/>\n')
+            file.write('  <graph id="G" edgedefault="directed">\n')
+            for entity_id, entity in enumerate(self._entities):
+                file.write(f'    <node id="n{entity_id}"><data key="name">{escape(entity)}</data></node>\n')
+            weights = self.get_weights
+            for edge_id in range(self.get_n_edges):
+                category_data = ''.join(
+                    f'<data key="weight_{category_idx}">{count}</data>'
+                    for category_idx, count in enumerate(self._category_weights[edge_id]) if count != 0
+                )
+                file.write(f'    <edge source="n{self._sources[edge_id]}" target="n{self._targets[edge_id]}">'
+                           f'<data key="relation">{escape(self._relations[self._edge_relations[edge_id]])}</data>'
+                           f'<data key="weight">{weights[edge_id]}</data>{category_data}</edge>\n')
+            file.write('  </graph>\n</graphml>\n')
+
+    def save(self, graph_dir: str) -> None:
+        """
+        This method saves the graph as .npy arrays, an entity name blob and a meta.json file within a folder.
+        """
+        os.makedirs(graph_dir, exist_ok=True)
+        arrays = {
+            'entity_offsets': self._entities._offsets, 'indptr': self._indptr, 'sources': self._sources, 'targets': self._targets,
+            'edge_relations': self._edge_relations, 'category_weights': self._category_weights,
+            'in_indptr': self._in_indptr, 'in_edges': self._in_edges
+        }
+        for array_name, array in arrays.items():
+            np.save(os.path.join(graph_dir, f'{array_name}.npy'), np.ascontiguousarray(array))
+        with open(os.path.join(graph_dir, 'entities.bin'), mode='wb') as file:
+            file.write(bytes(self._entities._blob))
+        with open(os.path.join(graph_dir, 'meta.json'), mode='w', encoding='utf-8') as file:
+            json.dump({'relations': self._relations, 'categories': self._categories, 'lowercase': self._lowercase}, file)
+
+    @classmethod
+    def load(cls, graph_dir: str, mmap_mode: str = 'r') -> 'KnowledgeGraph':
+        """
+        This method loads a saved graph, memory mapping its arrays by default so that loading costs no parsing
+        and the pages are only read once queried.
+
+        args:
+        - graph_dir (str): folder of the saved graph
+        - mmap_mode (str): numpy memory map mode, None to read the arrays into memory
+
+        return:
+        - KnowledgeGraph: loaded graph
+        """
+        arrays = {
+            array_name: np.load(os.path.join(graph_dir, f'{array_name}.npy'), mmap_mode=mmap_mode)
+            for array_name in ['entity_offsets', 'indptr', 'sources', 'targets', 'edge_relations', 'category_weights', 'in_indptr', 'in_edges']
+        }
+        blob_path = os.path.join(graph_dir, 'entities.bin')
+        if os.path.getsize(blob_path) == 0:
+            blob = np.zeros(0, dtype=np.uint8)
+        elif mmap_mode is not None:
+            blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            blob = np.fromfile(blob_path, dtype=np.uint8)
+        with open(os.path.join(graph_dir, 'meta.json'), mode='r', encoding='utf-8') as file:
+            meta = json.load(file)
+        return cls(StringTable(blob, arrays.pop('entity_offsets')), meta['relations'], meta['categories'], lowercase=meta['lowercase'], **arrays)
+
+class KnowledgeGraphBuilder:
+    def __init__(self, lowercase: bool = True) -> None:
+        """
+        This is the knowledge graph builder class which is responsible for accumulating the counts of the
+        (source, relation, target, category) triples and interning them into a KnowledgeGraph.
+
+        args:
+        - lowercase (bool): whether entity names are lowercased, so that e.g. 'Government' and 'government' are one entity
+
+        return:
+        - None
+        """
+        self._lowercase = lowercase
+        self._triple_counts = Counter()
+
+    def add(self, source: str, relation: str, target: str, category: str, count: int = 1) -> None:
+        if source.strip() == '' or target.strip() == '':
+            return
+        self._triple_counts[(get_entity_name(source, self._lowercase), relation, get_entity_name(target, self._lowercase), category)] += count
+
+    def add_frequency_tables(self, frequency_tables, pattern_collection: list = ['nvn', 'npn']) -> 'KnowledgeGraphBuilder':
+        """
+        This method adds the slot tuples counted by frequency tables (FrequencyTables or SketchTables) per category,
+        so that the graph is built without rescanning the phrases.
+
+        args:
+        - frequency_tables (FrequencyTables or SketchTables): tables holding the slot tuples of the patterns
+        - pattern_collection (list, str): patterns whose slot tuples become edges, see GRAPH_PATTERNS
+
+        return:
+        - KnowledgeGraphBuilder: this builder
+        """
+        for pattern_name in pattern_collection:
+            source_idx, relation_idx, target_idx = GRAPH_PATTERNS[pattern_name]
+            for category in frequency_tables.get_categories:
+                for slot_tuple, count in frequency_tables.get_tuple_counts(pattern_name, category=category).items():
+                    self.add(slot_tuple[source_idx], slot_tuple[relation_idx], slot_tuple[target_idx], category, count)
+        return self
+
+    def add_phrases(self, pattern_name: str, categories: list, phrases: list) -> 'KnowledgeGraphBuilder':
+        """
+        This method adds the phrase records of a batch of documents, e.g. of the phrase outputs read back in batches.
+
+        args:
+        - pattern_name (str): name of the pattern which emitted the records, see GRAPH_PATTERNS
+        - categories (list, str): category of each document
+        - phrases (list, list): phrase records of each document
+
+        return:
+        - KnowledgeGraphBuilder: this builder
+        """
+        source_field, relation_field, target_field = {'npn': ('noun1', 'preposition', 'noun2')}.get(pattern_name, ('subject', 'verb', 'object'))
+        for category, records in zip(categories, phrases):
+            for record in records:
+                self.add(getattr(record, source_field), getattr(record, relation_field), getattr(record, target_field), category)
+        return self
+
+    def build(self) -> KnowledgeGraph:
+        """
+        This method interns the entities, relations and categories and lays the edges out as CSR arrays.
+
+        return:
+        - KnowledgeGraph: graph of the triples added so far
+        """
+        # intern the names through pandas factorize (sorted uniques), the entity ids being shared by sources and targets
+        n_triples = len(self._triple_counts)
+        triples = pd.DataFrame(list(self._triple_counts), columns=['SOURCE', 'RELATION', 'TARGET', 'CATEGORY'])
+        entity_codes, entities = pd.factorize(pd.concat([triples['SOURCE'], triples['TARGET']], ignore_index=True), sort=True)
+        triple_sources, triple_targets = entity_codes[:n_triples].astype(np.int32), entity_codes[n_triples:].astype(np.int32)
+        triple_relations, relations = pd.factorize(triples['RELATION'], sort=True)
+        triple_categories, categories = pd.factorize(triples['CATEGORY'], sort=True)
+        triple_relations, triple_categories = triple_relations.astype(np.int32), triple_categories.astype(np.int32)
+        triple_counts = np.fromiter(self._triple_counts.values(), dtype=np.int64, count=n_triples)
+
+        # one edge per distinct (source, target, relation), in CSR order: sort the triples by key and start a new edge at every key change
+        order = np.lexsort((triple_relations, triple_targets, triple_sources))
+        triple_sources, triple_targets, triple_relations = triple_sources[order], triple_targets[order], triple_relations[order]
+        new_edge = np.ones(n_triples, dtype=bool)
+        new_edge[1:] = (np.diff(triple_sources) != 0) | (np.diff(triple_targets) != 0) | (np.diff(triple_relations) != 0)
+        triple_edges = np.cumsum(new_edge) - 1
+        category_weights = np.zeros((int(new_edge.sum()), len(categories)), dtype=np.int32)
+        np.add.at(category_weights, (triple_edges, triple_categories[order]), triple_counts[order])
+
+        sources, targets, edge_relations = triple_sources[new_edge], triple_targets[new_edge], triple_relations[new_edge]
+        indptr = np.zeros(len(entities) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(entities)), out=indptr[1:])
+        in_edges = np.argsort(targets, kind='stable').astype(np.int64)
+        in_indptr = np.zeros(len(entities) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=len(entities)), out=in_indptr[1:])
+        return KnowledgeGraph(StringTable.from_strings(list(entities)), list(relations), list(categories), indptr, sources, targets,
+                              edge_relations, category_weights, in_indptr, in_edges, lowercase=self._lowercase)
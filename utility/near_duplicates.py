@@ -0,0 +1,162 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the near duplicate detection of the articles (e.g. copies of the same wire story), run
+before parsing so that every group of near duplicates is parsed only once:
+- every text is turned into its set of word shingles, hashed to 64 bits
+- the MinHash signature of the set is its minimum under num_perm random hash functions, the share of equal
+signature values of two texts estimating the Jaccard similarity of their shingle sets
+- the signatures are cut into bands of rows (LSH banding), texts sharing all the rows of any band become
+candidates, so texts are never compared pairwise, and candidates are kept when their estimated similarity
+reaches the threshold
+- candidates are grouped into clusters, represented by their first text
+"""
+import zlib
+import numpy as np
+
+def get_lsh_params(threshold: float, num_perm: int) -> tuple:
+    """
+    This function picks the number of bands and rows per band of the LSH banding, minimizing the sum of the
+    probabilities of missing a pair above the threshold and of keeping a pair below it as candidates.
+
+    args:
+    - threshold (float): Jaccard similarity threshold
+    - num_perm (int): size of the signatures
+
+    return:
+    - tuple: (number of bands, number of rows per band)
+    """
+    best_params, best_error = None, None
+    for n_bands in range(1, num_perm + 1):
+        n_rows = num_perm // n_bands
+        # probability of a pair of similarity s to be a candidate: 1 - (1 - s^r)^b
+        below = np.linspace(0.0, threshold, 100)
+        above = np.linspace(threshold, 1.0, 100)
+        false_positive = np.trapz(1 - (1 - below ** n_rows) ** n_bands, below)
+        false_negative = np.trapz((1 - above ** n_rows) ** n_bands, above)
+        if best_error is None or false_positive + false_negative < best_error:
+            best_params, best_error = (n_bands, n_rows), false_positive + false_negative
+    return best_params
+
+class MinHashLSH:
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> None:
+        """
+        This is the MinHash LSH class which is responsible for computing the MinHash signatures of texts and
+        clustering the texts whose estimated Jaccard similarity reaches the threshold.
+
+        args:
+        - threshold (float): Jaccard similarity of the word shingles above which two texts are near duplicates
+        - num_perm (int): number of hash functions i.e. size of the signatures
+        - shingle_size (int): number of consecutive words per shingle, texts with fewer words being one shingle
+        - seed (int): seed of the hash functions, signatures are comparable only under the same seed
+
+        return:
+        - None
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Similarity threshold should be within (0, 1], got {threshold}")
+        self._threshold = threshold
+        self._num_perm = num_perm
+        self._shingle_size = shingle_size
+        self._n_bands, self._n_rows = get_lsh_params(threshold, num_perm)
+        # multiply-shift hash functions h(x) = (a * x + b) >> 32 over 64 bits, with odd multipliers
+        random_state = np.random.RandomState(seed)
+        self._multipliers = random_state.randint(0, 2**63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._increments = random_state.randint(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    #region Properties
+    @property
+    def get_threshold(self):
+        return self._threshold
+
+    @property
+    def get_num_perm(self):
+        return self._num_perm
+
+    @property
+    def get_lsh_params(self):
+        return self._n_bands, self._n_rows
+    #endregion
+
+    def get_shingles(self, text: str) -> np.ndarray:
+        """
+        This method returns the distinct 64 bits hashes of the word shingles of a text, words being lower cased.
+        """
+        words = text.lower().split()
+        if len(words) == 0:
+            return np.zeros(0, dtype=np.uint64)
+        word_hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+        n_shingles = max(len(words) - self._shingle_size + 1, 1)
+        # polynomial rolling hash of the word hashes of every shingle, wrapping around 64 bits
+        shingles = np.zeros(n_shingles, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for position in range(min(self._shingle_size, len(words))):
+                shingles = shingles * np.uint64(1000003) + word_hashes[position:position+n_shingles]
+        return np.unique(shingles)
+
+    def get_signature(self, text: str) -> np.ndarray:
+        """
+        This method returns the MinHash signature of a text, all its values being the maximum for texts without words.
+        """
+        shingles = self.get_shingles(text)
+        if len(shingles) == 0:
+            return np.full(self._num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        with np.errstate(over='ignore'):
+            hashes = (shingles[:, None] * self._multipliers[None, :] + self._increments[None, :]) >> np.uint64(32)
+        return hashes.min(axis=0).astype(np.uint32)
+
+    def get_signatures(self, texts: list) -> np.ndarray:
+        signatures = np.empty((len(texts), self._num_perm), dtype=np.uint32)
+        for idx, text in enumerate(texts):
+            signatures[idx] = self.get_signature(text)
+        return signatures
+
+    def cluster(self, texts: list = None, signatures: np.ndarray = None) -> np.ndarray:
+        """
+        This method clusters near duplicate texts. Within every band, the texts sharing the rows of the band are
+        bucketed together and every text of a bucket is compared with the first text of the bucket only.
+
+        args:
+        - texts (list, str): texts to cluster, unless their signatures are provided
+        - signatures (np.ndarray): signatures of the texts, see get_signatures
+
+        return:
+        - np.ndarray: position of the first text of its cluster per text, its own position for texts without near duplicates
+        """
+        if signatures is None:
+            signatures = self.get_signatures(texts)
+        n_texts = len(signatures)
+        parents = np.arange(n_texts)
+
+        def find_root(position):
+            while parents[position] != position:
+                parents[position] = parents[parents[position]]
+                position = parents[position]
+            return position
+
+        for band in range(self._n_bands):
+            band_rows = np.ascontiguousarray(signatures[:, band*self._n_rows:(band+1)*self._n_rows])
+            _, bucket_ids = np.unique(band_rows.view(np.dtype((np.void, band_rows.dtype.itemsize * self._n_rows))).ravel(),
+                                      return_inverse=True)
+            # texts sorted by bucket then position, the first text of every bucket heading its run
+            order = np.lexsort((np.arange(n_texts), bucket_ids))
+            sorted_buckets = bucket_ids[order]
+            heads = order[np.searchsorted(sorted_buckets, sorted_buckets)]
+            candidates = order[heads != order]
+            if len(candidates) == 0:
+                continue
+            candidate_heads = heads[heads != order]
+            similarities = (signatures[candidates] == signatures[candidate_heads]).mean(axis=1)
+            for position, head in zip(candidates[similarities >= self._threshold], candidate_heads[similarities >= self._threshold]):
+                root, head_root = find_root(position), find_root(head)
+                if root != head_root:
+                    # the first text of the cluster stays its root
+                    parents[max(root, head_root)] = min(root, head_root)
+        return np.array([find_root(position) for position in range(n_texts)], dtype=np.int64)
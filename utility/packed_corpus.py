@@ -0,0 +1,342 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the packed corpus format of the articles: a folder with
+- texts.bin: every article as utf-8, concatenated into one contiguous blob
+- offsets.npy: start of every article within texts.bin, followed by its size (int64, n + 1 entries)
+- doc_ids.bin / doc_id_offsets.npy: doc ids ('<category>/<filename>'), packed alike
+- categories.npy: category code of every article (int16), the category names being listed in meta.json
+The blobs are opened with mmap and the indexes as memory mapped numpy arrays, so opening a corpus costs no
+parsing, an article is a zero copy slice of the blob until it is decoded, and worker processes opening the
+same corpus share the same pages of the page cache instead of receiving pickled texts.
+
+e.g. python utility/packed_corpus.py --articles-path input/news_articles --corpus-dir input/news_articles_packed
+     python utility/packed_corpus.py --dataset-path input/news_articles_dataset --corpus-dir input/news_articles_packed
+     python utility/packed_corpus.py --csv-path input/news_articles_dataset.csv --doc-id-col doc_id --corpus-dir input/news_articles_packed
+"""
+import os
+import json
+import mmap
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+# files of a packed corpus, meta.json being renamed last as it marks the corpus complete
+CORPUS_FILES = ['texts.bin', 'doc_ids.bin', 'offsets.npy', 'doc_id_offsets.npy', 'categories.npy', 'meta.json']
+
+def _open_blob(blob_path: str):
+    # read only memory map of a blob, mmap refusing empty files
+    if os.path.getsize(blob_path) == 0:
+        return b''
+    with open(blob_path, mode='rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def is_packed_corpus(corpus_dir: str) -> bool:
+    return os.path.isfile(os.path.join(corpus_dir, 'meta.json')) and os.path.isfile(os.path.join(corpus_dir, 'texts.bin'))
+
+class PackedCorpus:
+    def __init__(self, corpus_dir: str) -> None:
+        """
+        This is the packed corpus class which is responsible for reading the articles of a packed corpus
+        through memory maps. Pickling a corpus (e.g. to send it to a worker process) only pickles its folder,
+        the worker maps the same files again.
+
+        args:
+        - corpus_dir (str): folder of the packed corpus
+
+        return:
+        - None
+        """
+        self._corpus_dir = corpus_dir
+        with open(os.path.join(corpus_dir, 'meta.json'), mode='r', encoding='utf-8') as file:
+            self._category_names = json.load(file)['categories']
+        self._texts = _open_blob(os.path.join(corpus_dir, 'texts.bin'))
+        self._offsets = np.load(os.path.join(corpus_dir, 'offsets.npy'), mmap_mode='r')
+        self._doc_ids = _open_blob(os.path.join(corpus_dir, 'doc_ids.bin'))
+        self._doc_id_offsets = np.load(os.path.join(corpus_dir, 'doc_id_offsets.npy'), mmap_mode='r')
+        self._category_codes = np.load(os.path.join(corpus_dir, 'categories.npy'), mmap_mode='r')
+
+    def __getstate__(self):
+        return {'corpus_dir': self._corpus_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state['corpus_dir'])
+
+    #region Properties
+    @property
+    def get_corpus_dir(self):
+        return self._corpus_dir
+
+    @property
+    def get_category_names(self):
+        return self._category_names
+
+    @property
+    def get_n_bytes(self):
+        return int(self._offsets[-1])
+    #endregion
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return self.get_bytes(idx).tobytes().decode('utf-8')
+
+    def get_bytes(self, idx: int) -> memoryview:
+        """
+        This method returns the utf-8 bytes of an article as a zero copy view of the memory mapped blob.
+        """
+        return memoryview(self._texts)[self._offsets[idx]:self._offsets[idx+1]]
+
+    def get_doc_id(self, idx: int) -> str:
+        return bytes(self._doc_ids[self._doc_id_offsets[idx]:self._doc_id_offsets[idx+1]]).decode('utf-8')
+
+    def get_category(self, idx: int) -> str:
+        return self._category_names[self._category_codes[idx]]
+
+    def get_indices(self, category_list: list = None) -> np.ndarray:
+        """
+        This method returns the positions of the articles of some categories, of all the articles by default.
+        """
+        if category_list is None:
+            return np.arange(len(self))
+        category_codes = [self._category_names.index(category) for category in category_list if category in self._category_names]
+        return np.flatnonzero(np.isin(self._category_codes, category_codes))
+
+    def get_texts(self, start: int = 0, stop: int = None) -> list:
+        """
+        This method decodes the contiguous slice [start, stop) of the articles at once.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        text_bytes = memoryview(self._texts)[self._offsets[start]:self._offsets[stop]].tobytes()
+        text_offsets = self._offsets[start:stop+1] - self._offsets[start]
+        return [text_bytes[text_offsets[idx]:text_offsets[idx+1]].decode('utf-8') for idx in range(stop - start)]
+
+    def take_texts(self, indices) -> list:
+        """
+        This method decodes the articles at some positions, runs of consecutive positions being sliced at once.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return []
+        if np.all(np.diff(indices) == 1):
+            return self.get_texts(int(indices[0]), int(indices[-1]) + 1)
+        return [self[idx] for idx in indices]
+
+    def get_doc_ids(self, indices=None) -> list:
+        indices = range(len(self)) if indices is None else indices
+        return [self.get_doc_id(idx) for idx in indices]
+
+    def get_categories(self, indices=None) -> list:
+        category_codes = self._category_codes if indices is None else self._category_codes[np.asarray(indices, dtype=np.int64)]
+        return [self._category_names[category_code] for category_code in category_codes]
+
+    def iter_articles(self, category_list: list = None, batch_size: int = 1024):
+        """
+        This method streams the articles, decoding them batch by batch.
+
+        args:
+        - category_list (list, str): categories to stream, None for all of them
+        - batch_size (int): number of articles decoded at a time
+
+        return:
+        - generator: (doc id, category, text) per article, in corpus order
+        """
+        indices = self.get_indices(category_list)
+        for batch_start in range(0, len(indices), batch_size):
+            batch_indices = indices[batch_start:batch_start+batch_size]
+            yield from zip(self.get_doc_ids(batch_indices), self.get_categories(batch_indices), self.take_texts(batch_indices))
+
+    def to_frame(self, category_list: list = None, text_col: str = 'ARTICLES') -> pd.DataFrame:
+        """
+        This method materializes the articles as a dataframe of DOC_ID, CATEGORIES and the text column.
+        """
+        indices = self.get_indices(category_list)
+        return pd.DataFrame({'DOC_ID': self.get_doc_ids(indices), 'CATEGORIES': self.get_categories(indices), text_col: self.take_texts(indices)})
+
+    def close(self) -> None:
+        for blob in [self._texts, self._doc_ids]:
+            if isinstance(blob, mmap.mmap):
+                blob.close()
+
+class PackedCorpusWriter:
+    def __init__(self, corpus_dir: str) -> None:
+        """
+        This is the packed corpus writer class which is responsible for appending articles to the blobs of a
+        new packed corpus, the indexes being written on close. Files are written under temporary names prefixed
+        by '_' and renamed on close, meta.json last, so that an interrupted pack never leaves a folder which
+        is_packed_corpus accepts.
+
+        args:
+        - corpus_dir (str): folder of the packed corpus, overwritten if it exists
+
+        return:
+        - None
+        """
+        self._corpus_dir = corpus_dir
+        os.makedirs(corpus_dir, exist_ok=True)
+        # leftovers of interrupted packs are removed and the folder stops being a corpus until the new one is complete
+        for file_path in [self._get_temp_path(file_name) for file_name in CORPUS_FILES] + [os.path.join(corpus_dir, 'meta.json')]:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        self._texts_file = open(self._get_temp_path('texts.bin'), mode='wb')
+        self._doc_ids_file = open(self._get_temp_path('doc_ids.bin'), mode='wb')
+        self._text_sizes, self._doc_id_sizes, self._category_codes = [], [], []
+        self._category_names = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _get_temp_path(self, file_name: str) -> str:
+        return os.path.join(self._corpus_dir, '_' + file_name)
+
+    def add(self, doc_id: str, category: str, text: str) -> None:
+        if category not in self._category_names:
+            self._category_names.append(category)
+        text_bytes, doc_id_bytes = text.encode('utf-8'), doc_id.encode('utf-8')
+        self._texts_file.write(text_bytes)
+        self._doc_ids_file.write(doc_id_bytes)
+        self._text_sizes.append(len(text_bytes))
+        self._doc_id_sizes.append(len(doc_id_bytes))
+        self._category_codes.append(self._category_names.index(category))
+
+    def close(self) -> None:
+        self._texts_file.close()
+        self._doc_ids_file.close()
+        for file_name, sizes in [('offsets.npy', self._text_sizes), ('doc_id_offsets.npy', self._doc_id_sizes)]:
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=offsets[1:])
+            np.save(self._get_temp_path(file_name), offsets)
+        np.save(self._get_temp_path('categories.npy'), np.array(self._category_codes, dtype=np.int16))
+        with open(self._get_temp_path('meta.json'), mode='w', encoding='utf-8') as file:
+            json.dump({'categories': self._category_names, 'n_docs': len(self._text_sizes)}, file)
+        for file_name in CORPUS_FILES:
+            os.replace(self._get_temp_path(file_name), os.path.join(self._corpus_dir, file_name))
+
+    def abort(self) -> None:
+        """
+        This method drops the files written so far, leaving the folder without a corpus.
+        """
+        self._texts_file.close()
+        self._doc_ids_file.close()
+        for file_name in CORPUS_FILES:
+            if os.path.exists(self._get_temp_path(file_name)):
+                os.remove(self._get_temp_path(file_name))
+
+def pack_folders(articles_path: str, corpus_dir: str, category_list: list = ['business', 'entertainment', 'politics', 'sport', 'tech'],
+                 encoding: str = 'ISO-8859-1') -> int:
+    """
+    This function packs the article files of the category folders, sorted by filename within each category.
+
+    args:
+    - articles_path (str): base folder path for articles
+    - corpus_dir (str): folder of the packed corpus
+    - category_list (list, str): category folders to pack
+    - encoding (str): encoding of the article files
+
+    return:
+    - int: number of packed articles
+    """
+    with PackedCorpusWriter(corpus_dir) as writer:
+        n_docs = 0
+        for category in category_list:
+            category_path = os.path.join(articles_path, category)
+            if not os.path.isdir(category_path):
+                continue
+            with os.scandir(category_path) as dir_entries:
+                file_entries = sorted((dir_entry.name, dir_entry.path) for dir_entry in dir_entries if dir_entry.is_file() and dir_entry.name.endswith('.txt'))
+            for file_name, file_path in file_entries:
+                with open(file_path, mode='r', encoding=encoding) as file:
+                    writer.add(f'{category}/{file_name}', category, file.read())
+                n_docs += 1
+    return n_docs
+
+def pack_csv(csv_path: str, corpus_dir: str, text_col: str = 'articles', category_col: str = 'categories', doc_id_col: str = None,
+             chunk_size: int = 10000) -> int:
+    """
+    This function packs the articles of a csv file such as news_articles_dataset.csv, reading it chunk by chunk.
+
+    args:
+    - csv_path (str): csv file of the articles
+    - corpus_dir (str): folder of the packed corpus
+    - text_col (str): column of the articles
+    - category_col (str): column of the categories
+    - doc_id_col (str): column of the doc ids, None to number the articles '<category>/<row number>'
+    - chunk_size (int): number of rows read at a time
+
+    return:
+    - int: number of packed articles
+    """
+    with PackedCorpusWriter(corpus_dir) as writer:
+        n_docs = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            doc_ids = chunk[doc_id_col].astype(str) if doc_id_col is not None else chunk[category_col].astype(str) + '/' + chunk.index.astype(str)
+            for doc_id, category, text in zip(doc_ids, chunk[category_col].astype(str), chunk[text_col].fillna('').astype(str)):
+                writer.add(doc_id, category, text)
+            n_docs += len(chunk)
+    return n_docs
+
+def pack_dataset(dataset_dir: str, corpus_dir: str, file_format: str = 'parquet', text_col: str = 'articles', category_col: str = 'categories',
+                 doc_id_col: str = 'doc_id', batch_size: int = 10000) -> int:
+    """
+    This function packs the articles of a dataset ingested by preprocessing/preprocess.py, keeping its doc ids and
+    reading it batch by batch in the order of its part files.
+
+    args:
+    - dataset_dir (str): folder of the dataset
+    - corpus_dir (str): folder of the packed corpus
+    - file_format (str): 'parquet' or 'feather' part files
+    - text_col (str): column of the articles
+    - category_col (str): column of the categories
+    - doc_id_col (str): column of the doc ids
+    - batch_size (int): number of rows read at a time
+
+    return:
+    - int: number of packed articles
+    """
+    dataset = ds.dataset(dataset_dir, format='ipc' if file_format == 'feather' else 'parquet')
+    with PackedCorpusWriter(corpus_dir) as writer:
+        n_docs = 0
+        for batch in dataset.to_batches(columns=[doc_id_col, category_col, text_col], batch_size=batch_size):
+            doc_ids, categories, texts = (batch.column(col_idx).to_pylist() for col_idx in range(3))
+            for doc_id, category, text in zip(doc_ids, categories, texts):
+                writer.add(str(doc_id), str(category), text if text is not None else '')
+            n_docs += batch.num_rows
+    return n_docs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Pack the articles into a memory mapped corpus')
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument('--articles-path', help='base folder path for articles, with one folder per category')
+    source_group.add_argument('--dataset-path', help='dataset of preprocessing/preprocess.py e.g. input/news_articles_dataset')
+    source_group.add_argument('--csv-path', help='csv file of the articles e.g. input/news_articles_dataset.csv')
+    parser.add_argument('--dataset-format', default='parquet', choices=['parquet', 'feather'], help='format of the part files of the dataset')
+    parser.add_argument('--corpus-dir', default=os.path.join('input','news_articles_packed'), help='folder of the packed corpus')
+    parser.add_argument('--categories', nargs='+', default=['business', 'entertainment', 'politics', 'sport', 'tech'], help='category folders to pack')
+    parser.add_argument('--text-col', default='articles', help='column of the articles in the csv file or the dataset')
+    parser.add_argument('--category-col', default='categories', help='column of the categories in the csv file or the dataset')
+    parser.add_argument('--doc-id-col', default=None, help="column of the doc ids in the csv file or the dataset, 'doc_id' for the dataset by default")
+    args = parser.parse_args()
+
+    if args.articles_path is not None:
+        n_docs = pack_folders(args.articles_path, args.corpus_dir, category_list=args.categories)
+    elif args.dataset_path is not None:
+        n_docs = pack_dataset(args.dataset_path, args.corpus_dir, file_format=args.dataset_format, text_col=args.text_col,
+                              category_col=args.category_col, doc_id_col=args.doc_id_col or 'doc_id')
+    else:
+        n_docs = pack_csv(args.csv_path, args.corpus_dir, text_col=args.text_col, category_col=args.category_col, doc_id_col=args.doc_id_col)
+    print(f'{n_docs} articles packed into {args.corpus_dir}')
@@ -0,0 +1,204 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the persistent parse cache. Parsed documents are stored on disk as spacy DocBin
+shards, keyed by the hash of the text, under a directory specific to the spacy model name, version
+and loaded components. The cache is capped in size and evicts the least recently used shards first.
+"""
+import os
+import json
+import time
+import hashlib
+from spacy.tokens import DocBin
+
+def get_model_tag(spacy_loaded_model) -> str:
+    """
+    This function builds the identifier of a loaded spacy model used to separate cached parses of
+    different models, versions and loaded components (e.g. different profiles).
+
+    args:
+        spacy_loaded_model (spacy model object): loaded spacy model
+
+    returns:
+        str: model identifier e.g. 'en_core_web_lg-3.4.1-3f5a0c1d'
+    """
+    meta = spacy_loaded_model.meta
+    components_hash = hashlib.sha1(','.join(spacy_loaded_model.pipe_names).encode('utf-8')).hexdigest()[:8]
+    return f"{meta['lang']}_{meta['name']}-{meta['version']}-{components_hash}"
+
+def get_text_key(text: str) -> str:
+    """
+    This function returns the content hash of a text used as key of the parse cache.
+    """
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class ParseCache:
+    def __init__(self, cache_dir: str, spacy_loaded_model, max_size_mb: int = 2048, shard_size: int = 1000) -> None:
+        """
+        This is the parse cache class which is responsible for storing parsed spacy documents as DocBin
+        shards on disk and serving them back instead of re-parsing the same texts.
+
+        args:
+        - cache_dir (str): base folder of the cache, a sub folder is created per model
+        - spacy_loaded_model (spacy model object): spacy model used to parse the cache misses
+        - max_size_mb (int): size cap of the shards of this model, least recently used shards are evicted beyond it
+        - shard_size (int): number of texts looked up and parsed together, each block of misses is written as one shard
+
+        return:
+        - None
+        """
+        self._spacy_loaded_model = spacy_loaded_model
+        self._max_size_bytes = max_size_mb * 1024 * 1024
+        self._shard_size = shard_size
+        self._cache_dir = os.path.join(cache_dir, get_model_tag(spacy_loaded_model))
+        self._index_path = os.path.join(self._cache_dir, 'index.json')
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+        # shard name -> {'keys': [...], 'size': bytes, 'last_access': timestamp}
+        self._shards = dict()
+        if os.path.exists(self._index_path):
+            with open(self._index_path, mode='r', encoding='utf-8') as file:
+                self._shards = json.load(file)
+        # text key -> (shard name, position within the shard)
+        self._doc_locations = {
+            key: (shard_name, position)
+            for shard_name, shard_info in self._shards.items()
+            for position, key in enumerate(shard_info['keys'])
+        }
+        self._loaded_shard = (None, None)
+
+    #region Properties
+    @property
+    def get_cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def get_size_bytes(self):
+        return sum(shard_info['size'] for shard_info in self._shards.values())
+    #endregion
+
+    def __len__(self):
+        return len(self._doc_locations)
+
+    def __contains__(self, text: str):
+        return get_text_key(text) in self._doc_locations
+
+    def _save_index(self) -> None:
+        temp_index_path = self._index_path + '.tmp'
+        with open(temp_index_path, mode='w', encoding='utf-8') as file:
+            json.dump(self._shards, file)
+        os.replace(temp_index_path, self._index_path)
+
+    def _load_shard_docs(self, shard_name: str) -> list:
+        # the last shard read is kept in memory since consecutive lookups mostly hit the same shard
+        if self._loaded_shard[0] != shard_name:
+            doc_bin = DocBin().from_disk(os.path.join(self._cache_dir, shard_name))
+            self._loaded_shard = (shard_name, list(doc_bin.get_docs(self._spacy_loaded_model.vocab)))
+        self._shards[shard_name]['last_access'] = time.time()
+        return self._loaded_shard[1]
+
+    def get_many(self, texts: list) -> list:
+        """
+        This method looks up the parsed documents of the texts.
+
+        args:
+        - texts (list, str): texts to look up
+
+        return:
+        - list: parsed document per text, None for the texts which are not cached
+        """
+        docs = [None] * len(texts)
+        locations = [self._doc_locations.get(get_text_key(text)) for text in texts]
+        # read every shard only once, grouping the lookups by shard
+        for shard_name in dict.fromkeys(location[0] for location in locations if location is not None):
+            shard_docs = self._load_shard_docs(shard_name)
+            for idx, location in enumerate(locations):
+                if location is not None and location[0] == shard_name:
+                    docs[idx] = shard_docs[location[1]]
+        return docs
+
+    def put_many(self, texts: list, docs: list) -> None:
+        """
+        This method writes the parsed documents of the texts as one new shard and evicts the least
+        recently used shards if the cache grows beyond its size cap.
+
+        args:
+        - texts (list, str): texts which were parsed
+        - docs (list, spacy.tokens.Doc): parsed documents of the texts
+
+        return:
+        - None
+        """
+        keys, doc_bin = [], DocBin(store_user_data=False)
+        for text, doc in zip(texts, docs):
+            key = get_text_key(text)
+            if key not in self._doc_locations and key not in keys:
+                keys.append(key)
+                doc_bin.add(doc)
+        if len(keys) == 0:
+            return
+
+        shard_name = f"{time.time_ns()}.spacy"
+        shard_path = os.path.join(self._cache_dir, shard_name)
+        doc_bin.to_disk(shard_path)
+        self._shards[shard_name] = {'keys': keys, 'size': os.path.getsize(shard_path), 'last_access': time.time()}
+        for position, key in enumerate(keys):
+            self._doc_locations[key] = (shard_name, position)
+
+        self._evict()
+        self._save_index()
+
+    def _evict(self) -> None:
+        size_bytes = self.get_size_bytes
+        for shard_name in sorted(self._shards, key=lambda name: self._shards[name]['last_access']):
+            if size_bytes <= self._max_size_bytes:
+                break
+            shard_info = self._shards.pop(shard_name)
+            size_bytes -= shard_info['size']
+            for key in shard_info['keys']:
+                if self._doc_locations.get(key, (None,))[0] == shard_name:
+                    del self._doc_locations[key]
+            if self._loaded_shard[0] == shard_name:
+                self._loaded_shard = (None, None)
+            os.remove(os.path.join(self._cache_dir, shard_name))
+
+    def pipe(self, texts, batch_size: int = 64):
+        """
+        This method is the cached equivalent of nlp.pipe. Texts are handled in blocks of shard size, the
+        cached documents are loaded from their shards, the misses are parsed through nlp.pipe and written
+        as a new shard.
+
+        args:
+        - texts (iterable, str): texts to parse
+        - batch_size (int): number of texts buffered by nlp.pipe per batch while parsing the misses
+
+        return:
+        - generator: parsed document per text, in the same order as the input texts
+        """
+        block = []
+        for text in texts:
+            block.append(text)
+            if len(block) == self._shard_size:
+                yield from self._pipe_block(block, batch_size)
+                block = []
+        if len(block) != 0:
+            yield from self._pipe_block(block, batch_size)
+        self._save_index()
+
+    def _pipe_block(self, texts: list, batch_size: int) -> list:
+        docs = self.get_many(texts)
+        missing_idx = [idx for idx, doc in enumerate(docs) if doc is None]
+        if len(missing_idx) != 0:
+            missing_texts = [texts[idx] for idx in missing_idx]
+            parsed_docs = list(self._spacy_loaded_model.pipe(missing_texts, batch_size=batch_size))
+            for idx, doc in zip(missing_idx, parsed_docs):
+                docs[idx] = doc
+            self.put_many(missing_texts, parsed_docs)
+        return docs
@@ -0,0 +1,178 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the columnar export of extracted phrases. Phrase records are streamed batch by batch
+into Parquet or Arrow IPC files, one dataset per pattern partitioned by category in hive layout
+e.g. <output_dir>/nvn/CATEGORY=business/part-<run>.parquet, so that downstream jobs can memory map
+and filter the results instead of running the extraction again.
+"""
+import os
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+from pyarrow.fs import LocalFileSystem
+
+EXPORT_FORMATS = ['parquet', 'arrow']
+
+# Low cardinality record fields stored as dictionary encoded strings
+DICTIONARY_FIELDS = ['verb', 'preposition']
+
+def get_record_schema(record_type, id_column: str = 'ROW_ID', id_type: pa.DataType = pa.int64()) -> pa.Schema:
+    """
+    This function builds the arrow schema of a typed phrase record, prefixed with the id column
+    linking every phrase back to the row (or document) it was extracted from.
+
+    args:
+        record_type (NamedTuple class): phrase record type e.g. NVNRecord
+        id_column (str, optional): name of the id column. Defaults to 'ROW_ID'.
+        id_type (pa.DataType, optional): arrow type of the id column. Defaults to pa.int64().
+
+    returns:
+        pa.Schema: arrow schema of the exported records
+    """
+    fields = [pa.field(id_column, id_type)]
+    for field_name, field_type in record_type.__annotations__.items():
+        if field_type is int:
+            fields.append(pa.field(field_name, pa.int32()))
+        elif field_name in DICTIONARY_FIELDS:
+            fields.append(pa.field(field_name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(field_name, pa.string()))
+    return pa.schema(fields)
+
+class PhraseExporter:
+    def __init__(self, output_dir: str, record_types: dict, file_format: str = 'parquet', compression: str = 'snappy', 
+                 id_column: str = 'ROW_ID', id_type: pa.DataType = pa.int64()) -> None:
+        """
+        This is the phrase exporter class which is responsible for streaming extracted phrase records to
+        partitioned columnar files as the extraction batches finish. One writer is kept open per pattern
+        and category, every written batch becomes a row group (parquet) or a record batch (arrow) of it.
+
+        args:
+        - output_dir (str): base folder of the export, a sub folder is created per pattern
+        - record_types (dict): pattern name -> phrase record type, None for patterns emitting dictionaries
+        whose schema is then inferred from their first exported batch
+        - file_format (str): 'parquet' or 'arrow' (Arrow IPC file format, memory mappable as is)
+        - compression (str): parquet compression codec, unused by the arrow format
+        - id_column (str): name of the column linking the phrases to their rows e.g. 'DOC_ID'
+        - id_type (pa.DataType): arrow type of the id column e.g. pa.string() for document ids
+
+        return:
+        - None
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{file_format}', expected one of {EXPORT_FORMATS}")
+        self._output_dir = output_dir
+        self._file_format = file_format
+        self._compression = compression
+        self._id_column = id_column
+        self._schemas = {
+            pattern_name: get_record_schema(record_type, id_column, id_type) if record_type is not None else None
+            for pattern_name, record_type in record_types.items()
+        }
+        # every exporter writes its own part files so that successive runs add to the datasets
+        self._part_name = f"part-{time.time_ns()}.{file_format}"
+        # (pattern name, category) -> (open file sink or None, writer)
+        self._writers = dict()
+        self._n_rows = {pattern_name: 0 for pattern_name in record_types}
+
+    #region Properties
+    @property
+    def get_output_dir(self):
+        return self._output_dir
+
+    @property
+    def get_n_rows(self):
+        return self._n_rows
+    #endregion
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_writer(self, pattern_name: str, category: str, schema: pa.Schema):
+        writer_key = (pattern_name, category)
+        if writer_key not in self._writers:
+            partition_dir = os.path.join(self._output_dir, pattern_name, f"CATEGORY={category}")
+            os.makedirs(partition_dir, exist_ok=True)
+            file_path = os.path.join(partition_dir, self._part_name)
+            if self._file_format == 'parquet':
+                self._writers[writer_key] = (None, pq.ParquetWriter(file_path, schema, compression=self._compression, use_dictionary=True))
+            else:
+                sink = pa.OSFile(file_path, 'wb')
+                self._writers[writer_key] = (sink, pa.ipc.new_file(sink, schema))
+        return self._writers[writer_key][1]
+
+    def _build_table(self, pattern_name: str, row_ids: list, records: list) -> pa.Table:
+        schema = self._schemas[pattern_name]
+        if isinstance(records[0], dict):
+            # dictionary records of custom patterns, the schema of the first batch is kept for the next ones
+            table = pa.Table.from_pylist([{self._id_column: row_id, **record} for row_id, record in zip(row_ids, records)], schema=schema)
+            self._schemas[pattern_name] = table.schema
+            return table
+        columns = [row_ids] + [list(values) for values in zip(*records)]
+        return pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema)
+
+    def write_batch(self, pattern_name: str, row_ids: list, categories: list, phrases: list) -> None:
+        """
+        This method writes the phrases extracted from a batch of rows, grouped by category.
+
+        args:
+        - pattern_name (str): name of the pattern which emitted the phrases
+        - row_ids (list): identifiers of the rows of the batch
+        - categories (list, str): category of each row of the batch
+        - phrases (list, list): phrase records extracted from each row of the batch
+
+        return:
+        - None
+        """
+        category_rows = dict()
+        for row_id, category, row_phrases in zip(row_ids, categories, phrases):
+            batch_row_ids, batch_records = category_rows.setdefault(category, ([], []))
+            batch_row_ids.extend([row_id] * len(row_phrases))
+            batch_records.extend(row_phrases)
+
+        for category, (batch_row_ids, batch_records) in category_rows.items():
+            if len(batch_records) == 0:
+                continue
+            table = self._build_table(pattern_name, batch_row_ids, batch_records)
+            self._get_writer(pattern_name, category, table.schema).write_table(table)
+            self._n_rows[pattern_name] += table.num_rows
+
+    def close(self) -> None:
+        for sink, writer in self._writers.values():
+            writer.close()
+            if sink is not None:
+                sink.close()
+        self._writers = dict()
+
+def read_phrases(output_dir: str, pattern_name: str, file_format: str = 'parquet', categories: list = None, columns: list = None) -> pa.Table:
+    """
+    This function reads back the exported phrases of a pattern as an arrow table. Arrow IPC files are
+    memory mapped so that only the selected columns of the selected categories are actually paged in.
+
+    args:
+        output_dir (str): base folder of the export
+        pattern_name (str): name of the pattern to read e.g. 'nvn'
+        file_format (str, optional): 'parquet' or 'arrow'. Defaults to 'parquet'.
+        categories (list, str, optional): categories to read, all of them when None. Defaults to None.
+        columns (list, str, optional): columns to read, all of them when None. Defaults to None.
+
+    returns:
+        pa.Table: exported phrases along with the CATEGORY partition column
+    """
+    dataset = ds.dataset(os.path.join(output_dir, pattern_name), format='ipc' if file_format == 'arrow' else file_format,
+                         partitioning=ds.partitioning(pa.schema([pa.field('CATEGORY', pa.dictionary(pa.int32(), pa.string()))]), flavor='hive', dictionaries='infer'),
+                         filesystem=LocalFileSystem(use_mmap=True))
+    row_filter = ds.field('CATEGORY').isin(categories) if categories is not None else None
+    return dataset.to_table(columns=columns, filter=row_filter)
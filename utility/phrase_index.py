@@ -0,0 +1,155 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the persistent inverted index of the extracted phrases, stored in a sqlite database.
+Every slot of every phrase record is a posting keyed by (pattern, slot, term, category), the term being
+the lowercased slot text (the verb slot already holds the lemma). Postings live in a clustered b-tree, so
+looking up e.g. the NVN phrases with subject 'ons' and verb 'revise' is an intersection of two range scans
+instead of a scan of the segregated phrases. Phrases keep their document id and the record fields with the
+token indices and character offsets of their slots, the article texts are not stored.
+"""
+import os
+import json
+import sqlite3
+import pandas as pd
+
+class PhraseIndex:
+    def __init__(self, index_path: str) -> None:
+        """
+        This is the phrase index class which is responsible for indexing the phrase records of documents by
+        their slot values and answering slot lookups.
+
+        args:
+        - index_path (str): path of the sqlite database file, ':memory:' for a transient index
+
+        return:
+        - None
+        """
+        self._index_path = index_path
+        if index_path != ':memory:':
+            os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        self._connection = sqlite3.connect(index_path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS phrases (
+                phrase_id INTEGER PRIMARY KEY,
+                pattern TEXT NOT NULL,
+                doc_id NOT NULL,
+                category TEXT,
+                record TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS phrases_doc ON phrases (doc_id);
+            CREATE INDEX IF NOT EXISTS phrases_pattern ON phrases (pattern, category);
+            CREATE TABLE IF NOT EXISTS postings (
+                pattern TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                term TEXT NOT NULL,
+                category TEXT,
+                phrase_id INTEGER NOT NULL,
+                PRIMARY KEY (pattern, slot, term, category, phrase_id)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_phrase ON postings (phrase_id);
+        """)
+
+    #region Properties
+    @property
+    def get_index_path(self):
+        return self._index_path
+    #endregion
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM phrases").fetchone()[0]
+
+    def close(self) -> None:
+        self._connection.close()
+
+    @staticmethod
+    def get_term(value: str) -> str:
+        return ' '.join(value.lower().split())
+
+    def remove_documents(self, doc_ids: list, batch_size: int = 500) -> None:
+        """
+        This method removes the phrases and postings of the documents, e.g. before they are indexed again. The
+        documents are removed batch by batch, the postings of their phrases being looked up by phrase id.
+        """
+        doc_ids = list(doc_ids)
+        with self._connection:
+            for idx in range(0, len(doc_ids), batch_size):
+                batch_doc_ids = doc_ids[idx:idx+batch_size]
+                placeholders = ', '.join('?' * len(batch_doc_ids))
+                self._connection.execute(f"""
+                    DELETE FROM postings WHERE phrase_id IN (
+                        SELECT phrase_id FROM phrases WHERE doc_id IN ({placeholders}))""", batch_doc_ids)
+                self._connection.execute(f"DELETE FROM phrases WHERE doc_id IN ({placeholders})", batch_doc_ids)
+
+    def add_documents(self, pattern_name: str, slot_fields: list, doc_ids: list, categories: list, phrases: list) -> None:
+        """
+        This method indexes the phrase records of a batch of documents in one transaction.
+
+        args:
+        - pattern_name (str): name of the pattern which emitted the records e.g. 'nvn'
+        - slot_fields (list, str): record fields to post e.g. ['subject', 'verb', 'object']
+        - doc_ids (list): id of each document
+        - categories (list, str): category of each document
+        - phrases (list, list): phrase records of each document
+
+        return:
+        - None
+        """
+        with self._connection:
+            next_phrase_id = self._connection.execute("SELECT COALESCE(MAX(phrase_id), 0) + 1 FROM phrases").fetchone()[0]
+            phrase_rows, posting_rows = [], []
+            for doc_id, category, records in zip(doc_ids, categories, phrases):
+                for record in records:
+                    phrase_rows.append((next_phrase_id, pattern_name, doc_id, category, json.dumps(record._asdict())))
+                    posting_rows.extend(
+                        (pattern_name, field_name, self.get_term(getattr(record, field_name)), category, next_phrase_id)
+                        for field_name in slot_fields if getattr(record, field_name) != ''
+                    )
+                    next_phrase_id += 1
+            self._connection.executemany("INSERT INTO phrases VALUES (?, ?, ?, ?, ?)", phrase_rows)
+            self._connection.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?, ?)", posting_rows)
+
+    def _get_match_sql(self, pattern_name: str, category: str, slot_terms: dict) -> tuple:
+        # sub query of the ids of the matching phrases, one posting range scan per slot term
+        category_clause, category_params = (" AND category = ?", [category]) if category is not None else ("", [])
+        if len(slot_terms) == 0:
+            return f"SELECT phrase_id FROM phrases WHERE pattern = ?{category_clause}", [pattern_name] + category_params
+        match_sql = " INTERSECT ".join(
+            f"SELECT phrase_id FROM postings WHERE pattern = ? AND slot = ? AND term = ?{category_clause}" for _ in slot_terms
+        )
+        params = [param for slot, value in slot_terms.items() for param in [pattern_name, slot, self.get_term(value)] + category_params]
+        return match_sql, params
+
+    def query(self, pattern_name: str, category: str = None, limit: int = None, **slot_terms) -> pd.DataFrame:
+        """
+        This method looks up the phrases of a pattern whose slots hold all the given terms.
+
+        args:
+        - pattern_name (str): name of the pattern e.g. 'nvn'
+        - category (str): category to restrict the lookup to, None for all the categories
+        - limit (int): maximum number of phrases to return, None for all of them
+        - slot_terms: record field -> slot text e.g. subject='ONS', verb='revise', matched case insensitively
+
+        return:
+        - pd.DataFrame: DOC_ID, CATEGORY and the record fields of the matching phrases, in indexing order
+        """
+        match_sql, params = self._get_match_sql(pattern_name, category, slot_terms)
+        sql = f"SELECT doc_id, category, record FROM phrases WHERE phrase_id IN ({match_sql}) ORDER BY phrase_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._connection.execute(sql, params).fetchall()
+        return pd.DataFrame([{'DOC_ID': doc_id, 'CATEGORY': category, **json.loads(record)} for doc_id, category, record in rows])
+
+    def query_documents(self, pattern_name: str, category: str = None, **slot_terms) -> list:
+        """
+        This method returns the ids of the documents holding at least one phrase matching the lookup, see query.
+        """
+        match_sql, params = self._get_match_sql(pattern_name, category, slot_terms)
+        rows = self._connection.execute(f"SELECT DISTINCT doc_id FROM phrases WHERE phrase_id IN ({match_sql})", params).fetchall()
+        return sorted(doc_id for doc_id, in rows)
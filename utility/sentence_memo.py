@@ -0,0 +1,142 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the bounded memo of the sentence level extraction: sentence hash -> phrases extracted from
+the sentence, so that a sentence repeated across articles (syndicated paragraphs, bylines, legal footers) is
+parsed only once. Sentences are keyed by a 16 bytes blake2b digest of their text instead of the text itself
+and the memo evicts either the least recently used ('lru') or the least frequently used ('lfu') sentence
+beyond its size, both in constant time.
+"""
+import hashlib
+from collections import OrderedDict
+
+MEMO_POLICIES = ['lru', 'lfu']
+
+def get_sentence_key(sentence: str) -> bytes:
+    """
+    This function returns the content hash of a sentence used as key of the memo.
+    """
+    return hashlib.blake2b(sentence.encode('utf-8'), digest_size=16).digest()
+
+class SentenceMemo:
+    def __init__(self, max_size: int = 100000, policy: str = 'lru') -> None:
+        """
+        This is the sentence memo class which is responsible for holding the values of at most max_size
+        sentences.
+
+        args:
+        - max_size (int): number of sentences held
+        - policy (str): 'lru' to evict the least recently used sentence, 'lfu' to evict the least frequently
+        used one, the least recently used of them on ties
+
+        return:
+        - None
+        """
+        if policy not in MEMO_POLICIES:
+            raise ValueError(f"Unknown memo policy '{policy}', expected one of {MEMO_POLICIES}")
+        if max_size < 1:
+            raise ValueError(f"Memo size should be at least 1, got {max_size}")
+        self._max_size = max_size
+        self._policy = policy
+        # key -> value, in least recently used first order for 'lru'
+        self._values = OrderedDict()
+        # 'lfu' only: key -> use count and use count -> keys of that count in least recently used first order
+        self._counts = dict()
+        self._count_keys = dict()
+        self._min_count = 0
+        self._n_hits = 0
+        self._n_misses = 0
+
+    #region Properties
+    @property
+    def get_policy(self):
+        return self._policy
+
+    @property
+    def get_max_size(self):
+        return self._max_size
+
+    @property
+    def get_n_hits(self):
+        return self._n_hits
+
+    @property
+    def get_n_misses(self):
+        return self._n_misses
+
+    @property
+    def get_hit_rate(self):
+        n_lookups = self._n_hits + self._n_misses
+        return self._n_hits / n_lookups if n_lookups != 0 else 0.0
+    #endregion
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._values
+
+    def _touch(self, key: bytes) -> None:
+        if self._policy == 'lru':
+            self._values.move_to_end(key)
+            return
+        count = self._counts[key]
+        count_keys = self._count_keys[count]
+        del count_keys[key]
+        if len(count_keys) == 0:
+            del self._count_keys[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._count_keys.setdefault(count + 1, OrderedDict())[key] = None
+
+    def get(self, key: bytes, default=None):
+        """
+        This method returns the value of a sentence, counted as a hit or a miss.
+        """
+        if key not in self._values:
+            self._n_misses += 1
+            return default
+        self._n_hits += 1
+        self._touch(key)
+        return self._values[key]
+
+    def put(self, key: bytes, value) -> None:
+        """
+        This method stores the value of a sentence, evicting a sentence first when the memo is full.
+        """
+        if key in self._values:
+            self._values[key] = value
+            self._touch(key)
+            return
+        if len(self._values) >= self._max_size:
+            self._evict()
+        self._values[key] = value
+        if self._policy == 'lfu':
+            self._counts[key] = 1
+            self._count_keys.setdefault(1, OrderedDict())[key] = None
+            self._min_count = 1
+
+    def _evict(self) -> None:
+        if self._policy == 'lru':
+            self._values.popitem(last=False)
+            return
+        count_keys = self._count_keys[self._min_count]
+        key, _ = count_keys.popitem(last=False)
+        if len(count_keys) == 0:
+            del self._count_keys[self._min_count]
+        del self._counts[key]
+        del self._values[key]
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._counts.clear()
+        self._count_keys.clear()
+        self._min_count = 0
@@ -0,0 +1,377 @@
+__author__ = "konwar.m"
+__copyright__ = "Copyright 2023, AI R&D"
+__credits__ = ["konwar.m"]
+__license__ = "Individual Ownership"
+__version__ = "1.0.1"
+__maintainer__ = "konwar.m"
+__email__ = "rickykonwar@gmail.com"
+__status__ = "Development"
+
+"""
+This script holds the approximate, memory bounded counterpart of the frequency tables for very large
+corpora, where exact counts of every distinct triple or pair do not fit in memory.
+
+- CountMinSketch answers point queries for any slot value or slot tuple. With width w = ceil(e / epsilon)
+and depth d = ceil(ln(1 / delta)), an estimate never undercounts and overcounts by at most epsilon * N
+with probability at least 1 - delta, N being the total of the counts added to the sketch. There is one
+sketch per pattern holding the slot values and slot tuples of every category and of the global scope, so
+N is 2 * (number of slots + 1) * number of phrases of the pattern. Its memory is 8 * w * d bytes.
+- SpaceSaving keeps the top k candidates of every slot (and of the slot tuples) per category and globally,
+with capacity c counters each. Every value whose true count exceeds N / c (N being the number of phrases of
+that scope) is monitored, and every monitored count overestimates the true count by at most its error,
+itself at most N / c. Counts reported by the tables are the minimum of both estimates.
+
+Both structures hash with blake2b so that the sketches of different processes agree and merge: count-min
+sketches are added cell by cell and space saving summaries are merged following the parallel space saving
+merge (Cafaro et al.), both keeping the bounds above with N the total of the merged tables.
+"""
+import math
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from collections import Counter
+
+from utility.frequency_tables import FrequencyTables
+
+COUNTING_MODES = ['exact', 'sketch']
+
+def get_sketch_shape(epsilon: float, delta: float) -> tuple:
+    """
+    This function returns the (width, depth) of a count-min sketch overcounting by at most epsilon * N
+    with probability at least 1 - delta.
+    """
+    return math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta))
+
+class CountMinSketch:
+    def __init__(self, width: int = 2**16, depth: int = 4, seed: int = 0) -> None:
+        """
+        This is the count-min sketch class which is responsible for the approximate counts of any key within a
+        fixed memory of width * depth counters.
+
+        args:
+        - width (int): number of counters per row, the overcount is at most e / width * N with probability 1 - delta
+        - depth (int): number of rows, delta = exp(-depth)
+        - seed (int): hashing seed, only sketches with the same width, depth and seed can be merged
+
+        return:
+        - None
+        """
+        self._width = width
+        self._depth = depth
+        self._seed = seed
+        self._hash_key = seed.to_bytes(8, 'little')
+        self._table = np.zeros((depth, width), dtype=np.int64)
+        self._total = 0
+
+    #region Properties
+    @property
+    def get_total(self):
+        return self._total
+
+    @property
+    def get_error_bound(self):
+        return math.e / self._width * self._total
+    #endregion
+
+    def _get_cells(self, keys: list) -> np.ndarray:
+        # two 64 bit hashes per key combined into one cell per row (Kirsch-Mitzenmacher)
+        digests = np.frombuffer(b''.join(hashlib.blake2b(key.encode('utf-8'), digest_size=16, key=self._hash_key).digest() for key in keys),
+                                dtype=np.uint64).reshape(len(keys), 2)
+        rows = np.arange(self._depth, dtype=np.uint64)
+        return ((digests[:, :1] + rows * digests[:, 1:]) % np.uint64(self._width)).astype(np.int64)
+
+    def update_many(self, key_counts: dict) -> None:
+        """
+        This method adds the counts of several keys.
+
+        args:
+        - key_counts (dict): key (str) -> count to add
+
+        return:
+        - None
+        """
+        if len(key_counts) == 0:
+            return
+        counts = np.fromiter(key_counts.values(), dtype=np.int64, count=len(key_counts))
+        cells = self._get_cells(list(key_counts))
+        for row in range(self._depth):
+            np.add.at(self._table[row], cells[:, row], counts)
+        self._total += int(counts.sum())
+
+    def estimate_many(self, keys: list) -> list:
+        """
+        This method returns the estimated counts of several keys.
+        """
+        if len(keys) == 0:
+            return []
+        cells = self._get_cells(keys)
+        return self._table[np.arange(self._depth), cells].min(axis=1).tolist()
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        if (self._width, self._depth, self._seed) != (other._width, other._depth, other._seed):
+            raise ValueError('Only count-min sketches with the same width, depth and seed can be merged')
+        self._table += other._table
+        self._total += other._total
+        return self
+
+class SpaceSaving:
+    def __init__(self, capacity: int = 1000) -> None:
+        """
+        This is the space saving class which is responsible for tracking the most frequent keys of a stream
+        with at most capacity counters.
+
+        args:
+        - capacity (int): number of monitored keys, monitored counts overestimate by at most N / capacity
+
+        return:
+        - None
+        """
+        self._capacity = capacity
+        # monitored key -> (count, error)
+        self._counters = dict()
+        self._total = 0
+
+    #region Properties
+    @property
+    def get_total(self):
+        return self._total
+    #endregion
+
+    def _get_min_count(self) -> int:
+        # keys which are not monitored by a full summary may have been seen up to its minimum count
+        if len(self._counters) < self._capacity:
+            return 0
+        return min(count for count, _ in self._counters.values())
+
+    def merge_counts(self, counters: dict, total: int, min_count: int = 0) -> None:
+        """
+        This method merges a summary into this one, keys absent from one side are counted with the minimum
+        count of that side as both count and error before the capacity largest counts are kept.
+
+        args:
+        - counters (dict): key -> (count, error) of the summary to merge in, exact counts have no error
+        - total (int): number of items summarized by the summary to merge in
+        - min_count (int): count up to which the keys absent from the summary may have been seen
+
+        return:
+        - None
+        """
+        self_min_count = self._get_min_count()
+        merged = dict()
+        for key in self._counters.keys() | counters.keys():
+            count, error = self._counters.get(key, (self_min_count, self_min_count))
+            other_count, other_error = counters.get(key, (min_count, min_count))
+            merged[key] = (count + other_count, error + other_error)
+        # kept sorted so that ties are broken the same way whatever the hashing of the process
+        self._counters = dict(sorted(merged.items(), key=lambda item: (-item[1][0], item[0]))[:self._capacity])
+        self._total += total
+
+    def update_many(self, key_counts: Counter) -> None:
+        self.merge_counts({key: (count, 0) for key, count in key_counts.items()}, sum(key_counts.values()))
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        self.merge_counts(other._counters, other._total, other._get_min_count())
+        return self
+
+    def get_counters(self) -> dict:
+        return dict(self._counters)
+
+class SketchTables:
+    def __init__(self, slot_columns: dict, width: int = 2**16, depth: int = 4, capacity: int = 1000, seed: int = 0, flush_size: int = 10000) -> None:
+        """
+        This is the sketch tables class which is the memory bounded counterpart of FrequencyTables, with the
+        same update, merge and query methods. Counts are buffered exactly until flush size distinct keys are
+        pending and then folded into the sketches.
+
+        args:
+        - slot_columns (dict): pattern name -> {slot column: record field}
+        - width (int): width of the count-min sketch of every pattern, see get_sketch_shape
+        - depth (int): depth of the count-min sketch of every pattern, see get_sketch_shape
+        - capacity (int): number of counters of every space saving summary, i.e. per pattern, scope and slot
+        - seed (int): hashing seed, only tables with the same width, depth and seed can be merged
+        - flush_size (int): number of distinct pending keys buffered before the sketches are updated
+
+        return:
+        - None
+        """
+        self._slot_columns = {pattern_name: dict(slots) for pattern_name, slots in slot_columns.items()}
+        self._width, self._depth, self._capacity, self._seed = width, depth, capacity, seed
+        self._flush_size = flush_size
+        # pattern name -> count-min sketch of every (slot column, category, value) key
+        self._sketches = {pattern_name: CountMinSketch(width, depth, seed) for pattern_name in self._slot_columns}
+        # pattern name -> category (None for the global scope) -> slot column (None for the slot tuples) -> space saving summary
+        self._summaries = {pattern_name: dict() for pattern_name in self._slot_columns}
+        # pattern name -> (category, slot column) -> Counter of pending values
+        self._pending = {pattern_name: dict() for pattern_name in self._slot_columns}
+        self._n_pending = 0
+
+    #region Properties
+    @property
+    def get_slot_columns(self):
+        return self._slot_columns
+
+    @property
+    def get_categories(self):
+        self.flush()
+        return sorted({category for summaries in self._summaries.values() for category in summaries if category is not None})
+    #endregion
+
+    @staticmethod
+    def _get_key(slot_column: str, category: str, value) -> str:
+        return json.dumps([slot_column, category, value])
+
+    def update(self, pattern_name: str, category: str, records: list) -> None:
+        """
+        This method counts the slots of the phrase records of one document, see FrequencyTables.update.
+        """
+        slots = self._slot_columns.get(pattern_name)
+        if slots is None or len(records) == 0:
+            return
+        pending = self._pending[pattern_name]
+        slot_tuples = [tuple(getattr(record, field_name) for field_name in slots.values()) for record in records]
+        for scope in (category, None):
+            for slot_idx, slot_column in enumerate(slots):
+                values = pending.setdefault((scope, slot_column), Counter())
+                self._n_pending -= len(values)
+                values.update(slot_tuple[slot_idx] for slot_tuple in slot_tuples)
+                self._n_pending += len(values)
+            values = pending.setdefault((scope, None), Counter())
+            self._n_pending -= len(values)
+            values.update(slot_tuples)
+            self._n_pending += len(values)
+        if self._n_pending >= self._flush_size:
+            self.flush()
+
+    def update_batch(self, pattern_name: str, categories: list, phrases: list) -> None:
+        for category, records in zip(categories, phrases):
+            self.update(pattern_name, category, records)
+
+    def _get_summary(self, pattern_name: str, category: str, slot_column: str) -> SpaceSaving:
+        return self._summaries[pattern_name].setdefault(category, dict()).setdefault(slot_column, SpaceSaving(self._capacity))
+
+    def flush(self) -> None:
+        """
+        This method folds the pending exact counts into the count-min sketches and space saving summaries.
+        """
+        for pattern_name, pending in self._pending.items():
+            key_counts = dict()
+            for (category, slot_column), values in pending.items():
+                self._get_summary(pattern_name, category, slot_column).update_many(values)
+                key_counts.update({self._get_key(slot_column, category, value): count for value, count in values.items()})
+            self._sketches[pattern_name].update_many(key_counts)
+            self._pending[pattern_name] = dict()
+        self._n_pending = 0
+
+    def merge(self, other: 'SketchTables') -> 'SketchTables':
+        """
+        This method adds the sketches of other sketch tables (e.g. of another worker) to these ones.
+
+        args:
+        - other (SketchTables): tables to merge in, with the same width, depth and seed
+
+        return:
+        - SketchTables: these tables, merged in place
+        """
+        self.flush()
+        other.flush()
+        for pattern_name, slots in other._slot_columns.items():
+            if pattern_name not in self._slot_columns:
+                self._slot_columns[pattern_name] = slots
+                self._sketches[pattern_name] = CountMinSketch(self._width, self._depth, self._seed)
+                self._summaries[pattern_name] = dict()
+                self._pending[pattern_name] = dict()
+            self._sketches[pattern_name].merge(other._sketches[pattern_name])
+            for category, summaries in other._summaries[pattern_name].items():
+                for slot_column, summary in summaries.items():
+                    self._get_summary(pattern_name, category, slot_column).merge(summary)
+        return self
+
+    def __iadd__(self, other: 'SketchTables') -> 'SketchTables':
+        return self.merge(other)
+
+    def _get_estimates(self, pattern_name: str, slot_column: str, category: str) -> dict:
+        # monitored values of the scope -> (count, error), counts tightened with the count-min sketch
+        self.flush()
+        counters = self._summaries[pattern_name].get(category, dict()).get(slot_column)
+        if counters is None:
+            return dict()
+        counters = counters.get_counters()
+        values = list(counters)
+        sketch_counts = self._sketches[pattern_name].estimate_many([self._get_key(slot_column, category, value) for value in values])
+        estimates = dict()
+        for value, sketch_count in zip(values, sketch_counts):
+            count, error = counters[value]
+            estimates[value] = (min(count, sketch_count), min(error, sketch_count))
+        return estimates
+
+    def estimate(self, pattern_name: str, slot_column: str, value, category: str = None) -> int:
+        """
+        This method returns the estimated count of any slot value (or slot tuple when slot column is None),
+        never below the true count.
+        """
+        self.flush()
+        return self._sketches[pattern_name].estimate_many([self._get_key(slot_column, category, value)])[0]
+
+    def get_slot_counts(self, pattern_name: str, slot_column: str, category: str = None) -> Counter:
+        """
+        This method returns the estimated counts of the monitored values of a slot, see FrequencyTables.get_slot_counts.
+        """
+        return Counter({value: count for value, (count, _) in self._get_estimates(pattern_name, slot_column, category).items()})
+
+    def get_tuple_counts(self, pattern_name: str, category: str = None) -> Counter:
+        """
+        This method returns the estimated counts of the monitored slot tuples, see FrequencyTables.get_tuple_counts.
+        """
+        return Counter({value: count for value, (count, _) in self._get_estimates(pattern_name, None, category).items()})
+
+    def most_common(self, pattern_name: str, slot_column: str, k: int = 10, category: str = None) -> list:
+        return self.get_slot_counts(pattern_name, slot_column, category=category).most_common(k)
+
+    def most_common_tuples(self, pattern_name: str, k: int = 10, category: str = None) -> list:
+        return self.get_tuple_counts(pattern_name, category=category).most_common(k)
+
+    def to_frame(self, pattern_name: str, slot_column: str = None) -> pd.DataFrame:
+        """
+        This method returns the per category estimated counts of the monitored values of a slot, or of the slot
+        tuples when no slot column is given, see FrequencyTables.to_frame. ERROR is the maximum overcount.
+        """
+        self.flush()
+        slot_columns = [slot_column] if slot_column is not None else list(self._slot_columns[pattern_name])
+        rows = []
+        for category in self._summaries[pattern_name]:
+            if category is None:
+                continue
+            for value, (count, error) in self._get_estimates(pattern_name, slot_column, category).items():
+                rows.append((category, value, count, error) if slot_column is not None else (category, *value, count, error))
+        frame = pd.DataFrame(rows, columns=['CATEGORY'] + slot_columns + ['COUNTER', 'ERROR'])
+        return frame.sort_values(['COUNTER'] + slot_columns, ascending=[False] + [True]*len(slot_columns), ignore_index=True)
+
+    def save(self, file_path: str) -> None:
+        self.flush()
+        with open(file_path, mode='wb') as file:
+            pickle.dump(self, file)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'SketchTables':
+        with open(file_path, mode='rb') as file:
+            return pickle.load(file)
+
+def create_frequency_tables(slot_columns: dict, counting_mode: str = 'exact', sketch_params: dict = None):
+    """
+    This function creates the tables counting the slots of the phrases.
+
+    args:
+        slot_columns (dict): pattern name -> {slot column: record field}
+        counting_mode (str, optional): 'exact' for FrequencyTables, 'sketch' for the memory bounded SketchTables. Defaults to 'exact'.
+        sketch_params (dict, optional): keyword arguments of SketchTables e.g. {'width': 2**18, 'capacity': 5000}. Defaults to None.
+
+    returns:
+        FrequencyTables or SketchTables: empty tables
+    """
+    if counting_mode == 'exact':
+        return FrequencyTables(slot_columns)
+    if counting_mode == 'sketch':
+        return SketchTables(slot_columns, **(sketch_params or dict()))
+    raise ValueError(f"Unknown counting mode '{counting_mode}', expected one of {COUNTING_MODES}")
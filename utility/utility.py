@@ -9,21 +9,99 @@ __status__ = "Development"
 
 import spacy
 
-def load_spacy_model(model_name, exclude_list=None):
+# Pipeline components required by the POS / dependency based pattern rules
+RULES_PROFILE_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"]
+MODEL_PROFILES = ["rules"]
+
+def load_model_config(model_name):
+    """
+    This method reads the config of an installed spacy package or a model directory
+    without loading any of the model weights
+    model_name (str): model name or path of the model directory
+    """
+    if spacy.util.is_package(model_name):
+        package_path = spacy.util.get_package_path(model_name)
+        meta = spacy.util.get_model_meta(package_path)
+        model_path = package_path / f"{meta['lang']}_{meta['name']}-{meta['version']}"
+    else:
+        model_path = spacy.util.ensure_path(model_name)
+    return spacy.util.load_config(model_path / "config.cfg", interpolate=False)
+
+def _find_config_values(config_section, key):
+    """
+    This method recursively collects every value stored under the key within a
+    (nested) config section
+    config_section (dict): config section to search
+    key (str): key to look for
+    """
+    values = []
+    for section_key, section_value in config_section.items():
+        if section_key == key:
+            values.append(section_value)
+        if isinstance(section_value, dict):
+            values.extend(_find_config_values(section_value, key))
+    return values
+
+def get_profile_exclude_list(model_name, profile):
+    """
+    This method works out what needs to be excluded while loading the model for the
+    requested profile. The 'rules' profile keeps the tagger, parser, attribute ruler and
+    lemmatizer along with the embedding layers they listen to, and excludes every other
+    component. The static vectors table is excluded too unless one of the kept components
+    uses it as an input feature (e.g. en_core_web_md / en_core_web_lg tok2vec), in which
+    case dropping it would change the parses
+    model_name (str): model name or path of the model directory
+    profile (str): name of the profile, one of MODEL_PROFILES
+    """
+    config = load_model_config(model_name)
+    pipeline = list(config["nlp"]["pipeline"])
+    components = config["components"]
+
+    required_components = [name for name in pipeline if name in RULES_PROFILE_COMPONENTS]
+    # keep shared embedding components (tok2vec / transformer) listened to by the required components
+    for name in list(required_components):
+        for upstream in _find_config_values(components.get(name, {}), "upstream"):
+            if upstream == "*":
+                required_components.extend(
+                    [pipe for pipe in pipeline if components[pipe].get("factory") in ("tok2vec", "transformer")]
+                )
+            elif upstream in pipeline:
+                required_components.append(upstream)
+
+    exclude_list = [name for name in pipeline if name not in required_components]
+
+    feature_values = []
+    for name in set(required_components):
+        feature_values.extend(_find_config_values(components.get(name, {}), "include_static_vectors"))
+        feature_values.extend(_find_config_values(components.get(name, {}), "@architectures"))
+    uses_static_vectors = any(value is True or "StaticVectors" in str(value) for value in feature_values)
+    if not uses_static_vectors:
+        exclude_list.append("vectors")
+    return exclude_list
+
+def load_spacy_model(model_name, exclude_list=None, profile=None):
     """
     This method loads spacy model based on language name else download it and
     load it
     model_name (str): model name to load
-    exclude_list (list, str): 
+    exclude_list (list, str): pipeline components to exclude
+    profile (str): optional profile deciding the components to load, 'rules' loads only
+    what the pattern rules need. Takes precedence over exclude_list
     """
-    excluded_steps = ["tagger", "parser", "ner", "entity_linker", 
+    excluded_steps = ["tagger", "parser", "ner", "entity_linker",
                       "entity_ruler", "textcat", "morphologizer",
-                      "attribute_ruler", "senter", "sentencizer", 
+                      "attribute_ruler", "senter", "sentencizer",
                       "token2vec", "transformer"] if exclude_list is None else exclude_list
+    if profile is not None and profile not in MODEL_PROFILES:
+        raise ValueError(f"Unknown model profile '{profile}', expected one of {MODEL_PROFILES}")
     try:
+        if profile is not None:
+            excluded_steps = get_profile_exclude_list(model_name, profile)
         spacy_model = spacy.load(model_name, exclude=excluded_steps)
     except OSError:
         spacy.cli.download(model_name)
+        if profile is not None:
+            excluded_steps = get_profile_exclude_list(model_name, profile)
         spacy_model = spacy.load(model_name, exclude=excluded_steps)
     finally:
-        return spacy_model
\ No newline at end of file
+        return spacy_model